@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
-from typing import Optional
-from app.database.connection import get_db
-from app.services.analytics_service import calculate_revenue_metrics, get_daily_statistics
+from typing import List, Optional
+from app.database.connection import get_read_db, get_read_session, run_db
+from app.models.schemas import DailyMetricsResponse
+from app.services.analytics_service import calculate_revenue_metrics, get_daily_statistics, get_occupancy_range
+from app.utils.cache import cached, query_cache
+from app.utils.serialization import RESPONSE_FORMAT_PATTERN, rows_response
 
 router = APIRouter(prefix ="/analytics", tags =["Analytics"])
 
 @router.get("/revenue")
-def get_revenue_analytics(
+@cached("analytics.revenue")
+async def get_revenue_analytics(
     hotel_id: Optional[int] = None,
     start_date: Optional[date] = Query(None, description="Start date for analysis"),
     end_date: Optional[date] = Query(None, description="End date for analysis"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     
     #get the revenue analytics for a period
@@ -22,8 +26,9 @@ def get_revenue_analytics(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    metrics = calculate_revenue_metrics(
-        db =db,
+    metrics = await run_db(
+        db,
+        calculate_revenue_metrics,
         hotel_id= hotel_id,
         start_date= start_date,
         end_date= end_date
@@ -34,27 +39,86 @@ def get_revenue_analytics(
 
 
 @router.get("/daily/{hotel_id}")
-def get_daily_analytics(
+async def get_daily_analytics(
     hotel_id: int,
     target_date: date = Query(default=None, description="Date for analysis (default: today)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_session)
 ):
     """
     Get analytics for a specific date and hotel.
+    Always a sync session in the threadpool: occupancy index builds block
+    and must not run on the event loop (see run_db).
     """
     if not target_date:
         target_date = datetime.now().date()
     
-    stats = get_daily_statistics(db=db, hotel_id=hotel_id, target_date=target_date)
+    stats = await run_db(db, get_daily_statistics, hotel_id=hotel_id, target_date=target_date)
     return stats
 
 
+@router.get("/occupancy/{hotel_id}")
+async def get_occupancy_analytics(
+    hotel_id: int,
+    start_date: Optional[date] = Query(None, description="First night of the range"),
+    end_date: Optional[date] = Query(None, description="Last night of the range (default: today)"),
+    db: Session = Depends(get_read_session)
+):
+    """
+    Room nights, revenue and average occupancy for a hotel over a date range.
+    Served from the occupancy index in the threadpool, like /daily.
+    """
+    if not end_date:
+        end_date = datetime.now().date()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    return await run_db(db, get_occupancy_range, hotel_id=hotel_id, start_date=start_date, end_date=end_date)
+
+
+
+@router.get("/metrics/{hotel_id}", response_model=List[DailyMetricsResponse])
+async def get_daily_metrics_series(
+    hotel_id: int,
+    start_date: Optional[date] = Query(None, description="First day of the series"),
+    end_date: Optional[date] = Query(None, description="Last day of the series (default: today)"),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stored daily metrics for a hotel, oldest day first.
+    format=compact returns one array per metric instead of one object per day.
+    """
+    from app.models.hotel import DailyMetrics
+
+    if not end_date:
+        end_date = datetime.now().date()
+    if not start_date:
+        start_date = end_date - timedelta(days=365)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    metrics = await run_db(db, lambda s: s.query(DailyMetrics).filter(
+        DailyMetrics.hotel_id == hotel_id,
+        DailyMetrics.date >= start_date,
+        DailyMetrics.date <= end_date
+    ).order_by(DailyMetrics.date).all())
+
+    fast = rows_response(DailyMetricsResponse, metrics, response_format)
+    return fast if fast is not None else metrics
+
+
 
 @router.get("/summary")
-def get_overall_summary(db: Session = Depends(get_db)):
+@cached("analytics.summary")
+async def get_overall_summary(db: Session = Depends(get_read_db)):
     
     #Get overall system summary.
-    
+    return await run_db(db, _overall_summary)
+
+
+def _overall_summary(db: Session):
     from app.models.hotel import Hotel, Room, Booking
     
     total_hotels = db.query(Hotel).count()
@@ -77,4 +141,12 @@ def get_overall_summary(db: Session = Depends(get_db)):
         "active_bookings": active_bookings,
         "current_month_revenue": metrics["total_revenue"],
         "current_month_occupancy": metrics["occupancy_rate"]
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """
+    Hit/miss counters of the analytics and smart-query cache (this worker process).
+    """
+    return query_cache.stats()
@@ -1,27 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional 
 from datetime import date
-from app.database.connection import get_db
+import csv
+import io
+import json
+from app.database.connection import get_db, SessionLocal, stick_to_primary
 from app.models.hotel import Booking 
 from app.models.schemas import BookingCreate, BookingResponse
+from app.services.booking_events import record_booking_changes, snapshot
+from app.utils.pagination import NEXT_CURSOR_HEADER, iter_keyset, keyset_page
+from app.utils.serialization import RESPONSE_FORMAT_PATTERN, rows_response
 
 router = APIRouter(prefix ="/bookings", tags =["Bookings"])
 
 @router.get("/", response_model=List[BookingResponse])
 def get_all_bookings(
+    response: Response,
     hotel_id: Optional[int] =None,
     status_filter: Optional[str] = Query(None, alias = "status"),
     start_date: Optional[date]= None,
     end_date: Optional[date] =None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     skip: int =0,
-    limit: int =100,
+    limit: int = Query(100, ge=1, le=1000),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
     db: Session= Depends(get_db)
 ):
-    #get all bookings with Optional filters
+    #get all bookings with Optional filters, newest check-in first.
+    #Pages are keyed on (check_in_date, id); follow the X-Next-Cursor header. skip is kept for old clients.
+    #format=compact returns {"count", "columns": {field: [values]}} instead of a list of objects.
 
-    query = db.query(Booking)
+    query = _filtered_bookings(db.query(Booking), hotel_id, status_filter, start_date, end_date)
 
+    try:
+        bookings, next_cursor = keyset_page(
+            query, [Booking.check_in_date, Booking.id], limit, cursor, descending=True,
+            offset=0 if cursor else skip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    fast = rows_response(BookingResponse, bookings, response_format, headers)
+    if fast is not None:
+        return fast
+    if headers:
+        response.headers.update(headers)
+    return bookings
+
+
+# Columns written by /bookings/export, in output order
+EXPORT_COLUMNS = [
+    Booking.id, Booking.hotel_id, Booking.room_id, Booking.check_in_date, Booking.check_out_date,
+    Booking.guest_name, Booking.guest_email, Booking.num_guests, Booking.booking_price,
+    Booking.base_price, Booking.booking_date, Booking.booking_source, Booking.status
+]
+EXPORT_BATCH_SIZE = 5000
+
+
+def _filtered_bookings(query, hotel_id, status_filter, start_date, end_date):
     if hotel_id:
         query = query.filter(Booking.hotel_id == hotel_id)
     if status_filter:
@@ -30,8 +70,57 @@ def get_all_bookings(
         query = query.filter(Booking.check_in_date >= start_date)
     if end_date:
         query = query.filter(Booking.check_out_date <= end_date)
-    Bookings = query.order_by(Booking.check_in_date.desc()).offset(skip).limit(limit)
-    return Bookings
+    return query
+
+
+def _export_lines(stmt, export_format: str):
+    # Runs after the request's session is gone, so it owns its session
+    names = [c.key for c in EXPORT_COLUMNS]
+    with SessionLocal() as db:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+        for rows in iter_keyset(db, stmt, [Booking.id], batch_size=EXPORT_BATCH_SIZE):
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [v.isoformat() if hasattr(v, "isoformat") else v for v in row] for row in rows
+                )
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(names, row)), default=lambda v: v.isoformat()) + "\n"
+                    for row in rows
+                )
+
+
+@router.get("/export")
+def export_bookings(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    hotel_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after_id: Optional[int] = Query(None, description="Only bookings with a larger id (incremental sync)")
+):
+    """
+    Stream every matching booking as NDJSON or CSV, ordered by id.
+    Rows are read in keyset batches, so memory use does not grow with the export.
+    """
+    stmt = select(*EXPORT_COLUMNS)
+    stmt = _filtered_bookings(stmt, hotel_id, status_filter, start_date, end_date)
+    if after_id:
+        stmt = stmt.where(Booking.id > after_id)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_lines(stmt, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="bookings.{export_format}"'}
+    )
 
 @router.get("/{booking_id}", response_model = BookingResponse)
 def get_booking(booking_id: int, db: Session = Depends(get_db)):
@@ -48,19 +137,22 @@ def get_booking(booking_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-def create_booking(booking: BookingCreate, db: Session = Depends(get_db)):
+def create_booking(booking: BookingCreate, response: Response, db: Session = Depends(get_db)):
     """
     Create a new booking.
     """
     db_booking = Booking(**booking.model_dump())
     db.add(db_booking)
+    db.flush()
+    record_booking_changes(db, added=[snapshot(db_booking)])
     db.commit()
     db.refresh(db_booking)
+    stick_to_primary(response)
     return db_booking
 
 
 @router.patch("/{booking_id}/cancel", response_model=BookingResponse)
-def cancel_booking(booking_id: int, db:Session = Depends(get_db)):
+def cancel_booking(booking_id: int, response: Response, db:Session = Depends(get_db)):
 
     #cancel a booking
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
@@ -70,7 +162,11 @@ def cancel_booking(booking_id: int, db:Session = Depends(get_db)):
             detail = f"Booking with ID {booking_id} not found"
         )
     
+    before = snapshot(booking)
     booking.status = "cancelled"
+    db.flush()
+    record_booking_changes(db, removed=[before], added=[snapshot(booking)])
     db.commit()
     db.refresh(booking)
+    stick_to_primary(response)
     return booking
\ No newline at end of file
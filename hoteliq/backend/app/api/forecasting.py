@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+from app.database.connection import get_read_session
+from app.models.schemas import ForecastResponse
+from app.services.forecasting import ForecastEngine
+from app.services.job_runner import job_runner
+
+router = APIRouter(prefix="/forecasting", tags=["Forecasting"])
+
+
+@router.get("/models")
+def list_forecast_models(db: Session = Depends(get_read_session)):
+    #Stored forecast models with the data version they were trained on
+    engine = ForecastEngine(db)
+    return {"engine": engine.engine, "models": engine.list_models()}
+
+
+@router.post("/train", status_code=status.HTTP_202_ACCEPTED)
+def train_forecast_models(
+    hotel_id: Optional[List[int]] = Query(None),
+    room_types: bool = False,
+    force: bool = False
+):
+    """
+    Train forecast models for all hotels (or the given hotel_id values) as a background job.
+    Models whose data has not changed since their last training are kept unless force=true.
+    Poll /jobs/{job_id} for the result.
+    """
+    job = job_runner.submit("train_forecasts", hotel_ids=hotel_id, room_types=room_types, force=force)
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+@router.post("/backtests", status_code=status.HTTP_202_ACCEPTED)
+def run_backtest(
+    hotel_id: Optional[List[int]] = Query(None),
+    horizons: List[int] = Query([7, 14, 30], description="Forecast horizons in days"),
+    folds: int = Query(8, ge=1, le=104),
+    step: int = Query(7, ge=1, le=365, description="Days between cutoffs")
+):
+    """
+    Run a rolling-origin backtest of the forecast models as a background job.
+    The job result has the report_id of the saved report.
+    """
+    if not all(1 <= h <= 365 for h in horizons):
+        raise HTTPException(status_code=422, detail="Horizons must be between 1 and 365 days")
+    job = job_runner.submit(
+        "backtest_forecasts", hotel_ids=hotel_id, horizons=horizons, folds=folds, step=step
+    )
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+@router.get("/backtests")
+def list_backtests(db: Session = Depends(get_read_session)):
+    #Saved backtest reports, newest first (summaries only)
+    from app.services.backtesting import Backtester
+    return Backtester(db).list_reports()
+
+
+@router.get("/backtests/{report_id}")
+def get_backtest(report_id: str, db: Session = Depends(get_read_session)):
+    from app.services.backtesting import Backtester
+    try:
+        return Backtester(db).load_report(report_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get("/backtests/{base_id}/diff/{other_id}")
+def diff_backtests(base_id: str, other_id: str, db: Session = Depends(get_read_session)):
+    """
+    Metric changes between two backtest reports (other - base; negative is better).
+    """
+    from app.services.backtesting import Backtester
+    backtester = Backtester(db)
+    try:
+        return Backtester.diff_reports(backtester.load_report(base_id), backtester.load_report(other_id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get("/{hotel_id}", response_model=List[ForecastResponse])
+def get_forecast(
+    hotel_id: int,
+    response: Response,
+    days: int = Query(30, ge=1, le=365),
+    room_type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    db: Session = Depends(get_read_session)
+):
+    """
+    Daily occupancy and revenue forecast for a hotel (or one of its room types).
+
+    Served from the stored model. When the hotel's data changed since it was
+    trained, a background job refits it and the stored model is served until
+    then; X-Model-Version and X-Model-History-End identify the model used.
+    The confidence interval is for occupancy.
+    """
+    engine = ForecastEngine(db)
+    try:
+        bundle = engine.get_model(hotel_id, room_type)
+        forecast = engine.forecast(hotel_id, days=days, room_type=room_type, start_date=start_date, bundle=bundle)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    response.headers["X-Model-Version"] = bundle["version"]
+    response.headers["X-Model-History-End"] = bundle["history_end"]
+    return forecast
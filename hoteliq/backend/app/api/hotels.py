@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session 
-from typing import List
-from app.database.connection import get_db
+from typing import List, Optional
+from app.database.connection import get_db, stick_to_primary
 from app.models.hotel import Hotel
 from app.models.schemas import HotelCreate, HotelResponse
+from app.utils.cache import query_cache
+from app.utils.occupancy_index import occupancy_index
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_page
 
 router = APIRouter(prefix = "/hotels", tags = ["Hotels"])
 
 @router.get("/", response_model = List[HotelResponse])
 def get_all_hotels(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     skip: int =0,
-    limit:int =100,
+    limit:int = Query(100, ge=1, le=1000),
     db: Session= Depends(get_db)
 ):
-    #Get all hotels with pagination
-    hotels = db.query(Hotel).offset(skip).limit(limit).all()
+    #Get all hotels, keyset-paginated by id (skip is kept for old clients)
+    query = db.query(Hotel)
+    try:
+        hotels, next_cursor = keyset_page(query, [Hotel.id], limit, cursor, offset=0 if cursor else skip)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return hotels
 
 @router.get("/{hotel_id}", response_model= HotelResponse)
@@ -33,7 +44,7 @@ def get_hotel(hotel_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=HotelResponse, status_code=status.HTTP_201_CREATED)
-def create_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
+def create_hotel(hotel: HotelCreate, response: Response, db: Session = Depends(get_db)):
 
     #Check if hotel already exists
     existing = db.query(Hotel).filter(Hotel.name == hotel.name).first()
@@ -47,12 +58,14 @@ def create_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
     db.add(db_hotel)
     db.commit()
     db.refresh(db_hotel)
+    query_cache.invalidate_hotels([db_hotel.id])
+    stick_to_primary(response)
     return db_hotel
 
 
 
 @router.delete("/{hotel_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_hotel(hotel_id: int, db:Session = Depends(get_db)):
+def delete_hotel(hotel_id: int, response: Response, db:Session = Depends(get_db)):
     #Delete a hotel by ID
     hotel = db.query(Hotel).filter(Hotel.id == hotel_id).first()
 
@@ -63,4 +76,7 @@ def delete_hotel(hotel_id: int, db:Session = Depends(get_db)):
         )
     db.delete(hotel)
     db.commit()
+    query_cache.invalidate_hotels([hotel_id])
+    occupancy_index.invalidate([hotel_id])
+    stick_to_primary(response)
     return None
\ No newline at end of file
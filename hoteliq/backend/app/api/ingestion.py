@@ -1,25 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status
 from sqlalchemy.orm import Session
 from typing import Dict
-import pandas as pd
-import io
+import os
+import shutil
 from datetime import datetime
 
-from app.database.connection import get_db
-from app.services.etl_pipeline import ETLPipeline
+from app.database.connection import get_db, get_read_session
+from app.services.job_runner import job_runner
 from app.utils.metrics_calculator import MetricsCalculator
+from app.utils.serialization import RESPONSE_FORMAT_PATTERN, FastJSONResponse, columnar
 
 router = APIRouter(prefix="/ingestion", tags=["Data Ingestion"])
 
 
-@router.post("/upload-csv")
-async def upload_csv_bookings(
+# Uploads are spooled here once and streamed through the pipeline in chunks
+UPLOAD_DIR = "data/uploads"
+CSV_CHUNK_SIZE = 50000
+
+
+def _job_accepted(job) -> Dict:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+@router.post("/upload-csv", status_code=status.HTTP_202_ACCEPTED)
+def upload_csv_bookings(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    chunksize: int = Query(CSV_CHUNK_SIZE, ge=100, description="Rows per processing chunk")
 ):
     
     #Upload a CSV file with booking data.
     #Runs complete ETL pipeline: validation, transformation, loading.
+    #The file is streamed to disk and processed chunk by chunk in a background job;
+    #poll /jobs/{job_id} for progress and the pipeline result.
     
 
     
@@ -32,22 +49,22 @@ async def upload_csv_bookings(
         )
     
     try:
-        # Read CSV from upload
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Save temporarily (optional - for debugging)
-        temp_path = f"data/uploads/{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        df.to_csv(temp_path, index=False)
+        # Spool the upload to disk without loading it into memory
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        temp_path = os.path.join(
+            UPLOAD_DIR,
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.path.basename(file.filename)}"
+        )
+        with open(temp_path, 'wb') as out:
+            shutil.copyfileobj(file.file, out, length=1024 * 1024)
         
         # Run ETL pipeline
-        pipeline = ETLPipeline(db)
-        result = pipeline.run_full_pipeline(source='csv', file_path=temp_path)
+        job = job_runner.submit("csv_ingest", file_path=temp_path, chunksize=chunksize)
         
         return {
             "filename": file.filename,
             "uploaded_at": datetime.now().isoformat(),
-            "pipeline_result": result
+            **_job_accepted(job)
         }
         
     except Exception as e:
@@ -57,29 +74,23 @@ async def upload_csv_bookings(
         )
 
 
-@router.post("/process-existing-data")
+@router.post("/process-existing-data", status_code=status.HTTP_202_ACCEPTED)
 def process_existing_bookings(
     hotel_id: int = None,
-    start_date: str = None,
-    db: Session = Depends(get_db)
+    start_date: str = None
 ):
     """
     Process existing bookings from database through ETL pipeline.
     Useful for re-engineering features on historical data.
+    Runs as a background job; poll /jobs/{job_id} for the result.
     
     **Parameters:**
     - hotel_id: Optional - filter by specific hotel
     - start_date: Optional - filter bookings from this date (YYYY-MM-DD)
     """
     try:
-        pipeline = ETLPipeline(db)
-        result = pipeline.run_full_pipeline(
-            source='database',
-            hotel_id=hotel_id,
-            start_date=start_date
-        )
-        
-        return result
+        job = job_runner.submit("process_existing", hotel_id=hotel_id, start_date=start_date)
+        return _job_accepted(job)
         
     except Exception as e:
         raise HTTPException(
@@ -126,26 +137,18 @@ def calculate_daily_metrics(
         )
 
 
-@router.post("/recalculate-all-metrics")
-def recalculate_all_metrics(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
+@router.post("/recalculate-all-metrics", status_code=status.HTTP_202_ACCEPTED)
+def recalculate_all_metrics():
     """
     Recalculate all daily metrics for all hotels.
-    This runs in the background to avoid timeout.
-    
-    **Warning:** This can take several minutes for large datasets.
+    This runs as a background job with its own database session;
+    poll /jobs/{job_id} for the result.
     """
     try:
-        # Run in background
-        background_tasks.add_task(
-            MetricsCalculator.recalculate_all_metrics,
-            db
-        )
+        job = job_runner.submit("recalculate_metrics")
         
         return {
-            "status": "started",
+            **_job_accepted(job),
             "message": "Metrics recalculation started in background"
         }
         
@@ -157,13 +160,14 @@ def recalculate_all_metrics(
 
 
 @router.get("/data-quality-check")
-def check_data_quality(db: Session = Depends(get_db)):
+def check_data_quality(db: Session = Depends(get_read_session)):
     """
     Run data quality checks on existing bookings.
     Returns validation report without modifying data.
     """
     try:
         from app.services.data_validator import BookingDataValidator
+        from app.services.etl_pipeline import ETLPipeline
         
         # Extract bookings
         pipeline = ETLPipeline(db)
@@ -182,39 +186,102 @@ def check_data_quality(db: Session = Depends(get_db)):
         )
 
 
+@router.post("/rebuild-rollups")
+def rebuild_rollups(db: Session = Depends(get_db)):
+    """
+    Recompute the booking_rollups table from raw bookings.
+    """
+    from app.services.booking_rollup import BookingRollups
+    from app.utils.cache import query_cache
+    
+    start_time = datetime.now()
+    try:
+        rows = BookingRollups.rebuild(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error rebuilding rollups: {str(e)}")
+    query_cache.invalidate_all()
+    
+    return {
+        "rollup_rows": rows,
+        "duration_seconds": (datetime.now() - start_time).total_seconds()
+    }
+
+
+@router.get("/rollup-consistency")
+def check_rollup_consistency(db: Session = Depends(get_db)):
+    """
+    Compare booking_rollups with the raw bookings table.
+    """
+    from app.services.booking_rollup import BookingRollups
+    
+    return BookingRollups.check_consistency(db)
+
+
+@router.post("/feature-store/sync", status_code=status.HTTP_202_ACCEPTED)
+def sync_feature_store(rebuild: bool = False):
+    """
+    Append features for new bookings to the feature store (or recompute it
+    with rebuild=true) in a background job; poll /jobs/{job_id} for the result.
+    """
+    try:
+        job = job_runner.submit("sync_feature_store", rebuild=rebuild)
+        return _job_accepted(job)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error starting feature store sync: {str(e)}"
+        )
+
+
 @router.get("/feature-summary")
 def get_feature_summary(
     limit: int = 100,
-    db: Session = Depends(get_db)
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    db: Session = Depends(get_read_session)
 ):
     
     #Get summary of engineered features from recent bookings shows what ML features are available.
+    #Served from the feature store, which ETL runs and POST /ingestion/feature-store/sync keep up to date;
+    #features are computed on the fly only while the store is unavailable or empty.
     try:
+        from app.services.etl_pipeline import ETLPipeline
         from app.services.feature_engineering import FeatureEngineer
+        from app.services.feature_store import FeatureStore
         
-        # Extract recent bookings
-        pipeline = ETLPipeline(db)
-        df = pipeline.extract_from_database()
-        
-        if df.empty:
-            return {"message": "No bookings found"}
+        try:
+            df_featured = FeatureStore(db).read(limit=limit)
+        except RuntimeError:
+            df_featured = None
         
-        # Limit for performance
-        df = df.head(limit)
+        if df_featured is None or df_featured.empty:
+            # No pyarrow or nothing synced yet: compute features for a sample of bookings on the fly
+            pipeline = ETLPipeline(db)
+            df = pipeline.extract_from_database()
+            if df.empty:
+                return {"message": "No bookings found"}
+            df = df.head(limit).copy()
+            df_featured = FeatureEngineer.create_all_features(df, db)
         
-        # Create features
-        df_featured = FeatureEngineer.create_all_features(df, db)
+        if df_featured.empty:
+            return {"message": "No bookings found"}
         
         # Get summary
         summary = FeatureEngineer.get_feature_summary(df_featured)
         
-        # Sample data
-        sample = df_featured.head(5).to_dict(orient='records')
+        # Sample data; FastJSONResponse writes NaN and numpy scalars directly
+        sample = df_featured.head(5)
+        if response_format == "compact":
+            sample = columnar(sample)
+        else:
+            sample = sample.to_dict(orient='records')
         
-        return {
+        return FastJSONResponse({
             "feature_summary": summary,
             "sample_records": sample
-        }
+        })
         
     except Exception as e:
         raise HTTPException(
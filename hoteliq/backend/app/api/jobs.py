@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database.connection import get_db
+from app.models.job import Job
+from app.models.schemas import JobResponse
+from app.services.job_runner import job_runner
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/", response_model=List[JobResponse])
+def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    #List recent jobs, newest first
+    query = db.query(Job)
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    return query.order_by(Job.created_at.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Poll a job's status and progress.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(job_id: str):
+    """
+    Cancel a job. Queued jobs stop immediately, running jobs at their next progress update.
+    """
+    job = job_runner.cancel(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return job
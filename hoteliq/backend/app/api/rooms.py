@@ -1,25 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.connection import get_db
+from typing import List, Optional
+from app.database.connection import get_db, stick_to_primary
 from app.models.hotel import Room
 from app.models.schemas import RoomCreate, RoomResponse
+from app.utils.cache import query_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_page
 
 router = APIRouter(prefix="/rooms", tags =["Rooms"])
 
 @router.get("/", response_model=List[RoomResponse])
 def get_all_rooms(
+    response: Response,
     hotel_id : int = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     skip: int =0,
-    limit: int =100,
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
-    #get all rooms, optionally filtered by hotel
+    #get all rooms, optionally filtered by hotel, keyset-paginated by id (skip is kept for old clients)
     query = db.query(Room)
     if hotel_id:
         query = query.filter(Room.hotel_id == hotel_id)
 
-    rooms = query.offset(skip).limit(limit).all()
+    try:
+        rooms, next_cursor = keyset_page(query, [Room.id], limit, cursor, offset=0 if cursor else skip)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return rooms
 
 
@@ -29,16 +38,18 @@ def get_room(room_id: int, db:Session = Depends(get_db)):
     room = db.query(Room).filter(Room.id == room_id).first()
     if not room:
         raise HTTPException(
-            status_code=status.HTTP_408_REQUEST_TIMEOUT,
+            status_code=status.HTTP_404_NOT_FOUND,
             detail = f"Room with ID {room_id} not found "
         )
     return room
 
 @router.post("/", response_model= RoomResponse, status_code=status.HTTP_201_CREATED)
-def create_room(room: RoomCreate, db: Session = Depends(get_db)):
+def create_room(room: RoomCreate, response: Response, db: Session = Depends(get_db)):
     db_room = Room(**room.model_dump())
-    db.room(db_room)
+    db.add(db_room)
     db.commit()
     db.refresh(db_room)
+    query_cache.invalidate_hotels([db_room.hotel_id])
+    stick_to_primary(response)
     return db_room
 
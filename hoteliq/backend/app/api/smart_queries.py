@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from database import date
+from datetime import date
 from typing import Optional
-from app.database.connection import get_db
+from app.database.connection import get_read_session
 from app.services.query_builder import QueryBuilder
+from app.utils.cache import cached
 
 router = APIRouter(prefix="/smart-queries", tags =["Smart Queries (No AI Cost)"])
 
 @router.get("/available")
-def list_available_queries(db:Session = Depends(get_db)):
+def list_available_queries(db:Session = Depends(get_read_session)):
 
     builder = QueryBuilder(db)
     return{
@@ -17,74 +18,85 @@ def list_available_queries(db:Session = Depends(get_db)):
     }
 
 @router.get("/total_revenue")
+@cached("smart_queries.total_revenue")
 def query_total_revenue(
     hotel_id: Optional[int] = None,
     start_date: Optional[date]= None,
     end_date: Optional[date] =None, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_session)
 ):
     builder = QueryBuilder(db)
     return builder.get_total_revenue(hotel_id,start_date, end_date)
 
 @router.get("/occupancy-stats/{hotel_id}")
+@cached("smart_queries.occupancy_stats")
 def query_occupancy_stats(
     hotel_id: int, 
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db:Session = Depends(get_db)
+    db:Session = Depends(get_read_session)
 ):
     builder = QueryBuilder(db)
     return builder.get_occupancy_stats(hotel_id, start_date, end_date)
 
 @router.get("/top_bookings")
+@cached("smart_queries.top_bookings")
 def query_top_bookings(
     limit: int = Query(10, ge =1, le =50),
     order_by:str = Query("price", regex="^(price|date)$"),
-    db:Session = Depends(get_db)
+    db:Session = Depends(get_read_session)
 ):
     builder = QueryBuilder(db)
     return builder.get_top_bookings(limit, order_by)
 
 @router.get("/booking-sources")
+@cached("smart_queries.booking_sources")
 def query_booking_sources(
     hotel_id: Optional[int] =None,
-    db:Session = Depends(get_db)
+    db:Session = Depends(get_read_session)
 ):
     builder = QueryBuilder(db)
     return builder.get_booking_source_distribution(hotel_id)
 
 
 @router.get("/weekend-vs-weekday/{hotel_id}")
+@cached("smart_queries.weekend_vs_weekday")
 def query_weekend_weekday(
     hotel_id: int,
-    db: Session = Depends(get_db)
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_read_session)
 ):
     """
     Question: "How do weekends compare to weekdays?"
     
     """
     builder = QueryBuilder(db)
-    return builder.get_weekend_vs_weekday_comparison(hotel_id)
+    return builder.get_weekend_vs_weekday_comparison(hotel_id, start_date, end_date)
 
 
 @router.get("/cancellations")
+@cached("smart_queries.cancellations")
 def query_cancellations(
     hotel_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_read_session)
 ):
     """
     Question: "What is my cancellation rate?"
     
     """
     builder = QueryBuilder(db)
-    return builder.get_cancellation_analysis(hotel_id)
+    return builder.get_cancellation_analysis(hotel_id, start_date, end_date)
 
 
 @router.get("/popular-rooms/{hotel_id}")
+@cached("smart_queries.popular_rooms")
 def query_popular_rooms(
     hotel_id: int,
     limit: int = Query(5, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_session)
 ):
     """
     Question: "Which room types are most popular?"
@@ -0,0 +1,80 @@
+"""
+One-off bootstrap stage: create tables, apply migrations, fail jobs the
+previous workers left unfinished and (optionally) load the sample dataset.
+
+Run it once per deployment, before starting the API workers, instead of on
+every worker boot:
+
+    python -m app.bootstrap                  # schema + migrations + sample data
+    python -m app.bootstrap --no-sample-data # schema + migrations only
+"""
+import argparse
+import time
+
+from app.database.connection import SessionLocal
+from app.database.init_db import init_database
+
+
+def refresh_derived_data(db, start_date, end_date) -> dict:
+    """
+    Rebuild booking rollups and daily metrics (forecasting and /analytics/metrics
+    read them) after bookings were inserted directly, e.g. by the data generator,
+    and invalidate the response cache and occupancy index.
+
+    In-process caches of running API workers are not reached from here; they
+    expire after CACHE_TTL_SECONDS / OCCUPANCY_INDEX_TTL_SECONDS (a shared
+    CACHE_BACKEND=redis is invalidated immediately).
+    """
+    from app.services.booking_rollup import BookingRollups
+    from app.utils.cache import query_cache
+    from app.utils.metrics_calculator import MetricsCalculator
+    from app.utils.occupancy_index import occupancy_index
+
+    rollup_rows = BookingRollups.rebuild(db)
+    db.commit()
+    metrics_calculated = MetricsCalculator.bulk_calculate_metrics(db, start_date, end_date)
+    query_cache.invalidate_all()
+    occupancy_index.invalidate()
+    return {"rollup_rows": rollup_rows, "metrics_calculated": metrics_calculated}
+
+
+def bootstrap(sample_data: bool = True, num_bookings: int = 500) -> dict:
+    """Bring the database schema up to date and seed sample data if requested."""
+    from app.services.job_runner import JobRunner
+
+    started = time.perf_counter()
+    init_database()
+
+    # Jobs run inside the API workers, so none survive the restart this precedes
+    result = {"sample_data": None, "interrupted_jobs": JobRunner.fail_interrupted()}
+    if sample_data:
+        from sqlalchemy import func
+        from app.models.hotel import Booking
+        from app.services.data_generator import generate_all_data
+
+        with SessionLocal() as db:
+            result["sample_data"] = generate_all_data(db, num_bookings=num_bookings)
+            if result["sample_data"]["bookings_created"]:
+                start_date, end_date = db.query(
+                    func.min(Booking.check_in_date), func.max(Booking.check_out_date)
+                ).one()
+                result.update(refresh_derived_data(db, start_date, end_date))
+
+    result["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare the HotelIQ database")
+    parser.add_argument("--no-sample-data", action="store_true", help="Only create the schema and run migrations")
+    parser.add_argument("--bookings", type=int, default=500, help="Sample bookings to generate")
+    args = parser.parse_args()
+
+    result = bootstrap(sample_data=not args.no_sample_data, num_bookings=args.bookings)
+    if result["interrupted_jobs"]:
+        print(f"Marked {result['interrupted_jobs']} interrupted job(s) as failed")
+    print(f"Bootstrap finished in {result['duration_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
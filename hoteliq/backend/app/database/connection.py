@@ -1,28 +1,249 @@
-from sqlalchemy import create_engine  #to create the engine for database url, for sqlite
+from sqlalchemy import create_engine, event  #to create the engine for database url, for sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
-import os 
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from typing import AsyncGenerator, Callable, Dict, Generator
+import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hoteliq.db")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args = {"check_same_thread":False} if "sqlite" in DATABASE_URL else {},
-    echo= True
+# Optional read replica for analytics, smart queries and ETL extraction; writes stay on DATABASE_URL
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL") or None
+
+# After a write, the client reads from the primary for this long (read-your-writes)
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+PRIMARY_READ_COOKIE = "hoteliq_read_primary_until"
+
+# Session.info["route"] of sessions reading from the replica (see session_route)
+REPLICA_ROUTE = "replica"
+PRIMARY_ROUTE = "primary"
+
+# SQL logging is for debugging only (DB_ECHO=1)
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+
+# Connection pool (ignored for in-memory SQLite, which has a single connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# SQLite tuning for local deployments
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Run read endpoints on an AsyncSession (needs greenlet and an async driver, e.g. aiosqlite/asyncpg;
+# python -m benchmarks.load_test --async-db checks it against the threadpool path)
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "0") == "1"
+
+# Async driver used for each sync URL scheme unless ASYNC_DATABASE_URL is set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url) -> bool:
+    database = make_url(url).database
+    return _is_sqlite(url) and (not database or database == ":memory:")
+
+
+def engine_options(url) -> Dict:
+    #create_engine keyword arguments for a URL, from the DB_* settings
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer; NORMAL sync is safe with WAL
+    cursor = dbapi_connection.cursor()
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def configure_engine(engine):
+    """Attach per-connection settings (SQLite pragmas) to a sync engine."""
+    if engine.dialect.name == "sqlite" and not _is_memory_sqlite(engine.url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+engine = configure_engine(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)))
+
+replica_engine = (
+    configure_engine(create_engine(REPLICA_DATABASE_URL, **engine_options(REPLICA_DATABASE_URL)))
+    if REPLICA_DATABASE_URL else None
 )
 
 #Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind = engine)
 
+#Read-only session factory: the replica when configured, otherwise the primary
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, info={"route": REPLICA_ROUTE})
+    if replica_engine is not None else SessionLocal
+)
+
 Base = declarative_base()
 
+def session_route(db) -> str:
+    """REPLICA_ROUTE if a (sync or async) session reads from the replica, else PRIMARY_ROUTE."""
+    info = getattr(db, "info", None) or {}
+    return info.get("route", PRIMARY_ROUTE)
+
+
 def get_db() -> Generator:
     db = SessionLocal()
-    try: 
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Write dependency; get_db is kept for the existing routers
+get_write_db = get_db
+
+
+def stick_to_primary(response: Response):
+    """Send this client's reads to the primary for REPLICA_STICKY_SECONDS (call after a write)."""
+    if replica_engine is None:
+        return
+    response.set_cookie(
+        PRIMARY_READ_COOKIE,
+        f"{time.time() + REPLICA_STICKY_SECONDS:.3f}",
+        max_age=int(REPLICA_STICKY_SECONDS) + 1,
+        httponly=True,
+        samesite="lax"
+    )
+
+
+def reads_from_primary(request: Request) -> bool:
+    #True if there is no replica or the client wrote recently
+    if replica_engine is None:
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_READ_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_session(request: Request) -> Generator:
+    """
+    Sync Session for read-only endpoints: the replica, or the primary
+    for clients that wrote within the last REPLICA_STICKY_SECONDS.
+    """
+    db = (SessionLocal if reads_from_primary(request) else ReadSessionLocal)()
+    try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """A sync URL with its async driver (ASYNC_DATABASE_URL overrides it for the primary)."""
+    explicit = os.getenv("ASYNC_DATABASE_URL")
+    if explicit and url == DATABASE_URL:
+        return explicit
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver known for '{parsed.drivername}', set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# sync URL -> (async engine, async session factory)
+_async_engines: Dict[str, tuple] = {}
+
+
+def get_async_engine(url: str = DATABASE_URL):
+    """
+    The async engine for a sync database URL, created on first use. Raises
+    RuntimeError if SQLAlchemy's asyncio extension or the async driver is not installed.
+    """
+    if url not in _async_engines:
+        try:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            async_url = async_database_url(url)
+            async_engine = create_async_engine(async_url, **engine_options(async_url))
+        except (ImportError, ValueError) as e:
+            raise RuntimeError(f"Async database engine unavailable: {e}") from e
+        configure_engine(async_engine.sync_engine)
+        route = REPLICA_ROUTE if url == REPLICA_DATABASE_URL and url != DATABASE_URL else PRIMARY_ROUTE
+        _async_engines[url] = (
+            async_engine,
+            async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False, info={"route": route})
+        )
+    return _async_engines[url][0]
+
+
+def async_session(url: str = DATABASE_URL):
+    """New AsyncSession on the database behind a sync URL."""
+    get_async_engine(url)
+    return _async_engines[url][1]()
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with async_session() as db:
+        yield db
+
+
+async def get_read_db(request: Request) -> AsyncGenerator:
+    """
+    Session for read-only endpoints, routed like get_read_session: an
+    AsyncSession when ASYNC_DB_ENABLED=1, otherwise a regular Session.
+    Pass it to run_db() rather than using it directly.
+    """
+    primary = reads_from_primary(request)
+    if ASYNC_DB_ENABLED:
+        async with async_session(DATABASE_URL if primary else REPLICA_DATABASE_URL) as db:
+            yield db
+    else:
+        db = (SessionLocal if primary else ReadSessionLocal)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def run_db(db, fn: Callable, *args, **kwargs):
+    """
+    Run sync ORM code `fn(session, *args, **kwargs)` without blocking the event loop:
+    on the loop via AsyncSession.run_sync for async sessions, in the threadpool otherwise.
+
+    Under run_sync, `fn` runs on the event loop thread and its queries yield to
+    other requests, so it must only query through `session`: no thread locks
+    held across queries and no sync sessions of its own. Code that needs either
+    (the occupancy index) takes a sync session from get_read_session instead.
+    """
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
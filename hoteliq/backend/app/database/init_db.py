@@ -1,11 +1,14 @@
 from app.database.connection import engine,Base
-from app.models.hotel import Hotel, Room, Booking ,DailyMetrics
+from app.database.migrations import run_migrations
+from app.models.hotel import Hotel, Room, Booking ,DailyMetrics, BookingRollup
+from app.models.job import Job
 
 def init_database():
 
     print("Creating database tables..")
     Base.metadata.create_all(bind= engine)
+    run_migrations(engine)
     print("Database tables created successfullyy")
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
@@ -0,0 +1,124 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all() only creates missing tables, so indexes and
+constraints added to existing tables are applied here. Each migration runs
+once, in its own transaction, and is recorded in the schema_version table.
+New databases get the same indexes from create_all; the migrations are then
+no-ops (Index.create(checkfirst=True)) and are only recorded.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.hotel import Booking, BookingRollup, DailyMetrics, Room
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _create_indexes(conn: Connection, table: Table, names: List[str]):
+    #Create the named indexes declared on a model's table, skipping existing ones.
+    #Names a later migration drops are no longer declared and are skipped too.
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        if name in indexes:
+            indexes[name].create(conn, checkfirst=True)
+
+
+def _drop_index_if_exists(conn: Connection, table: str, name: str):
+    if name not in {index["name"] for index in inspect(conn).get_indexes(table)}:
+        return
+    if conn.dialect.name in ("mysql", "mariadb"):
+        conn.execute(text(f"DROP INDEX {name} ON {table}"))
+    else:
+        conn.execute(text(f"DROP INDEX {name}"))
+
+
+def _booking_query_indexes(conn: Connection):
+    _create_indexes(conn, Booking.__table__, [
+        "ix_bookings_hotel_status_checkin",
+        "ix_bookings_status_checkin",
+        "ix_bookings_checkin",
+        "ix_bookings_price",
+        "ix_bookings_source_price",
+    ])
+
+
+def _booking_dedup_index(conn: Connection):
+    _create_indexes(conn, Booking.__table__, ["ix_bookings_dedup"])
+
+
+def _daily_metrics_unique_hotel_date(conn: Connection):
+    # Older databases can hold several rows per (hotel, day); keep the newest one.
+    # The derived table lets MySQL delete from the table it selects from.
+    newest = select(func.max(DailyMetrics.id).label("id")).group_by(
+        DailyMetrics.hotel_id, DailyMetrics.date
+    ).subquery()
+    removed = conn.execute(
+        delete(DailyMetrics.__table__).where(DailyMetrics.id.not_in(select(newest.c.id)))
+    ).rowcount
+    if removed:
+        print(f"  Removed {removed} duplicate daily_metrics rows")
+    _create_indexes(conn, DailyMetrics.__table__, ["uq_daily_metrics_hotel_date"])
+
+
+def _booking_rollup_backfill(conn: Connection):
+    from app.services.booking_rollup import BookingRollups
+    BookingRollup.__table__.create(conn, checkfirst=True)
+    rows = BookingRollups.rebuild(conn)
+    print(f"  Backfilled {rows} booking rollup rows")
+
+
+def _keyset_pagination_indexes(conn: Connection):
+    # (check_in_date, id) replaces the single-column check-in index
+    _drop_index_if_exists(conn, "bookings", "ix_bookings_checkin")
+    _create_indexes(conn, Booking.__table__, ["ix_bookings_checkin_id"])
+    _create_indexes(conn, Room.__table__, ["ix_rooms_hotel_id"])
+
+
+# (version, name, migration) in the order they must run. Append only.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "booking query indexes", _booking_query_indexes),
+    (2, "booking dedup key index", _booking_dedup_index),
+    (3, "unique (hotel_id, date) on daily_metrics", _daily_metrics_unique_hotel_date),
+    (4, "booking rollup backfill", _booking_rollup_backfill),
+    (5, "keyset pagination indexes", _keyset_pagination_indexes),
+]
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied migration version (0 for a fresh database)."""
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply all pending migrations and return the versions that were applied.
+    """
+    applied_before = current_version(engine)
+    applied = []
+
+    for version, name, migrate in MIGRATIONS:
+        if version <= applied_before:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(insert(schema_version).values(
+                version=version,
+                name=name,
+                applied_at=datetime.utcnow()
+            ))
+        print(f" Applied migration {version}: {name}")
+        applied.append(version)
+
+    return applied
@@ -1,79 +1,87 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database.init_db import init_database
-from app.database.connection import get_db
-from app.services.data_generator import generate_all_data
 
-# Import routers
-from app.api import hotels, rooms, bookings, analytics, ingestion
-from app.api import smart_queries, forecasting  # ← UPDATED (removed ai_chat)
+# Router modules, in the order their routes are registered
+ROUTERS = [
+    "hotels",
+    "rooms",
+    "bookings",
+    "analytics",
+    "ingestion",
+    "jobs",
+    "smart_queries",    #  FREE queries
+    "forecasting",
+]
 
-import uvicorn
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="HotelIQ Revenue Management API",
-    description="AI-powered revenue management platform with FREE open-source AI (no API costs!)",
-    version="1.0.0"
-)
+def create_app() -> FastAPI:
+    """
+    Build the API application.
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    Nothing here touches the database: schema creation, migrations and
+    sample data belong to the bootstrap stage (python -m app.bootstrap),
+    run once before the workers start. Routers import their heavy
+    dependencies (pandas, numpy) on first use.
+    """
+    import importlib
 
-# Initialize database on startup
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database tables on app startup"""
-    init_database()
-    
-    # Generate sample data (only once)
-    db = next(get_db())
-    try:
-        generate_all_data(db)
-    except Exception as e:
-        print(f"Data generation skipped or failed: {e}")
-    finally:
-        db.close()
+    # Initialize FastAPI app
+    app = FastAPI(
+        title="HotelIQ Revenue Management API",
+        description="AI-powered revenue management platform with FREE open-source AI (no API costs!)",
+        version="1.0.0"
+    )
 
-# Health check endpoints
-@app.get("/")
-async def root():
-    return {
-        "message": "HotelIQ Revenue Management API",
-        "status": "active",
-        "version": "1.0.0",
-        "features": {
-            "data_pipeline": "ETL with 50+ feature engineering",
-            "analytics": "Revenue metrics (ADR, RevPAR, Occupancy)",
-            "smart_queries": "Pre-built analytical queries (NO AI COST)",
-            "forecasting": "Prophet-based demand prediction (FREE)"
-        },
-        "cost": " FREE - No API costs!",
-        "docs": "/docs"
-    }
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Keyset-paginated lists return the next page's cursor; forecasts name their model
+        expose_headers=["X-Next-Cursor", "X-Model-Version", "X-Model-History-End"],
+    )
 
-@app.get("/health")
-async def health_check():
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "ai_cost": "FREE (open-source only)"
-    }
+    # Health check endpoints
+    @app.get("/")
+    async def root():
+        return {
+            "message": "HotelIQ Revenue Management API",
+            "status": "active",
+            "version": "1.0.0",
+            "features": {
+                "data_pipeline": "ETL with 50+ feature engineering",
+                "analytics": "Revenue metrics (ADR, RevPAR, Occupancy)",
+                "smart_queries": "Pre-built analytical queries (NO AI COST)",
+                "forecasting": "Prophet-based demand prediction (FREE)"
+            },
+            "cost": " FREE - No API costs!",
+            "docs": "/docs"
+        }
 
-# Include routers
-app.include_router(hotels.router)
-app.include_router(rooms.router)
-app.include_router(bookings.router)
-app.include_router(analytics.router)
-app.include_router(ingestion.router)
-app.include_router(smart_queries.router)    #  FREE queries
-app.include_router(forecasting.router)      #  FREE forecasting
+    @app.get("/health")
+    async def health_check():
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "ai_cost": "FREE (open-source only)"
+        }
+
+    # Include routers
+    for name in ROUTERS:
+        module = importlib.import_module(f"app.api.{name}")
+        app.include_router(module.router)
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Local development: prepare the database, then serve with auto-reload
+    import uvicorn
+    from app.bootstrap import bootstrap
+
+    bootstrap()
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
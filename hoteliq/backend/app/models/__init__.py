@@ -1,3 +1,4 @@
-from app.models.hotel import Hotel, Room, Booking, DailyMetrics
+from app.models.hotel import Hotel, Room, Booking, DailyMetrics, BookingRollup
+from app.models.job import Job
 
-__all__ = ["Hotel", "Room", "Booking", "DailyMetrics"]
\ No newline at end of file
+__all__ = ["Hotel", "Room", "Booking", "DailyMetrics", "BookingRollup", "Job"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey,Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey,Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.connection import Base
@@ -33,7 +33,12 @@ class Room(Base):
 
     #Relationships
     hotel = relationship("Hotel", back_populates="rooms")
-    booking = relationship("Bookings", back_populates="room")
+    bookings = relationship("Booking", back_populates="room")
+
+    # Per-hotel room listing, keyset-paginated by id
+    __table_args__ = (
+        Index("ix_rooms_hotel_id", "hotel_id", "id"),
+    )
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -59,6 +64,21 @@ class Booking(Base):
     hotel = relationship("Hotel", back_populates="bookings")
     room = relationship("Room", back_populates="bookings")
 
+    # Revenue summaries filter on (hotel, status, check-in range); the trailing
+    # columns let SUM/COUNT be answered from the index without touching rows
+    __table_args__ = (
+        Index("ix_bookings_hotel_status_checkin",
+              "hotel_id", "status", "check_in_date", "check_out_date", "booking_price"),
+        Index("ix_bookings_status_checkin",
+              "status", "check_in_date", "check_out_date", "booking_price"),
+        # ETL duplicate detection key
+        Index("ix_bookings_dedup", "hotel_id", "room_id", "check_in_date"),
+        # Listing / top-N orderings (keyset pages on (check_in_date, id)) and the source breakdown
+        Index("ix_bookings_checkin_id", "check_in_date", "id"),
+        Index("ix_bookings_price", "booking_price"),
+        Index("ix_bookings_source_price", "booking_source", "booking_price"),
+    )
+
 
 class DailyMetrics(Base):
     """Aggregated daily metrics for analytics"""
@@ -84,4 +104,30 @@ class DailyMetrics(Base):
     cancellation_count = Column(Integer, default=0)
     
     # Calculated at
-    calculated_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    calculated_at = Column(DateTime, default=datetime.utcnow)
+
+    # One metrics row per hotel per day
+    __table_args__ = (
+        Index("uq_daily_metrics_hotel_date", "hotel_id", "date", unique=True),
+    )
+
+
+class BookingRollup(Base):
+    """Booking counts, revenue and room nights per (hotel, check-in date, source, room type, status)"""
+
+    __tablename__ = "booking_rollups"
+
+    id = Column(Integer, primary_key=True)
+    hotel_id = Column(Integer, ForeignKey("hotels.id"), nullable=False)
+    date = Column(Date, nullable=False)  # check-in date
+    booking_source = Column(String(100), nullable=False, default="")  # "" = unknown
+    room_type = Column(String(50), nullable=False, default="")  # "" = no room assigned
+    status = Column(String(50), nullable=False)
+
+    booking_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    room_nights = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("uq_booking_rollups_key", "hotel_id", "date", "booking_source", "room_type", "status", unique=True),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Float, DateTime, Boolean, JSON
+from datetime import datetime
+from app.database.connection import Base
+
+
+class Job(Base):
+    """Background job (ETL ingest, metrics recalculation) and its progress"""
+
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+
+    progress = Column(Float, default=0.0)  # 0.0 - 1.0
+    message = Column(String(500))
+    params = Column(JSON)
+    result = Column(JSON)
+    error = Column(String(2000))
+    cancel_requested = Column(Boolean, default=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -52,7 +52,7 @@ class BookingBase(BaseModel):
 
     @validator('check_out_date')
     def check_out_after_check_in(cls , v, values):
-        if 'check_in_date' in values and v <= values['check_in_dates']:
+        if 'check_in_date' in values and v <= values['check_in_date']:
             raise ValueError('Check-out date must be after check-in date')
         return v
 
@@ -114,4 +114,23 @@ class ForecastResponse(BaseModel):
     predicted_occupancy : float
     predicted_revenue: float
     confidence_interval_lower :Optional[float] =None
-    confidence_interval_upper :Optional[float] = None
\ No newline at end of file
+    confidence_interval_upper :Optional[float] = None
+
+# Job Schemas
+
+class JobResponse(BaseModel):
+    id: str
+    job_type: str
+    status: str
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    params: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    cancel_requested: Optional[bool] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
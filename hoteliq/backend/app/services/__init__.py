@@ -1,2 +1,9 @@
-from app.services.data_generator import generate_all_data
-__all__ = ["generate_all_data"]
\ No newline at end of file
+__all__ = ["generate_all_data"]
+
+
+def __getattr__(name):
+    # Imported on first use, so `python -m app.services.data_generator` does not load the module twice
+    if name == "generate_all_data":
+        from app.services.data_generator import generate_all_data
+        return generate_all_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
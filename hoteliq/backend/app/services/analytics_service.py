@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func
 from datetime import date, timedelta
 from app.models.hotel import Booking, Hotel, Room
+from app.utils.occupancy_index import occupancy_index
+from app.utils.sql_expressions import days_between
 from typing import Dict, List
 
 def calculate_revenue_metrics(
@@ -11,7 +13,18 @@ def calculate_revenue_metrics(
         end_date: date = None,
 
 ) -> Dict:
-     query = db.query(Booking).filter(Booking.status.in_(["confirmed", "completed"]))
+     # One aggregate query: revenue, booking count and room nights
+     room_nights = days_between(db, Booking.check_in_date, Booking.check_out_date)
+     if room_nights is not None:
+          query = db.query(
+               func.coalesce(func.sum(Booking.booking_price), 0.0),
+               func.count(Booking.id),
+               func.coalesce(func.sum(room_nights), 0)
+          )
+     else:
+          # No date arithmetic for this dialect: sum the stay lengths in Python
+          query = db.query(Booking.booking_price, Booking.check_in_date, Booking.check_out_date)
+     query = query.filter(Booking.status.in_(["confirmed", "completed"]))
 
      if hotel_id:
           query = query.filter(Booking.hotel_id == hotel_id)
@@ -20,9 +33,18 @@ def calculate_revenue_metrics(
      if end_date:
           query = query.filter(Booking.check_out_date <= end_date)
 
-     bookings = query.all()
-
-     if not bookings:
+     if room_nights is not None:
+          total_revenue, total_bookings, total_room_nights = query.one()
+     else:
+          rows = query.all()
+          total_revenue = sum(r.booking_price or 0.0 for r in rows)
+          total_bookings = len(rows)
+          total_room_nights = sum((r.check_out_date - r.check_in_date).days for r in rows)
+     # MySQL returns DECIMAL sums
+     total_revenue = float(total_revenue)
+     total_room_nights = int(total_room_nights)
+
+     if not total_bookings:
           return {
                "total_revenue" : 0.0,
                "total_bookings": 0,
@@ -31,13 +53,6 @@ def calculate_revenue_metrics(
                "period_start":start_date,
                "period_end": end_date
           }
-     
-     #Calculated metrics 
-     total_revenue = sum(b.booking_price for b in bookings)
-     total_bookings = len(bookings)
-
-     #Calculate totla room nights
-     total_room_nights = sum((b.check_out_date - b.check_in_date).days for b in bookings)
 
      #Average daily rate
      adr = total_revenue /total_room_nights if total_room_nights >0 else 0.0
@@ -45,8 +60,7 @@ def calculate_revenue_metrics(
      #Calculate occupancy rate
 
      if hotel_id:
-          hotel = db.query(Hotel).filter(Hotel.id == hotel_id).first()
-          total_rooms = hotel.total_rooms if hotel else 0
+          total_rooms = db.query(Hotel.total_rooms).filter(Hotel.id == hotel_id).scalar() or 0
      else:
           total_rooms = db.query(func.sum(Hotel.total_rooms)).scalar() or 0
 
@@ -73,30 +87,14 @@ def get_daily_statistics(
           hotel_id:int,
           target_date:date
 )-> Dict:
-     #Get stats for a specific date
-     bookings = db.query(Booking).filter(
-          and_(
-               Booking.hotel_id == hotel_id,
-               Booking.check_in_date <= target_date,
-               Booking.check_out_date > target_date,
-               Booking.status.in_(["confirmed", "completed"])
-          )
-     ).all()
-
+     #Get stats for a specific date, from the in-memory occupancy index
+     return occupancy_index.daily_statistics(db, hotel_id, target_date)
 
-     hotel = db.query(Hotel).filter(Hotel.id ==hotel_id).first()
-
-     rooms_occupied = len(bookings)
-     total_rooms = hotel.total_rooms if hotel else 0
-     occupancy_rate = (rooms_occupied / total_rooms *100) if total_rooms >0 else 0.0
-     daily_revenue = sum(b.booking_price / (b.check_out_date - b.check_in_date).days for b in bookings)
-
-     return{
-          "date": target_date,
-          "hotel_id": hotel_id,
-          "rooms_occupied": rooms_occupied,
-          "total_rooms": total_rooms,
-          "occupancy_rate" :round(occupancy_rate, 2),
-          "daily_revenue": round(daily_revenue, 2)
-
-     }
+def get_occupancy_range(
+          db:Session,
+          hotel_id:int,
+          start_date:date,
+          end_date:date
+)-> Dict:
+     #Room nights, revenue and average occupancy over a date range
+     return occupancy_index.range_statistics(db, hotel_id, start_date, end_date)
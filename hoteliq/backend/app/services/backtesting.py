@@ -0,0 +1,405 @@
+"""
+Rolling-origin backtests of the forecast models.
+
+For every hotel, the daily_metrics history is cut at a series of origins
+(`folds` cutoffs, `step` days apart, the latest leaving a full horizon of
+actuals after it). A model is fitted on the data up to each cutoff and
+scored against the actuals that follow, giving MAPE and RMSE per hotel,
+series (occupancy, revenue) and horizon, plus the wall-clock cost of the
+fits. Hotels are backtested in parallel across a process pool.
+
+Fits are cached under BACKTEST_FIT_CACHE_DIR, keyed by engine, model
+format, cutoff and a digest of the training window, so a later backtest
+with more or shifted cutoffs only fits the windows it has not seen.
+Reports are written as JSON under BACKTEST_REPORT_DIR and can be compared
+with diff_reports (e.g. before and after a model change).
+
+    python -m app.services.backtesting run --horizons 7 14 30 --folds 8
+    python -m app.services.backtesting diff <base_report_id> <other_report_id>
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import pickle
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.services.forecasting import (
+    FORECAST_ENGINE,
+    FORECAST_HISTORY_DAYS,
+    FORECAST_POOL_MIN_TARGETS,
+    FORECAST_WORKERS,
+    MIN_HISTORY_DAYS,
+    MODEL_FORMAT_VERSION,
+    SERIES_BOUNDS,
+    ForecastEngine,
+    new_model,
+)
+
+BACKTEST_REPORT_DIR = os.getenv("BACKTEST_REPORT_DIR", "data/backtests")
+BACKTEST_FIT_CACHE_DIR = os.getenv("BACKTEST_FIT_CACHE_DIR", "data/models/backtest_fits")
+
+DEFAULT_HORIZONS = (7, 14, 30)
+DEFAULT_FOLDS = 8
+DEFAULT_STEP_DAYS = 7
+
+REPORT_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+def rolling_cutoffs(
+    first: int,
+    last: int,
+    horizon: int,
+    folds: int = DEFAULT_FOLDS,
+    step: int = DEFAULT_STEP_DAYS,
+    min_train_days: int = MIN_HISTORY_DAYS
+) -> List[int]:
+    """Cutoff day ordinals, oldest first; each leaves `horizon` days of actuals after it."""
+    latest = last - horizon
+    return sorted(
+        cutoff for cutoff in (latest - i * step for i in range(folds))
+        if cutoff - first + 1 >= min_train_days
+    )
+
+
+def _fit_cached(engine: str, series: str, hotel_id: int, ordinals, values, cache_dir: str):
+    """(model, fit_seconds, cache_hit) for one training window."""
+    digest = hashlib.sha1(ordinals.tobytes() + values.tobytes()).hexdigest()[:16]
+    path = os.path.join(
+        cache_dir, f"{engine}_v{MODEL_FORMAT_VERSION}", f"hotel_{hotel_id}",
+        f"{series}_{int(ordinals[-1])}_{digest}.pkl"
+    )
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f), 0.0, True
+
+    started = time.perf_counter()
+    model = new_model(engine, SERIES_BOUNDS[series]).fit(ordinals, values)
+    seconds = time.perf_counter() - started
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return model, seconds, False
+
+
+def _scores(actual, predicted) -> Dict:
+    import numpy as np
+    if len(actual) == 0:
+        return {"mape": None, "rmse": None, "points": 0, "mape_points": 0}
+    error = predicted - actual
+    nonzero = actual != 0  # MAPE is undefined on days with no occupancy/revenue
+    mape = float(np.mean(np.abs(error[nonzero] / actual[nonzero])) * 100) if nonzero.any() else None
+    return {
+        "mape": round(mape, 4) if mape is not None else None,
+        "rmse": round(float(np.sqrt(np.mean(error ** 2))), 4),
+        "points": int(len(actual)),
+        "mape_points": int(nonzero.sum()),
+    }
+
+
+def backtest_hotel(task: Dict) -> Dict:
+    """
+    Backtest one hotel over task["cutoffs"]. Top-level so it can run in a worker process.
+    """
+    import numpy as np
+    started = time.perf_counter()
+    ordinals = task["ordinals"]
+    horizons = task["horizons"]
+    max_horizon = max(horizons)
+
+    collected = {series: {h: ([], []) for h in horizons} for series in SERIES_BOUNDS}
+    fit_seconds, fits, cached = 0.0, 0, 0
+
+    for cutoff in task["cutoffs"]:
+        train = (ordinals <= cutoff) & (ordinals > cutoff - task["history_days"])
+        test = (ordinals > cutoff) & (ordinals <= cutoff + max_horizon)
+        lead = ordinals[test] - cutoff
+        for series in SERIES_BOUNDS:
+            model, seconds, hit = _fit_cached(
+                task["engine"], series, task["hotel_id"],
+                ordinals[train], task[series][train], task["cache_dir"]
+            )
+            fit_seconds += seconds
+            fits += 1
+            cached += hit
+            predicted = model.predict(ordinals[test])[0]
+            actual = task[series][test]
+            for h in horizons:
+                within = lead <= h
+                collected[series][h][0].append(actual[within])
+                collected[series][h][1].append(predicted[within])
+
+    metrics = {
+        series: {
+            str(h): _scores(np.concatenate(actual), np.concatenate(predicted))
+            for h, (actual, predicted) in by_horizon.items()
+        }
+        for series, by_horizon in collected.items()
+    }
+    return {
+        "hotel_id": task["hotel_id"],
+        "folds": len(task["cutoffs"]),
+        "cutoffs": [date.fromordinal(c).isoformat() for c in task["cutoffs"]],
+        "metrics": metrics,
+        "fits": {
+            "count": fits,
+            "cached": cached,
+            "fit_seconds_total": round(fit_seconds, 4),
+            "fit_seconds_mean": round(fit_seconds / (fits - cached), 6) if fits > cached else 0.0,
+        },
+        "wall_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def _pooled(hotels: List[Dict]) -> Dict:
+    #Point-weighted MAPE/RMSE over all hotels, per series and horizon
+    summary = {}
+    for series in SERIES_BOUNDS:
+        summary[series] = {}
+        horizons = hotels[0]["metrics"][series].keys() if hotels else []
+        for h in horizons:
+            scores = [hotel["metrics"][series][h] for hotel in hotels]
+            points = sum(s["points"] for s in scores)
+            mape_points = sum(s["mape_points"] for s in scores if s["mape"] is not None)
+            summary[series][h] = {
+                "mape": round(sum(s["mape"] * s["mape_points"] for s in scores if s["mape"] is not None)
+                              / mape_points, 4) if mape_points else None,
+                "rmse": round(math.sqrt(sum(s["rmse"] ** 2 * s["points"] for s in scores if s["points"])
+                                        / points), 4) if points else None,
+                "points": points,
+                "mape_points": mape_points,
+            }
+    return summary
+
+
+class Backtester:
+
+    #Runs, stores and compares rolling-origin backtests
+
+
+    def __init__(
+        self,
+        db: Session,
+        engine: str = FORECAST_ENGINE,
+        cache_dir: Optional[str] = None,
+        report_dir: Optional[str] = None
+    ):
+        self.db = db
+        self.forecasts = ForecastEngine(db, engine=engine)
+        self.engine = self.forecasts.engine
+        self.cache_dir = cache_dir or BACKTEST_FIT_CACHE_DIR
+        self.report_dir = report_dir or BACKTEST_REPORT_DIR
+
+    def run(
+        self,
+        hotel_ids: Optional[List[int]] = None,
+        horizons: Sequence[int] = DEFAULT_HORIZONS,
+        folds: int = DEFAULT_FOLDS,
+        step: int = DEFAULT_STEP_DAYS,
+        max_workers: int = FORECAST_WORKERS,
+        save: bool = True,
+        progress_callback: Optional[Callable[[float, str], None]] = None
+    ) -> Dict:
+        """Backtest every hotel (or hotel_ids) and return the report, saved unless save=False."""
+        started = time.perf_counter()
+        horizons = sorted(set(int(h) for h in horizons))
+        tasks, skipped, data_versions = [], [], {}
+
+        for hotel_id, _ in self.forecasts.targets(hotel_ids):
+            try:
+                ordinals, occupancy, revenue = self.forecasts.load_series(hotel_id, history_days=None)
+            except ValueError as e:
+                skipped.append({"hotel_id": hotel_id, "reason": str(e)})
+                continue
+            cutoffs = rolling_cutoffs(int(ordinals[0]), int(ordinals[-1]), max(horizons), folds, step)
+            if not cutoffs:
+                skipped.append({"hotel_id": hotel_id, "reason": "history too short for one fold"})
+                continue
+            data_versions[str(hotel_id)] = self.forecasts.data_version(hotel_id)
+            tasks.append({
+                "hotel_id": hotel_id,
+                "engine": self.engine,
+                "ordinals": ordinals,
+                "occupancy": occupancy,
+                "revenue": revenue,
+                "cutoffs": cutoffs,
+                "horizons": horizons,
+                "history_days": FORECAST_HISTORY_DAYS,
+                "cache_dir": self.cache_dir,
+            })
+
+        hotels = []
+
+        def collect(result):
+            hotels.append(result)
+            if progress_callback:
+                progress_callback(len(hotels) / len(tasks), f"Backtested {len(hotels)}/{len(tasks)} hotels")
+
+        # Same trade-off as ForecastEngine.train: worker start-up only pays off for Prophet or many hotels
+        use_pool = max_workers > 1 and len(tasks) > 1 and (
+            self.engine == "prophet" or len(tasks) >= FORECAST_POOL_MIN_TARGETS
+        )
+        if use_pool:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                                     mp_context=get_context("spawn")) as pool:
+                futures = {pool.submit(backtest_hotel, task): task for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        skipped.append({"hotel_id": futures[future]["hotel_id"], "reason": str(e)})
+        else:
+            for task in tasks:
+                try:
+                    collect(backtest_hotel(task))
+                except Exception as e:
+                    skipped.append({"hotel_id": task["hotel_id"], "reason": str(e)})
+
+        hotels.sort(key=lambda h: h["hotel_id"])
+        report = {
+            "report_id": f"{datetime.utcnow():%Y%m%dT%H%M%S}_{self.engine}_{uuid.uuid4().hex[:6]}",
+            "created_at": datetime.utcnow().isoformat(),
+            "engine": self.engine,
+            "model_format": MODEL_FORMAT_VERSION,
+            "params": {"horizons": horizons, "folds": folds, "step_days": step,
+                       "history_days": FORECAST_HISTORY_DAYS},
+            "data_versions": data_versions,
+            "summary": _pooled(hotels),
+            "fits": {
+                "count": sum(h["fits"]["count"] for h in hotels),
+                "cached": sum(h["fits"]["cached"] for h in hotels),
+                "fit_seconds_total": round(sum(h["fits"]["fit_seconds_total"] for h in hotels), 4),
+            },
+            "hotels": hotels,
+            "skipped": skipped,
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+        if save:
+            report["path"] = self.save_report(report)
+        return report
+
+    # ---- reports --------------------------------------------------------
+
+    def report_path(self, report_id: str) -> str:
+        if not REPORT_ID_PATTERN.match(report_id):
+            raise ValueError(f"Invalid report id '{report_id}'")
+        return os.path.join(self.report_dir, f"{report_id}.json")
+
+    def save_report(self, report: Dict) -> str:
+        path = self.report_path(report["report_id"])
+        os.makedirs(self.report_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        # Stable key order and indentation, so two reports diff cleanly as text too
+        with open(tmp_path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        return path
+
+    def load_report(self, report_id: str) -> Dict:
+        path = self.report_path(report_id)
+        if not os.path.exists(path):
+            raise ValueError(f"Backtest report '{report_id}' not found")
+        with open(path) as f:
+            return json.load(f)
+
+    def list_reports(self) -> List[Dict]:
+        if not os.path.isdir(self.report_dir):
+            return []
+        reports = []
+        for name in sorted(os.listdir(self.report_dir), reverse=True):
+            if name.endswith(".json"):
+                report = self.load_report(name[:-len(".json")])
+                reports.append({k: report[k] for k in ("report_id", "created_at", "engine", "model_format",
+                                                       "params", "summary", "duration_seconds")})
+        return reports
+
+    @staticmethod
+    def diff_reports(base: Dict, other: Dict) -> Dict:
+        """
+        Metric changes from `base` to `other` (other - base; negative is better),
+        overall and for the hotels and horizons both reports cover.
+        """
+        def compare(a: Dict, b: Dict) -> Dict:
+            result = {}
+            for series in SERIES_BOUNDS:
+                for h in sorted(set(a.get(series, {})) & set(b.get(series, {})), key=int):
+                    for metric in ("mape", "rmse"):
+                        x, y = a[series][h][metric], b[series][h][metric]
+                        result.setdefault(series, {}).setdefault(h, {})[metric] = {
+                            "base": x,
+                            "other": y,
+                            "change": round(y - x, 4) if x is not None and y is not None else None,
+                        }
+            return result
+
+        base_hotels = {h["hotel_id"]: h for h in base["hotels"]}
+        other_hotels = {h["hotel_id"]: h for h in other["hotels"]}
+        return {
+            "base": base["report_id"],
+            "other": other["report_id"],
+            "engines": [base["engine"], other["engine"]],
+            "same_data": base["data_versions"] == other["data_versions"],
+            "summary": compare(base["summary"], other["summary"]),
+            "hotels": {
+                str(hotel_id): compare(base_hotels[hotel_id]["metrics"], other_hotels[hotel_id]["metrics"])
+                for hotel_id in sorted(base_hotels.keys() & other_hotels.keys())
+            },
+        }
+
+
+def _print_summary(report: Dict):
+    print(f"Backtest {report['report_id']} ({report['engine']}): {len(report['hotels'])} hotels, "
+          f"{report['fits']['count']} fits ({report['fits']['cached']} cached), "
+          f"{report['duration_seconds']}s")
+    for series, by_horizon in report["summary"].items():
+        for h, scores in by_horizon.items():
+            print(f"  {series:<10} h={h:>3}  MAPE {scores['mape']}  RMSE {scores['rmse']}  ({scores['points']} points)")
+    if report.get("path"):
+        print(f"Report written to {report['path']}")
+
+
+def main():
+    from app.database.connection import ReadSessionLocal
+
+    parser = argparse.ArgumentParser(description="Rolling-origin forecast backtests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Backtest the hotels' forecasts and write a report")
+    run.add_argument("--hotel", type=int, action="append", dest="hotel_ids", help="Hotel id (repeatable)")
+    run.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    run.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    run.add_argument("--step", type=int, default=DEFAULT_STEP_DAYS, help="Days between cutoffs")
+    run.add_argument("--workers", type=int, default=FORECAST_WORKERS)
+    run.add_argument("--engine", default=FORECAST_ENGINE)
+
+    diff = commands.add_parser("diff", help="Compare two saved reports")
+    diff.add_argument("base")
+    diff.add_argument("other")
+
+    args = parser.parse_args()
+    with ReadSessionLocal() as db:
+        if args.command == "run":
+            backtester = Backtester(db, engine=args.engine)
+            _print_summary(backtester.run(args.hotel_ids, args.horizons, args.folds, args.step, args.workers))
+        else:
+            backtester = Backtester(db)
+            print(json.dumps(
+                Backtester.diff_reports(backtester.load_report(args.base), backtester.load_report(args.other)),
+                indent=2
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from collections import namedtuple
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.services.booking_rollup import BookingRollups
+from app.utils.cache import query_cache
+from app.utils.metrics_calculator import MetricsCalculator
+from app.utils.occupancy_index import occupancy_index
+
+# Session.info key holding changes that in-memory structures see only after commit
+PENDING_CHANGES_KEY = "pending_booking_changes"
+
+# Just the fields derived data depends on, captured before/after a booking write
+BookingSnapshot = namedtuple(
+    "BookingSnapshot",
+    ["hotel_id", "room_id", "check_in_date", "check_out_date", "booking_price", "booking_source", "status"]
+)
+
+
+def snapshot(booking) -> BookingSnapshot:
+    """Capture a Booking (or any object/row with the same attributes)."""
+    return BookingSnapshot(
+        hotel_id=booking.hotel_id,
+        room_id=booking.room_id,
+        check_in_date=booking.check_in_date,
+        check_out_date=booking.check_out_date,
+        booking_price=booking.booking_price,
+        booking_source=booking.booking_source,
+        status=booking.status
+    )
+
+
+def snapshot_from_record(record: dict) -> BookingSnapshot:
+    """Capture a booking given as a plain column -> value dict (bulk loads)."""
+    return BookingSnapshot(**{field: record.get(field) for field in BookingSnapshot._fields})
+
+
+def record_booking_changes(
+    db: Session,
+    removed: Iterable[BookingSnapshot] = (),
+    added: Iterable[BookingSnapshot] = ()
+) -> None:
+    """
+    Propagate a booking write to the data derived from bookings.
+
+    Call after the write is flushed and before it is committed, so the
+    derived rows land in the same transaction:
+      - create: added=[new]
+      - cancel/update: removed=[before], added=[after]
+      - ETL load: added=[every inserted row]
+    """
+    removed, added = list(removed), list(added)
+    if not removed and not added:
+        return
+
+    MetricsCalculator.apply_booking_changes(db, removed=removed, added=added)
+    BookingRollups.apply_booking_changes(db, removed=removed, added=added)
+
+    # In-process indexes must not see writes that may still roll back
+    db.info.setdefault(PENDING_CHANGES_KEY, []).append((removed, added))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    changes = session.info.pop(PENDING_CHANGES_KEY, [])
+    hotel_ids = set()
+    for removed, added in changes:
+        occupancy_index.apply_booking_changes(removed=removed, added=added)
+        hotel_ids.update(b.hotel_id for b in removed)
+        hotel_ids.update(b.hotel_id for b in added)
+    if hotel_ids:
+        query_cache.invalidate_hotels(hotel_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop(PENDING_CHANGES_KEY, None)
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.hotel import Booking, BookingRollup, Room
+from app.utils.metrics_calculator import _as_date
+from app.utils.sql_expressions import _connection, days_between, insert_or_increment
+
+# Rollup key columns, in unique-index order
+ROLLUP_KEY = ["hotel_id", "date", "booking_source", "room_type", "status"]
+
+# Keys per tuple IN (...) delete when applying deltas
+KEY_LOOKUP_BATCH = 500
+
+
+class BookingRollups:
+
+    #Maintains the booking_rollups table: rebuild, incremental deltas and a consistency check
+
+
+    @staticmethod
+    def _grouped_bookings(db):
+        # Raw bookings aggregated to rollup grain (the source of truth for rebuild/check),
+        # or None if the dialect has no date arithmetic (see _grouped_rows)
+        room_nights = days_between(db, Booking.check_in_date, Booking.check_out_date)
+        if room_nights is None:
+            return None
+        source = func.coalesce(Booking.booking_source, "")
+        room_type = func.coalesce(Room.room_type, "")
+        status = func.coalesce(Booking.status, "")
+        return select(
+            Booking.hotel_id,
+            Booking.check_in_date,
+            source,
+            room_type,
+            status,
+            func.count(Booking.id),
+            func.sum(Booking.booking_price),
+            func.sum(room_nights)
+        ).select_from(Booking).outerjoin(Room, Room.id == Booking.room_id).group_by(
+            Booking.hotel_id, Booking.check_in_date, source, room_type, status
+        )
+
+    @staticmethod
+    def _grouped_rows(db) -> List[Tuple]:
+        # Rows of _grouped_bookings, aggregated in Python when SQL cannot compute stay lengths
+        grouped = BookingRollups._grouped_bookings(db)
+        if grouped is not None:
+            return [tuple(r) for r in db.execute(grouped)]
+        totals: Dict[Tuple, List] = defaultdict(lambda: [0, 0.0, 0])
+        rows = db.execute(
+            select(Booking.hotel_id, Booking.check_in_date, Booking.booking_source, Room.room_type,
+                   Booking.status, Booking.booking_price, Booking.check_out_date)
+            .select_from(Booking).outerjoin(Room, Room.id == Booking.room_id)
+        )
+        for hotel_id, check_in, source, room_type, status, price, check_out in rows:
+            total = totals[(hotel_id, check_in, source or "", room_type or "", status or "")]
+            total[0] += 1
+            total[1] += price or 0.0
+            total[2] += (check_out - check_in).days
+        return [key + tuple(total) for key, total in totals.items()]
+
+    @staticmethod
+    def rebuild(db) -> int:
+        """
+        Recompute the whole rollup with one INSERT ... SELECT ... GROUP BY
+        (grouped in Python on dialects without date arithmetic).
+        Works on a Session or a Connection; the caller commits.
+        """
+        db.execute(delete(BookingRollup))
+        columns = ROLLUP_KEY + ["booking_count", "revenue", "room_nights"]
+        grouped = BookingRollups._grouped_bookings(db)
+        if grouped is not None:
+            db.execute(insert(BookingRollup).from_select(columns, grouped))
+        else:
+            rows = [dict(zip(columns, row)) for row in BookingRollups._grouped_rows(db)]
+            if rows:
+                _connection(db).execute(insert(BookingRollup.__table__), rows)
+        return db.execute(select(func.count()).select_from(BookingRollup)).scalar()
+
+    @staticmethod
+    def apply_booking_changes(db: Session, removed: List = (), added: List = ()) -> int:
+        """
+        Apply booking snapshots (see booking_events) to the rollup rows they touch.
+        Runs inside the caller's transaction; returns the number of keys changed.
+        """
+        bookings = list(removed) + list(added)
+        if not bookings:
+            return 0
+
+        room_ids = {b.room_id for b in bookings if b.room_id is not None}
+        room_types = dict(db.execute(
+            select(Room.id, Room.room_type).where(Room.id.in_(room_ids))
+        ).all()) if room_ids else {}
+
+        # key -> [booking_count, revenue, room_nights]
+        deltas: Dict[Tuple, List] = defaultdict(lambda: [0, 0.0, 0])
+        for snapshots, sign in ((removed, -1), (added, 1)):
+            for b in snapshots:
+                check_in, check_out = _as_date(b.check_in_date), _as_date(b.check_out_date)
+                key = (
+                    int(b.hotel_id),
+                    check_in,
+                    b.booking_source or "",
+                    room_types.get(b.room_id, ""),
+                    b.status or ""
+                )
+                delta = deltas[key]
+                delta[0] += sign
+                delta[1] += sign * float(b.booking_price or 0.0)
+                delta[2] += sign * (check_out - check_in).days
+
+        deltas = {k: v for k, v in deltas.items() if any(v)}
+        if not deltas:
+            return 0
+
+        # Add the deltas in SQL (col = col + delta) in one upsert, so concurrent writers
+        # neither lose updates nor race to insert the same key
+        insert_or_increment(
+            db, BookingRollup, ROLLUP_KEY,
+            [
+                {**dict(zip(ROLLUP_KEY, key)), "booking_count": count, "revenue": revenue, "room_nights": nights}
+                for key, (count, revenue, nights) in deltas.items()
+            ],
+            ["booking_count", "revenue", "room_nights"]
+        )
+
+        # Keys whose last booking went away
+        shrunk = [key for key, delta in deltas.items() if delta[0] < 0]
+        key_columns = tuple_(*[getattr(BookingRollup, c) for c in ROLLUP_KEY])
+        for i in range(0, len(shrunk), KEY_LOOKUP_BATCH):
+            db.execute(delete(BookingRollup).where(
+                key_columns.in_(shrunk[i:i + KEY_LOOKUP_BATCH]),
+                BookingRollup.booking_count <= 0
+            ))
+        return len(deltas)
+
+    @staticmethod
+    def check_consistency(db: Session, tolerance: float = 0.01) -> Dict:
+        """
+        Compare the rollup with the raw bookings table, key by key.
+        """
+        raw = {tuple(r[:5]): r[5:] for r in BookingRollups._grouped_rows(db)}
+        rolled = {
+            tuple(r[:5]): r[5:]
+            for r in db.execute(select(
+                *[getattr(BookingRollup, c) for c in ROLLUP_KEY],
+                BookingRollup.booking_count, BookingRollup.revenue, BookingRollup.room_nights
+            ))
+        }
+
+        mismatches = []
+        for key in raw.keys() | rolled.keys():
+            expected = raw.get(key, (0, 0.0, 0))
+            actual = rolled.get(key, (0, 0.0, 0))
+            if (expected[0] != actual[0] or expected[2] != actual[2]
+                    or abs((expected[1] or 0.0) - (actual[1] or 0.0)) > tolerance):
+                mismatches.append({
+                    **{c: (v.isoformat() if isinstance(v, date) else v) for c, v in zip(ROLLUP_KEY, key)},
+                    "expected": {"booking_count": expected[0], "revenue": expected[1], "room_nights": expected[2]},
+                    "actual": {"booking_count": actual[0], "revenue": actual[1], "room_nights": actual[2]}
+                })
+
+        return {
+            "consistent": not mismatches,
+            "raw_keys": len(raw),
+            "rollup_rows": len(rolled),
+            "mismatch_count": len(mismatches),
+            "mismatches": mismatches[:100]
+        }
@@ -0,0 +1,54 @@
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:  # optional dependency
+    TEXT_DTYPE = "string"
+
+# Compact in-memory schema for booking DataFrames.
+# Low-cardinality strings become categoricals, free text uses a string dtype,
+# ids and counts are downcast. Prices stay float64 because they are written
+# back to the database.
+BOOKING_DTYPES = {
+    'booking_id': 'int32',
+    'hotel_id': 'int32',
+    'room_id': 'int32',
+    'num_guests': 'int16',
+    'booking_price': 'float64',
+    'base_price': 'float64',
+    'booking_source': 'category',
+    'status': 'category',
+    'guest_name': TEXT_DTYPE,
+    'guest_email': TEXT_DTYPE,
+}
+
+DATE_COLUMNS = ['check_in_date', 'check_out_date', 'booking_date']
+
+
+def compact_booking_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the booking columns present in `df` to BOOKING_DTYPES, in place.
+
+    Integer columns with missing values use the nullable variant (Int32) and
+    columns that cannot be converted are left as they are, so validation
+    can still report the bad values.
+    """
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            try:
+                df[col] = pd.to_datetime(df[col])
+            except (ValueError, TypeError):
+                pass
+
+    for col, dtype in BOOKING_DTYPES.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype.startswith('int') and df[col].isnull().any():
+            dtype = dtype.capitalize()
+        try:
+            df[col] = df[col].astype(dtype)
+        except (ValueError, TypeError):
+            pass
+
+    return df
@@ -1,8 +1,28 @@
+"""
+Synthetic hotels, rooms and bookings.
+
+generate_all_data() seeds the small sample dataset used by the bootstrap
+stage. For load tests and benchmarks, hotel_frame / room_frame /
+booking_chunks generate any volume with NumPy, reproducibly from a seed,
+and the CLI streams it to CSV, Parquet or the database:
+
+    python -m app.services.data_generator --hotels 50 --bookings 10000000 --format parquet --output data/synthetic
+    python -m app.services.data_generator --hotels 5 --bookings 200000 --format db
+"""
+import argparse
+import os
 import random
+import time
 from datetime import datetime, timedelta, date
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from app.models.hotel import Hotel, Room, Booking
+from app.utils.sql_expressions import sync_id_sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 #hotel Data
 HOTELS = [
@@ -36,6 +56,32 @@ GUEST_NAMES = [
     "Sanjay Verma", "Neha Kapoor", "Karan Shah", "Riya Malhotra", "Aditya Joshi"
 ]
 
+# Room mix: (type, share of the hotel's rooms, base price range, max occupancy), in room-number order
+ROOM_MIX = [
+    ("Standard", 0.4, (3000, 5000), 2),
+    ("Deluxe", 0.3, (5000, 8000), 2),
+    ("Executive", 0.2, (8000, 12000), 4),
+    ("Suite", 0.1, (12000, 20000), 4),
+]
+
+# Locations and ratings for hotels beyond the named ones in HOTELS
+LOCATIONS = [
+    "Mumbai, Maharashtra", "Goa", "Jaipur, Rajasthan", "Delhi", "Bengaluru, Karnataka",
+    "Chennai, Tamil Nadu", "Kolkata, West Bengal", "Udaipur, Rajasthan", "Kochi, Kerala", "Shimla, Himachal Pradesh"
+]
+STAR_RATINGS = [3.0, 3.5, 4.0, 4.5, 5.0]
+
+# Check-in weekdays with the weekend premium (Friday, Saturday) and the seasonal months
+WEEKEND_DAYS = [4, 5]
+PEAK_MONTHS = [12, 1, 10, 11]
+LOW_MONTHS = [6, 7, 8]
+
+BOOKING_COLUMNS = [
+    'hotel_id', 'room_id', 'check_in_date', 'check_out_date', 'guest_name', 'guest_email',
+    'num_guests', 'booking_price', 'base_price', 'booking_date', 'booking_source', 'status'
+]
+GENERATOR_CHUNK_SIZE = 1_000_000
+
 def generate_hotels(db: Session) -> List[Hotel]:
 
     hotels =[]
@@ -107,85 +153,322 @@ def generate_rooms(db: Session, hotels: List[Hotel]) -> List[Room]:
     print(f"Generated {len(rooms)} rooms")
     return rooms
 
-def generate_bookings(db: Session, rooms: List[Room], num_bookings: int =500) -> List[Booking]:
-    bookings =[]
+def generate_bookings(db: Session, rooms: List[Room], num_bookings: int =500) -> int:
+    #Returns the number of bookings created by this call (0 if enough already exist)
 
-    #check if bookings already exists
+    #check if bookings already exists (without loading them)
 
     existing_count = db.query(Booking).count()
     if existing_count >= num_bookings:
         print(f"{existing_count} booking already exists ")
-        return db.query(Booking).all()
+        return 0
     
+    import pandas as pd
+
     #Generate the bookings for past 6 months 
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days =180)
 
-    for _ in range(num_bookings):
-        room = random.choice (rooms)
-
-        #Random check in date in past 6 months
-        days_offset = random.randint(0,180)
-        check_in = start_date + timedelta(days = days_offset)
-
-        #Randome stay duration(1-7 nights)
-        stay_duration = random.randint(1,7)
-        check_out = check_in + timedelta(days= stay_duration)
-
-        #Don't create future bookings
-        if check_in > end_date:
-            continue
-
-        #Calculate price with dynamic pricing features
-        base_price = room.base_price
-
-        #Weekend premium 
-        if check_in.weekday() in [4,5]:
-            price_multiplier = random.uniform(1.2, 1.5)
-        else:
-            price_multiplier = random.uniform(0.85, 1.15)
-        
-
-        #Seasonal factor 
-        month = check_in.month
-        if month in [12,1,10,11]:
-            price_multiplier *= random.uniform(1.1, 1.3)
-        elif month in [6,7,8]:
-            price_multiplier *= random.uniform(0.7, 0.9)
-        booking_price = round(base_price * price_multiplier * stay_duration , 2)
-
-
-        #Random status (90% confirmed , 10% cancelled)
-
-        status = "confirmed" if random.random() < 0.9 else "cancelled"
-
-        if check_out < end_date:
-            status = "completed"
-
-        booking = Booking(
-            hotel_id=room.hotel_id,
-            room_id=room.id,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            guest_name=random.choice(GUEST_NAMES),
-            guest_email=f"{random.choice(GUEST_NAMES).lower().replace(' ', '.')}@example.com",
-            num_guests=random.randint(1, room.max_occupancy),
-            booking_price=booking_price,
-            base_price=base_price * stay_duration,
-            booking_date=datetime.now() - timedelta(days=days_offset + random.randint(1, 30)),
-            booking_source=random.choice(BOOKING_SOURCES),
-            status=status
+    room_table = pd.DataFrame({
+        "id": [room.id for room in rooms],
+        "hotel_id": [room.hotel_id for room in rooms],
+        "base_price": [room.base_price for room in rooms],
+        "max_occupancy": [room.max_occupancy for room in rooms],
+    })
+    created = insert_bookings(db, booking_chunks(room_table, num_bookings, start_date, end_date))
+
+    print(f"Generated {created} bookings")
+    return created
+
+
+def _rng(seed: Optional[int], stream: int) -> "np.random.Generator":
+    # One independent stream per table / chunk, so each is reproducible on its own
+    import numpy as np
+    return np.random.default_rng(None if seed is None else [seed, stream])
+
+
+def hotel_frame(
+    num_hotels: int,
+    seed: Optional[int] = None,
+    rooms_per_hotel: Optional[int] = None,
+    first_id: int = 1
+) -> "pd.DataFrame":
+    """Hotels with ids first_id.., random locations, sizes (40-300 rooms) and star ratings."""
+    import pandas as pd
+
+    rng = _rng(seed, 0)
+    ids = range(first_id, first_id + num_hotels)
+    locations = rng.choice(LOCATIONS, num_hotels)
+    return pd.DataFrame({
+        "id": list(ids),
+        "name": [f"{location.split(',')[0]} Hotel {i}" for i, location in zip(ids, locations)],
+        "location": locations,
+        "total_rooms": rooms_per_hotel or rng.integers(40, 301, num_hotels),
+        "star_rating": rng.choice(STAR_RATINGS, num_hotels),
+    })
+
+
+def room_frame(hotels: "pd.DataFrame", seed: Optional[int] = None, first_id: int = 1) -> "pd.DataFrame":
+    """
+    total_rooms rooms per hotel with consecutive ids, split by ROOM_MIX like
+    generate_rooms: type by room position, base price scaled by star rating.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = _rng(seed, 1)
+    counts = hotels["total_rooms"].to_numpy()
+    hotel_ids = np.repeat(hotels["id"].to_numpy(), counts)
+    stars = np.repeat(hotels["star_rating"].to_numpy(), counts)
+    size = np.repeat(counts, counts)
+    # 1-based room position within its hotel
+    position = np.arange(len(hotel_ids)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+
+    bounds = np.cumsum([share for _, share, _, _ in ROOM_MIX])[:-1]
+    mix = np.searchsorted(bounds, position / size, side="left")
+    low = np.array([r[2][0] for r in ROOM_MIX], dtype=float)[mix]
+    high = np.array([r[2][1] for r in ROOM_MIX], dtype=float)[mix]
+    base_price = np.round(rng.uniform(low, high) * stars / 4.0, 2)
+
+    return pd.DataFrame({
+        "id": np.arange(first_id, first_id + len(hotel_ids)),
+        "hotel_id": hotel_ids,
+        "room_number": pd.Series(position // 10 + 1).astype(str) + pd.Series(position % 10).astype(str).str.zfill(2),
+        "room_type": pd.Categorical.from_codes(mix, [r[0] for r in ROOM_MIX]),
+        "base_price": base_price,
+        "max_occupancy": np.array([r[3] for r in ROOM_MIX])[mix],
+        "is_available": True,
+    })
+
+
+def booking_chunks(
+    rooms: "pd.DataFrame",
+    num_bookings: int,
+    start_date: date,
+    end_date: date,
+    seed: Optional[int] = None,
+    chunk_size: int = GENERATOR_CHUNK_SIZE
+) -> Iterator["pd.DataFrame"]:
+    """
+    num_bookings random bookings of `rooms` (id, hotel_id, base_price,
+    max_occupancy), yielded as DataFrames of at most chunk_size rows.
+
+    Same distributions as the sample data: check-ins uniform over
+    [start_date, end_date], 1-7 nights, a Friday/Saturday premium, peak and
+    low-season price factors, uniform booking sources and 10% cancellations.
+    Past stays are completed. Guest names, emails, sources and statuses are
+    categoricals.
+    """
+    import numpy as np
+    import pandas as pd
+
+    room_ids = rooms["id"].to_numpy()
+    hotel_ids = rooms["hotel_id"].to_numpy()
+    base_prices = rooms["base_price"].to_numpy(dtype=float)
+    max_occupancy = rooms["max_occupancy"].to_numpy()
+    start = np.datetime64(start_date, "D")
+    today = np.datetime64(date.today(), "D")
+    span = (end_date - start_date).days
+    emails = [f"{name.lower().replace(' ', '.')}@example.com" for name in GUEST_NAMES]
+    statuses = ["confirmed", "completed", "cancelled"]
+
+    for index, offset in enumerate(range(0, num_bookings, chunk_size)):
+        n = min(chunk_size, num_bookings - offset)
+        rng = _rng(seed, 100 + index)
+
+        room = rng.integers(0, len(room_ids), n)
+        check_in = start + rng.integers(0, span + 1, n)
+        nights = rng.integers(1, 8, n)
+        check_out = check_in + nights
+
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekday = (check_in.astype(np.int64) + 3) % 7
+        month = check_in.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        multiplier = np.where(
+            np.isin(weekday, WEEKEND_DAYS), rng.uniform(1.2, 1.5, n), rng.uniform(0.85, 1.15, n)
         )
-
-        db.add(booking)
-        bookings.append(booking)
-
+        multiplier *= np.select(
+            [np.isin(month, PEAK_MONTHS), np.isin(month, LOW_MONTHS)],
+            [rng.uniform(1.1, 1.3, n), rng.uniform(0.7, 0.9, n)],
+            1.0
+        )
+        base_price = base_prices[room] * nights
+
+        cancelled = rng.random(n) >= 0.9
+        status = np.where(cancelled, 2, np.where(check_out < today, 1, 0))
+        # Booked 1-30 days ahead, at a random time of day
+        booking_date = (check_in - rng.integers(1, 31, n)).astype("datetime64[s]") + rng.integers(0, 86400, n)
+
+        yield pd.DataFrame({
+            "hotel_id": hotel_ids[room],
+            "room_id": room_ids[room],
+            "check_in_date": check_in,
+            "check_out_date": check_out,
+            "guest_name": pd.Categorical.from_codes(rng.integers(0, len(GUEST_NAMES), n), GUEST_NAMES),
+            "guest_email": pd.Categorical.from_codes(rng.integers(0, len(emails), n), emails),
+            "num_guests": rng.integers(1, max_occupancy[room] + 1),
+            "booking_price": np.round(base_price * multiplier, 2),
+            "base_price": np.round(base_price, 2),
+            "booking_date": booking_date,
+            "booking_source": pd.Categorical.from_codes(rng.integers(0, len(BOOKING_SOURCES), n), BOOKING_SOURCES),
+            "status": pd.Categorical.from_codes(status, statuses),
+        }, columns=BOOKING_COLUMNS)
+
+
+def insert_bookings(db: Session, chunks: Iterator["pd.DataFrame"], batch_size: int = 50000) -> int:
+    """Bulk-insert generated booking chunks with Core inserts; returns the rows inserted."""
+    total = 0
+    for chunk in chunks:
+        records = chunk.assign(
+            check_in_date=chunk["check_in_date"].dt.date,
+            check_out_date=chunk["check_out_date"].dt.date,
+            booking_date=chunk["booking_date"].astype(object),
+        ).to_dict("records")
+        # Table-level insert on the connection skips the ORM bulk-insert bookkeeping
+        connection = db.connection()
+        for i in range(0, len(records), batch_size):
+            connection.execute(insert(Booking.__table__), records[i:i + batch_size])
+        db.commit()
+        total += len(records)
+    return total
+
+
+def generate_dataset(
+    db: Session,
+    num_hotels: int,
+    num_bookings: int,
+    rooms_per_hotel: Optional[int] = None,
+    days: int = 365,
+    end_date: Optional[date] = None,
+    seed: Optional[int] = 42,
+    chunk_size: int = GENERATOR_CHUNK_SIZE,
+    batch_size: int = 50000
+) -> Dict:
+    """
+    Add num_hotels generated hotels, their rooms and num_bookings bookings to the database.
+    Ids continue after the existing rows (and id sequences are moved past them),
+    so run it while nothing else writes hotels or rooms. Booking rollups and
+    daily metrics are not updated (see app.bootstrap.refresh_derived_data).
+    """
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days)
+
+    first_hotel = (db.query(func.max(Hotel.id)).scalar() or 0) + 1
+    first_room = (db.query(func.max(Room.id)).scalar() or 0) + 1
+    hotels = hotel_frame(num_hotels, seed, rooms_per_hotel, first_id=first_hotel)
+    rooms = room_frame(hotels, seed, first_id=first_room)
+    db.execute(insert(Hotel), hotels.to_dict("records"))
+    for i in range(0, len(rooms), batch_size):
+        db.execute(insert(Room), rooms.iloc[i:i + batch_size].astype({"room_type": object}).to_dict("records"))
+    # Explicit ids do not advance PostgreSQL sequences; later inserts would reuse them
+    sync_id_sequence(db, Hotel)
+    sync_id_sequence(db, Room)
     db.commit()
-    print(f"Generated {len(bookings)} bookings")
-    return bookings
+
+    created = insert_bookings(
+        db, booking_chunks(rooms, num_bookings, start_date, end_date, seed, chunk_size), batch_size
+    )
+    return {
+        "hotels": len(hotels),
+        "rooms": len(rooms),
+        "bookings": created,
+        "start_date": start_date,
+        # last check-out a generated stay can have
+        "end_date": end_date + timedelta(days=7),
+    }
 
 
-def generate_all_data(db: Session):
+def _write_csv_chunk(f, chunk: "pd.DataFrame", header: bool):
+    # pyarrow's CSV writer is an order of magnitude faster than DataFrame.to_csv
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:  # optional dependency
+        pa = None
+
+    if pa is not None:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        columns = []
+        for field, column in zip(table.schema, table.columns):
+            if pa.types.is_dictionary(field.type):
+                column = column.cast(pa.string())
+            elif field.name in ("check_in_date", "check_out_date"):
+                column = column.cast(pa.date32())
+            columns.append(column)
+        table = pa.table(columns, names=table.column_names)
+        pa_csv.write_csv(table, f, write_options=pa_csv.WriteOptions(include_header=header))
+        return
+
+    import numpy as np
+    chunk = chunk.assign(**{
+        col: np.datetime_as_string(chunk[col].to_numpy(), unit=unit)
+        for col, unit in (("check_in_date", "D"), ("check_out_date", "D"), ("booking_date", "s"))
+    })
+    chunk.to_csv(f, index=False, header=header)
+
+
+def write_dataset(
+    output_dir: str,
+    file_format: str,
+    num_hotels: int,
+    num_bookings: int,
+    rooms_per_hotel: Optional[int] = None,
+    days: int = 365,
+    end_date: Optional[date] = None,
+    seed: Optional[int] = 42,
+    chunk_size: int = GENERATOR_CHUNK_SIZE
+) -> Dict:
+    """
+    Write hotels, rooms and bookings files (csv or parquet) to output_dir,
+    streaming the bookings one chunk at a time. The bookings file has the
+    columns the CSV ingestion endpoint expects.
+    """
+    if file_format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:  # optional dependency
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+    elif file_format != "csv":
+        raise ValueError("file_format must be 'csv' or 'parquet'")
+
+    end_date = end_date or date.today()
+    hotels = hotel_frame(num_hotels, seed, rooms_per_hotel)
+    rooms = room_frame(hotels, seed)
+    chunks = booking_chunks(rooms, num_bookings, end_date - timedelta(days=days), end_date, seed, chunk_size)
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, f"{name}.{file_format}") for name in ("hotels", "rooms", "bookings")}
+    tmp_path = f"{paths['bookings']}.tmp"
+    written = 0
+
+    if file_format == "csv":
+        hotels.to_csv(paths["hotels"], index=False)
+        rooms.to_csv(paths["rooms"], index=False)
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                _write_csv_chunk(f, chunk, header=written == 0)
+                written += len(chunk)
+    else:
+        pq.write_table(pa.Table.from_pandas(hotels, preserve_index=False), paths["hotels"])
+        pq.write_table(pa.Table.from_pandas(rooms, preserve_index=False), paths["rooms"])
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    os.replace(tmp_path, paths["bookings"])
+    return {"hotels": len(hotels), "rooms": len(rooms), "bookings": written, "paths": paths}
+
+
+def generate_all_data(db: Session, num_bookings: int = 500):
     """
     Generate complete dataset: hotels, rooms, and bookings.
     """
@@ -199,17 +482,61 @@ def generate_all_data(db: Session):
     rooms = generate_rooms(db, hotels)
     
     
-    bookings = generate_bookings(db, rooms, num_bookings=500)
+    created = generate_bookings(db, rooms, num_bookings=num_bookings)
+    total_bookings = db.query(Booking).count()
     
     print("=" * 50)
     print(f"✅ Data generation complete!")
     print(f"   - Hotels: {len(hotels)}")
     print(f"   - Rooms: {len(rooms)}")
-    print(f"   - Bookings: {len(bookings)}")
+    print(f"   - Bookings: {total_bookings} ({created} new)")
     print("=" * 50)
     
     return {
         "hotels": len(hotels),
         "rooms": len(rooms),
-        "bookings": len(bookings)
-    }
\ No newline at end of file
+        "bookings": total_bookings,
+        "bookings_created": created
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic HotelIQ dataset")
+    parser.add_argument("--hotels", type=int, default=10)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=None, help="Fixed hotel size (default: 40-300 rooms)")
+    parser.add_argument("--days", type=int, default=365, help="Days of check-ins, ending at --end-date")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="YYYY-MM-DD (default: today)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet", "db"], default="csv")
+    parser.add_argument("--output", default="data/synthetic", help="Output directory for csv/parquet")
+    parser.add_argument("--chunk-size", type=int, default=GENERATOR_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    options = dict(
+        rooms_per_hotel=args.rooms_per_hotel, days=args.days, end_date=args.end_date,
+        seed=args.seed, chunk_size=args.chunk_size
+    )
+    if args.format == "db":
+        from app.bootstrap import refresh_derived_data
+        from app.database.connection import SessionLocal
+
+        with SessionLocal() as db:
+            result = generate_dataset(db, args.hotels, args.bookings, **options)
+            if result["bookings"]:
+                result.update(refresh_derived_data(db, result["start_date"], result["end_date"]))
+        target = "the database"
+    else:
+        result = write_dataset(args.output, args.format, args.hotels, args.bookings, **options)
+        target = args.output
+
+    duration = time.perf_counter() - started
+    print(f"Generated {result['hotels']} hotels, {result['rooms']} rooms and {result['bookings']} bookings "
+          f"into {target} in {duration:.1f}s ({result['bookings'] / duration:,.0f} bookings/s)")
+    if "metrics_calculated" in result:
+        print(f"Rebuilt {result['rollup_rows']} rollup rows and {result['metrics_calculated']} daily metric rows")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,5 +1,6 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
+import numpy as np
 import pandas as pd
 from pydantic import ValidationError
 
@@ -20,6 +21,12 @@ class DataQualityReport:
     def add_info(self, message: str):
         self.info.append(message)
     
+    def merge(self, other: "DataQualityReport", prefix: str = ""):
+        #Fold another report (e.g. one CSV chunk) into this one
+        self.errors.extend(f"{prefix}{m}" for m in other.errors)
+        self.warnings.extend(f"{prefix}{m}" for m in other.warnings)
+        self.info.extend(f"{prefix}{m}" for m in other.info)
+
     def is_valid(self) -> bool:
         return len(self.errors) == 0
     
@@ -32,6 +39,94 @@ class DataQualityReport:
             "statistics": self.stats
         }
 
+def _as_datetime(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors='coerce')
+
+
+def _as_float(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _count_duplicates(frame: pd.DataFrame, key: List[str]) -> int:
+    """
+    Rows whose key occurs more than once. Integer/date keys without nulls are
+    packed into one int64 and counted with a sort, which is much faster on
+    millions of rows than hashing a multi-column key.
+    """
+    columns = [frame[col].to_numpy() for col in key]
+    if all(c.dtype.kind in "iuM" for c in columns):
+        ints = [c.view("int64") if c.dtype.kind == "M" else c.astype(np.int64) for c in columns]
+        if not any(c.dtype.kind == "M" and np.isnat(c).any() for c in columns):
+            lows = [int(c.min()) for c in ints]
+            spans = [int(c.max()) - low + 1 for c, low in zip(ints, lows)]
+            if np.prod([float(s) for s in spans]) < 2 ** 62:
+                packed = np.zeros(len(frame), dtype=np.int64)
+                for c, low, span in zip(ints, lows, spans):
+                    packed = packed * span + (c - low)
+                packed.sort()
+                same = packed[1:] == packed[:-1]
+                duplicated = np.zeros(len(packed), dtype=bool)
+                duplicated[1:] |= same
+                duplicated[:-1] |= same
+                return int(np.count_nonzero(duplicated))
+    return int(frame.duplicated(subset=key, keep=False).sum())
+
+
+def _float_or_none(value):
+    return None if pd.isna(value) else float(value)
+
+
+class ValidationResult:
+    
+    #Outcome of BookingDataValidator.validate: the report plus a per-row error bitmask
+    
+    
+    def __init__(
+        self,
+        report: DataQualityReport,
+        row_errors: Optional[np.ndarray] = None,
+        check_in: Optional[pd.Series] = None,
+        check_out: Optional[pd.Series] = None
+    ):
+        self.report = report
+        self.row_errors = row_errors
+        self.check_in = check_in
+        self.check_out = check_out
+
+    @property
+    def invalid_count(self) -> int:
+        return 0 if self.row_errors is None else int(np.count_nonzero(self.row_errors))
+
+    def valid_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Copy of the rows that passed, with the dates already parsed."""
+        if self.row_errors is None:
+            raise ValueError("Validation did not reach the row checks")
+        keep = np.flatnonzero(self.row_errors == 0)
+        valid = df.take(keep)
+        valid['check_in_date'] = self.check_in.to_numpy()[keep]
+        valid['check_out_date'] = self.check_out.to_numpy()[keep]
+        return valid
+
+    def quarantined_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Copy of the rows that failed, with a `quarantine_reasons` column."""
+        if self.row_errors is None:
+            raise ValueError("Validation did not reach the row checks")
+        bad = np.flatnonzero(self.row_errors)
+        quarantined = df.take(bad)
+        codes = self.row_errors[bad]
+        # A handful of distinct masks, so map each mask once rather than every row
+        reasons = {
+            code: ";".join(r for bit, r in BookingDataValidator.ROW_ERRORS.items() if code & bit)
+            for code in np.unique(codes).tolist()
+        }
+        quarantined['quarantine_reasons'] = pd.Series(codes, index=quarantined.index).map(reasons)
+        return quarantined
+
+
 class BookingDataValidator:
     """Validates booking data for quality and consistency"""
     
@@ -44,94 +139,166 @@ class BookingDataValidator:
         'guest_email', 'booking_source', 'status', 'booking_date'
     ]
     
+    # Row-level checks: bit in the per-row error mask -> reason
+    MISSING_VALUE = 1
+    INVALID_DATE = 2
+    DATE_ORDER = 4
+    INVALID_PRICE = 8
+    INVALID_GUESTS = 16
+
+    ROW_ERRORS = {
+        MISSING_VALUE: "missing_required_value",
+        INVALID_DATE: "invalid_date",
+        DATE_ORDER: "check_out_not_after_check_in",
+        INVALID_PRICE: "invalid_price",
+        INVALID_GUESTS: "invalid_guest_count",
+    }
+
+    DEDUP_KEY = ['hotel_id', 'room_id', 'check_in_date']
+
     @staticmethod
-    def validate_dataframe(df: pd.DataFrame) -> DataQualityReport:
-    
-        #Comprehensive validation of booking DataFrame.
-        
+    def validate(df: pd.DataFrame) -> "ValidationResult":
+        """
+        Validate a booking DataFrame in one vectorized pass over its columns.
+
+        Every row-level check ORs its bit into a single uint8 error mask, so
+        each column is read once and no filtered copies are made. Rows with a
+        non-zero mask are meant to be quarantined while the others proceed;
+        the report only has errors when nothing can proceed (missing columns,
+        empty frame, every row invalid). `df` is not modified.
+        """
+        V = BookingDataValidator
         report = DataQualityReport()
-        
-        # Check 1: Required columns
-        missing_cols = set(BookingDataValidator.REQUIRED_COLUMNS) - set(df.columns)
+
+        missing_cols = set(V.REQUIRED_COLUMNS) - set(df.columns)
         if missing_cols:
             report.add_error(f"Missing required columns: {missing_cols}")
-            return report
-        
+            return ValidationResult(report)
+
         report.add_info(f"All required columns present. Total rows: {len(df)}")
-        
-        # Check 2: Empty DataFrame
+
         if df.empty:
             report.add_error("DataFrame is empty")
-            return report
-        
-        # Check 3: Null values in critical columns
-        null_counts = df[BookingDataValidator.REQUIRED_COLUMNS].isnull().sum()
-        for col, count in null_counts.items():
-            if count > 0:
-                report.add_error(f"Column '{col}' has {count} null values")
-        
-        # Check 4: Data types
-        try:
-            df['check_in_date'] = pd.to_datetime(df['check_in_date'])
-            df['check_out_date'] = pd.to_datetime(df['check_out_date'])
-        except Exception as e:
-            report.add_error(f"Date conversion error: {str(e)}")
-        
-        # Check 5: Logical validations
-        invalid_dates = df[df['check_out_date'] <= df['check_in_date']]
-        if len(invalid_dates) > 0:
-            report.add_error(f"{len(invalid_dates)} bookings have check-out before/same as check-in")
-        
-        # Check 6: Price validations
-        invalid_prices = df[(df['booking_price'] <= 0) | (df['base_price'] <= 0)]
-        if len(invalid_prices) > 0:
-            report.add_error(f"{len(invalid_prices)} bookings have invalid prices (<=0)")
-        
-        # Check 7: Guest count validation
-        invalid_guests = df[df['num_guests'] <= 0]
-        if len(invalid_guests) > 0:
-            report.add_error(f"{len(invalid_guests)} bookings have invalid guest count")
-        
-        # Check 8: Duplicate detection
-        duplicates = df.duplicated(subset=['hotel_id', 'room_id', 'check_in_date'], keep=False)
-        if duplicates.any():
-            report.add_warning(f"{duplicates.sum()} potential duplicate bookings detected")
-        
-        # Check 9: Outlier detection (prices)
-        price_mean = df['booking_price'].mean()
-        price_std = df['booking_price'].std()
-        outliers = df[df['booking_price'] > price_mean + (3 * price_std)]
-        if len(outliers) > 0:
-            report.add_warning(f"{len(outliers)} bookings with unusually high prices")
-        
-        # Statistics
+            return ValidationResult(report)
+
+        errors = np.zeros(len(df), dtype=np.uint8)
+        counts: Dict[str, int] = {}
+
+        # Nulls in required columns
+        missing = {}
+        for col in V.REQUIRED_COLUMNS:
+            missing[col] = df[col].isna().to_numpy()
+            count = int(missing[col].sum())
+            if count:
+                errors |= missing[col].astype(np.uint8) * V.MISSING_VALUE
+                report.add_warning(f"Column '{col}' has {count} null values")
+
+        # Dates: parsed into local arrays; unparseable values become NaT
+        check_in = _as_datetime(df['check_in_date'])
+        check_out = _as_datetime(df['check_out_date'])
+        ci, co = check_in.to_numpy(), check_out.to_numpy()
+        bad_date = (np.isnat(ci) & ~missing['check_in_date']) | (np.isnat(co) & ~missing['check_out_date'])
+        counts["invalid_date"] = int(bad_date.sum())
+        errors |= bad_date.astype(np.uint8) * V.INVALID_DATE
+        # NaT compares False, so rows without both dates are not flagged twice
+        bad_order = co <= ci
+        counts["date_order"] = int(bad_order.sum())
+        errors |= bad_order.astype(np.uint8) * V.DATE_ORDER
+
+        # Prices and guest counts; `not > 0` also catches unparseable values
+        price = _as_float(df['booking_price'])
+        bad_price = (~(price > 0) & ~missing['booking_price']) | (
+            ~(_as_float(df['base_price']) > 0) & ~missing['base_price']
+        )
+        counts["invalid_price"] = int(bad_price.sum())
+        errors |= bad_price.astype(np.uint8) * V.INVALID_PRICE
+        bad_guests = ~(_as_float(df['num_guests']) > 0) & ~missing['num_guests']
+        counts["invalid_guests"] = int(bad_guests.sum())
+        errors |= bad_guests.astype(np.uint8) * V.INVALID_GUESTS
+
+        if counts["invalid_date"]:
+            report.add_warning(f"{counts['invalid_date']} bookings have unparseable dates")
+        if counts["date_order"]:
+            report.add_warning(f"{counts['date_order']} bookings have check-out before/same as check-in")
+        if counts["invalid_price"]:
+            report.add_warning(f"{counts['invalid_price']} bookings have invalid prices (<=0)")
+        if counts["invalid_guests"]:
+            report.add_warning(f"{counts['invalid_guests']} bookings have invalid guest count")
+
+        # Statistics, plus the mean/std used for outliers, in one agg call
+        checked = pd.DataFrame({
+            'hotel_id': df['hotel_id'].to_numpy(),
+            'room_id': df['room_id'].to_numpy(),
+            'check_in_date': ci,
+            'check_out_date': co,
+            'booking_price': price,
+        })
+        agg = checked.agg({
+            'check_in_date': ['min'],
+            'check_out_date': ['max'],
+            'booking_price': ['min', 'max', 'mean', 'median', 'std'],
+            'hotel_id': ['nunique'],
+            'room_id': ['nunique'],
+        })
+        price_stats = agg['booking_price']
+
+        # Warnings only: these rows still proceed
+        duplicates = _count_duplicates(checked, V.DEDUP_KEY)
+        if duplicates:
+            report.add_warning(f"{duplicates} potential duplicate bookings detected")
+        outliers = int((price > price_stats['mean'] + 3 * price_stats['std']).sum())
+        if outliers:
+            report.add_warning(f"{outliers} bookings with unusually high prices")
+
+        invalid = int(np.count_nonzero(errors))
+        earliest, latest = agg.at['min', 'check_in_date'], agg.at['max', 'check_out_date']
         report.stats = {
             "total_records": len(df),
+            "valid_records": len(df) - invalid,
+            "quarantined_records": invalid,
+            "quarantine_reasons": {
+                reason: int(np.count_nonzero(errors & bit)) for bit, reason in V.ROW_ERRORS.items()
+                if np.any(errors & bit)
+            },
             "date_range": {
-                "earliest": df['check_in_date'].min().isoformat() if not df['check_in_date'].isnull().all() else None,
-                "latest": df['check_out_date'].max().isoformat() if not df['check_out_date'].isnull().all() else None
+                "earliest": earliest.isoformat() if pd.notna(earliest) else None,
+                "latest": latest.isoformat() if pd.notna(latest) else None
             },
             "price_stats": {
-                "min": float(df['booking_price'].min()),
-                "max": float(df['booking_price'].max()),
-                "mean": float(df['booking_price'].mean()),
-                "median": float(df['booking_price'].median())
+                "min": _float_or_none(price_stats['min']),
+                "max": _float_or_none(price_stats['max']),
+                "mean": _float_or_none(price_stats['mean']),
+                "median": _float_or_none(price_stats['median'])
             },
-            "unique_hotels": int(df['hotel_id'].nunique()),
-            "unique_rooms": int(df['room_id'].nunique())
+            "unique_hotels": int(agg.at['nunique', 'hotel_id']),
+            "unique_rooms": int(agg.at['nunique', 'room_id'])
         }
-        
-        if report.is_valid():
+
+        if invalid == len(df):
+            report.add_error(f"All {invalid} rows failed validation")
+        elif invalid:
+            report.add_info(f"{invalid} of {len(df)} rows failed validation and will be quarantined")
+        else:
             report.add_info("✅ Data validation passed")
+
+        return ValidationResult(report, errors, check_in, check_out)
+
+    @staticmethod
+    def validate_dataframe(df: pd.DataFrame) -> DataQualityReport:
+    
+        #Comprehensive validation of booking DataFrame (report only).
         
-        return report
+        return BookingDataValidator.validate(df).report
     
     @staticmethod
     def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         """
         Clean and standardize DataFrame.
         """
-        df_clean = df.copy()
+        # Remove duplicates first; the deduplicated frame is the single copy
+        # that gets cleaned in place (the caller's frame is left untouched)
+        keep = ~df.duplicated(subset=['hotel_id', 'room_id', 'check_in_date'], keep='first')
+        df_clean = df.take(np.flatnonzero(keep.to_numpy()))
         
         # Convert dates
         df_clean['check_in_date'] = pd.to_datetime(df_clean['check_in_date'])
@@ -148,15 +315,22 @@ class BookingDataValidator:
             df_clean['booking_date'] = datetime.now()
         
         # Strip whitespace from string columns
-        string_cols = df_clean.select_dtypes(include=['object']).columns
+        string_cols = df_clean.select_dtypes(include=['object', 'string']).columns
         for col in string_cols:
             if col in df_clean.columns:
                 df_clean[col] = df_clean[col].str.strip()
         
-        # Remove duplicates
-        df_clean = df_clean.drop_duplicates(
-            subset=['hotel_id', 'room_id', 'check_in_date'],
-            keep='first'
-        )
+        # Categoricals: strip the categories, not every row
+        for col in df_clean.select_dtypes(include=['category']).columns:
+            categories = df_clean[col].cat.categories
+            if not pd.api.types.is_string_dtype(categories):
+                continue
+            stripped = categories.str.strip()
+            if stripped.equals(categories):
+                continue
+            if stripped.is_unique:
+                df_clean[col] = df_clean[col].cat.rename_categories(stripped)
+            else:
+                df_clean[col] = df_clean[col].astype(object).str.strip().astype('category')
         
         return df_clean
\ No newline at end of file
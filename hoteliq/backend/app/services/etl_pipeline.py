@@ -1,120 +1,346 @@
+import os
 import pandas as pd
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from app.models.hotel import Booking, DailyMetrics
 from app.services.data_validator import BookingDataValidator, DataQualityReport
+from app.services.booking_events import record_booking_changes, snapshot, snapshot_from_record
+from app.services.booking_schema import compact_booking_frame
 from app.services.feature_engineering import FeatureEngineer
 
+# Rows that fail validation are written here (one CSV per pipeline run) with their reasons
+QUARANTINE_DIR = os.getenv("QUARANTINE_DIR", "data/quarantine")
+
 
 class ETLPipeline:
     
     #Orchestrates the ETL process for booking data
     
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
+        #db takes the writes; extraction reads go to read_db (e.g. a replica session) when given
         self.db = db
+        self.read_db = read_db or db
         self.validator = BookingDataValidator()
         self.feature_engineer = FeatureEngineer()
+        self.quarantine_path: Optional[str] = None
+        self.quarantined = 0
     
     def extract_from_csv(self, file_path: str) -> pd.DataFrame:
         """
         Extract data from CSV file.
         """
         print(f" Extracting data from: {file_path}")
-        df = pd.read_csv(file_path)
+        df = compact_booking_frame(pd.read_csv(file_path))
         print(f"  ✅ Extracted {len(df)} records")
         return df
     
-    def extract_from_database(self, hotel_id: int = None, start_date: str = None) -> pd.DataFrame:
+    def extract_csv_chunks(self, file_path: str, chunksize: int) -> Iterator[Tuple[pd.DataFrame, float]]:
+        """
+        Stream a CSV file as DataFrames of at most `chunksize` rows.
+        Yields (chunk, fraction of the file read so far).
+        """
+        file_size = os.path.getsize(file_path) or 1
+        with open(file_path, 'rb') as f:
+            for chunk in pd.read_csv(f, chunksize=chunksize):
+                yield compact_booking_frame(chunk), min(f.tell() / file_size, 1.0)
+    
+    # Output column name -> Booking column, in extraction order
+    EXTRACT_COLUMNS = {
+        'booking_id': Booking.id,
+        'hotel_id': Booking.hotel_id,
+        'room_id': Booking.room_id,
+        'check_in_date': Booking.check_in_date,
+        'check_out_date': Booking.check_out_date,
+        'guest_name': Booking.guest_name,
+        'guest_email': Booking.guest_email,
+        'num_guests': Booking.num_guests,
+        'booking_price': Booking.booking_price,
+        'base_price': Booking.base_price,
+        'booking_date': Booking.booking_date,
+        'booking_source': Booking.booking_source,
+        'status': Booking.status
+    }
+    
+    def _extraction_select(
+        self,
+        columns: Optional[List[str]] = None,
+        hotel_id: int = None,
+        hotel_ids: List[int] = None,
+        start_date=None,
+        end_date=None,
+        min_booking_id: int = None,
+        max_booking_id: int = None
+    ):
+        
+        #Core SELECT over the requested booking columns with all filters in the WHERE clause
+        
+        columns = columns or list(self.EXTRACT_COLUMNS)
+        unknown = [c for c in columns if c not in self.EXTRACT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown booking columns: {unknown}")
+        
+        stmt = select(*[self.EXTRACT_COLUMNS[c].label(c) for c in columns])
+        
+        if hotel_id:
+            stmt = stmt.where(Booking.hotel_id == hotel_id)
+        if hotel_ids:
+            stmt = stmt.where(Booking.hotel_id.in_(hotel_ids))
+        if start_date:
+            stmt = stmt.where(Booking.check_in_date >= start_date)
+        if end_date:
+            stmt = stmt.where(Booking.check_in_date <= end_date)
+        if min_booking_id:
+            stmt = stmt.where(Booking.id >= min_booking_id)
+        if max_booking_id:
+            stmt = stmt.where(Booking.id <= max_booking_id)
+        
+        return stmt.order_by(Booking.id), columns
+    
+    def iter_extract(self, batch_size: int = 50000, columns: Optional[List[str]] = None, **filters) -> Iterator[pd.DataFrame]:
+        """
+        Stream bookings from the database as typed DataFrames of at most `batch_size` rows.
+        
+        Rows come from a server-side cursor (stream_results/yield_per), so no ORM
+        objects are built and only one batch of tuples is held at a time.
+        Accepts the same filters as extract_from_database.
+        """
+        stmt, columns = self._extraction_select(columns, **filters)
+        result = self.read_db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        for rows in result.partitions():
+            yield compact_booking_frame(pd.DataFrame.from_records(rows, columns=columns))
+    
+    def extract_from_database(
+        self,
+        hotel_id: int = None,
+        start_date: str = None,
+        hotel_ids: List[int] = None,
+        min_booking_id: int = None,
+        end_date: str = None,
+        max_booking_id: int = None,
+        columns: Optional[List[str]] = None,
+        batch_size: int = 50000
+    ) -> pd.DataFrame:
         """
         Extract existing bookings from database.
+        
+        `columns` limits the SELECT to a subset of EXTRACT_COLUMNS; hotel,
+        check-in date and booking id filters are applied in SQL.
         """
         print(" Extracting data from database...")
-        query = self.db.query(Booking)
+        chunks = list(self.iter_extract(
+            batch_size=batch_size,
+            columns=columns,
+            hotel_id=hotel_id,
+            hotel_ids=hotel_ids,
+            start_date=start_date,
+            end_date=end_date,
+            min_booking_id=min_booking_id,
+            max_booking_id=max_booking_id
+        ))
         
-        if hotel_id:
-            query = query.filter(Booking.hotel_id == hotel_id)
+        if not chunks:
+            df = compact_booking_frame(pd.DataFrame(columns=columns or list(self.EXTRACT_COLUMNS)))
+        elif len(chunks) == 1:
+            df = chunks[0]
+        else:
+            # Categories differ between chunks, so re-compact after the concat
+            df = compact_booking_frame(pd.concat(chunks, ignore_index=True))
         
-        if start_date:
-            query = query.filter(Booking.check_in_date >= start_date)
-        
-        bookings = query.all()
-        
-        # Convert to DataFrame
-        data = []
-        for booking in bookings:
-            data.append({
-                'hotel_id': booking.hotel_id,
-                'room_id': booking.room_id,
-                'check_in_date': booking.check_in_date,
-                'check_out_date': booking.check_out_date,
-                'guest_name': booking.guest_name,
-                'guest_email': booking.guest_email,
-                'num_guests': booking.num_guests,
-                'booking_price': booking.booking_price,
-                'base_price': booking.base_price,
-                'booking_date': booking.booking_date,
-                'booking_source': booking.booking_source,
-                'status': booking.status
-            })
-        
-        df = pd.DataFrame(data)
         print(f"   Extracted {len(df)} records from database")
         return df
     
     def transform(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, DataQualityReport]:
         """
         Transform and validate data.
+        
+        Rows that fail validation are quarantined and the rest carry on; the
+        report is only invalid when no row can proceed.
         """
         print("\n Starting transformation...")
         
         # Step 1: Validate
         print(" Validating data quality...")
-        report = self.validator.validate_dataframe(df)
+        result = self.validator.validate(df)
+        report = result.report
+        
+        # Failing rows go to quarantine even when none of the frame can proceed
+        if result.invalid_count:
+            path = self.quarantine(result.quarantined_rows(df))
+            report.add_warning(f"{result.invalid_count} rows quarantined to {path}")
+            print(f"  {result.invalid_count} invalid rows quarantined to {path}")
         
         if not report.is_valid():
             print("  ❌ Validation failed!")
             return df, report
         
+        if result.invalid_count:
+            df = result.valid_rows(df)
+        
         # Step 2: Clean
         print("Cleaning data...")
         df_clean = self.validator.clean_dataframe(df)
         
         # Step 3: Feature Engineering
         print(" Engineering features...")
-        df_transformed = self.feature_engineer.create_all_features(df_clean, self.db)
+        df_transformed = self.feature_engineer.create_all_features(df_clean, self.read_db)
         
         print(" Transformation complete!")
         return df_transformed, report
     
-    def load_to_database(self, df: pd.DataFrame, batch_size: int = 100) -> Dict:
+    def quarantine(self, df_bad: pd.DataFrame) -> str:
+        """
+        Append rejected rows (with their quarantine_reasons) to this run's quarantine CSV.
+        """
+        if self.quarantine_path is None:
+            os.makedirs(QUARANTINE_DIR, exist_ok=True)
+            self.quarantine_path = os.path.join(
+                QUARANTINE_DIR, f"bookings_{datetime.now():%Y%m%d_%H%M%S_%f}.csv"
+            )
+        df_bad.to_csv(
+            self.quarantine_path, mode="a", index=False,
+            header=not os.path.exists(self.quarantine_path)
+        )
+        self.quarantined += len(df_bad)
+        return self.quarantine_path
+    
+    def _quarantine_summary(self) -> Dict:
+        return {"rows": self.quarantined, "path": self.quarantine_path}
+    
+    # Columns that match the Booking model
+    BOOKING_COLUMNS = [
+        'hotel_id', 'room_id', 'check_in_date', 'check_out_date',
+        'guest_name', 'guest_email', 'num_guests', 'booking_price',
+        'base_price', 'booking_source', 'status', 'booking_date'
+    ]
+    
+    # A booking is a duplicate if the same room is already booked from the same day
+    DEDUP_KEY = ['hotel_id', 'room_id', 'check_in_date']
+    
+    def load_to_database(self, df: pd.DataFrame, batch_size: int = 5000, bulk: bool = True) -> Dict:
         """
         Load transformed data into database.
+        
+        The bulk mode (default) deduplicates the whole frame against the database
+        with one key query and inserts with Core executemany batches.
+        bulk=False keeps the row-by-row ORM loader.
         """
         print("\n Loading data to database...")
+        start_time = datetime.now()
+        
+        df_to_load = df.reindex(columns=self.BOOKING_COLUMNS)
+        
+        # Add booking_date if not present
+        if 'booking_date' not in df.columns:
+            df_to_load['booking_date'] = datetime.now()
+        
+        if bulk:
+            loaded_count, skipped_count, error_count = self._bulk_load(df_to_load, batch_size)
+        else:
+            loaded_count, skipped_count, error_count = self._row_load(df_to_load, batch_size)
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        rows_per_second = len(df_to_load) / duration if duration > 0 else 0.0
+        
+        result = {
+            "loaded": loaded_count,
+            "skipped": skipped_count,
+            "errors": error_count,
+            "total": len(df_to_load),
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(rows_per_second, 1)
+        }
+        
+        print(f"\n Load complete: {loaded_count} new records, {skipped_count} skipped, "
+              f"{error_count} errors ({rows_per_second:,.0f} rows/sec)")
+        return result
+    
+    def _bulk_load(self, df_to_load: pd.DataFrame, batch_size: int) -> Tuple[int, int, int]:
+        
+        #Set-based load: one existing-key query, anti-join in pandas, executemany inserts.
         
         loaded_count = 0
-        skipped_count = 0
         error_count = 0
         
-        # Select only columns that match Booking model
-        booking_cols = [
-            'hotel_id', 'room_id', 'check_in_date', 'check_out_date',
-            'guest_name', 'guest_email', 'num_guests', 'booking_price',
-            'base_price', 'booking_source', 'status'
-        ]
+        df_to_load = df_to_load.copy()
+        df_to_load['check_in_date'] = pd.to_datetime(df_to_load['check_in_date']).dt.date
+        df_to_load['check_out_date'] = pd.to_datetime(df_to_load['check_out_date']).dt.date
+        df_to_load['booking_date'] = pd.to_datetime(df_to_load['booking_date'])
         
-        # Add booking_date if not present
-        if 'booking_date' not in df.columns:
-            df['booking_date'] = datetime.now()
-        booking_cols.append('booking_date')
+        # Duplicates inside the file, then keys that already exist in the database
+        unique = df_to_load.drop_duplicates(subset=self.DEDUP_KEY, keep='first')
+        existing = self._existing_booking_keys(unique)
+        is_existing = pd.MultiIndex.from_frame(unique[self.DEDUP_KEY]).isin(existing)
+        new_rows = unique[~is_existing]
+        skipped_count = len(df_to_load) - len(new_rows)
         
-        df_to_load = df[booking_cols].copy()
+        # Plain Python values, NaN/NaT -> None
+        records = new_rows.astype(object).where(new_rows.notna(), None).to_dict(orient='records')
+        
+        for i in range(0, len(records), batch_size):
+            batch = records[i:i+batch_size]
+            try:
+                self.db.execute(insert(Booking), batch)
+                record_booking_changes(self.db, added=[snapshot_from_record(r) for r in batch])
+                self.db.commit()
+                loaded_count += len(batch)
+                print(f"  Batch {i//batch_size + 1} committed ({loaded_count} loaded so far)")
+            except Exception as e:
+                self.db.rollback()
+                print(f"   Batch insert failed, retrying row by row: {str(e)}")
+                loaded, errors = self._insert_rows_individually(batch)
+                loaded_count += loaded
+                error_count += errors
+        
+        return loaded_count, skipped_count, error_count
+    
+    def _existing_booking_keys(self, df: pd.DataFrame) -> pd.MultiIndex:
+        
+        #Fetch the dedup keys already stored for the frame's hotels and check-in span.
+        
+        if df.empty:
+            return pd.MultiIndex.from_tuples([], names=self.DEDUP_KEY)
+        
+        stmt = select(Booking.hotel_id, Booking.room_id, Booking.check_in_date).where(
+            Booking.hotel_id.in_([int(h) for h in df['hotel_id'].dropna().unique()]),
+            Booking.check_in_date >= df['check_in_date'].min(),
+            Booking.check_in_date <= df['check_in_date'].max()
+        )
+        rows = self.db.execute(stmt).all()
+        return pd.MultiIndex.from_tuples([tuple(r) for r in rows], names=self.DEDUP_KEY)
+    
+    def _insert_rows_individually(self, records: List[Dict]) -> Tuple[int, int]:
+        
+        #Fallback for a failed batch: isolate the bad rows, keep the good ones.
+        
+        loaded_count = 0
+        error_count = 0
+        for record in records:
+            try:
+                self.db.execute(insert(Booking), [record])
+                record_booking_changes(self.db, added=[snapshot_from_record(record)])
+                self.db.commit()
+                loaded_count += 1
+            except Exception as e:
+                self.db.rollback()
+                error_count += 1
+                print(f"  Error loading record: {str(e)}")
+        return loaded_count, error_count
+    
+    def _row_load(self, df_to_load: pd.DataFrame, batch_size: int) -> Tuple[int, int, int]:
+        
+        #Row-by-row ORM load with a duplicate check per row.
+        
+        loaded_count = 0
+        skipped_count = 0
+        error_count = 0
         
         # Load in batches
         for i in range(0, len(df_to_load), batch_size):
             batch = df_to_load.iloc[i:i+batch_size]
+            batch_bookings = []
             
             for _, row in batch.iterrows():
                 try:
@@ -132,34 +358,41 @@ class ETLPipeline:
                     # Create new booking
                     booking = Booking(**row.to_dict())
                     self.db.add(booking)
+                    batch_bookings.append(booking)
                     loaded_count += 1
                     
                 except Exception as e:
                     error_count += 1
                     print(f"  Error loading record: {str(e)}")
             
-            # Commit batch
+            # Commit batch together with its DailyMetrics delta
             try:
+                self.db.flush()
+                record_booking_changes(self.db, added=[snapshot(b) for b in batch_bookings])
                 self.db.commit()
                 print(f"  Batch {i//batch_size + 1} committed ({loaded_count} loaded so far)")
             except Exception as e:
                 self.db.rollback()
                 print(f"   Batch commit failed: {str(e)}")
         
-        result = {
-            "loaded": loaded_count,
-            "skipped": skipped_count,
-            "errors": error_count,
-            "total": len(df_to_load)
-        }
+        return loaded_count, skipped_count, error_count
+    
+    def sync_feature_store(self):
         
-        print(f"\n Load complete: {loaded_count} new records, {skipped_count} skipped, {error_count} errors")
-        return result
+        #Append features for newly loaded bookings to the feature store (if pyarrow is available).
+        
+        from app.services.feature_store import FeatureStore
+        try:
+            FeatureStore(self.db).sync()
+        except RuntimeError as e:
+            print(f"  Feature store skipped: {str(e)}")
     
     def run_full_pipeline(self, source: str, **kwargs) -> Dict:
         
         #Run complete ETL pipeline.
-        
+        #For non-chunked sources, `progress_callback` (if given) receives
+        #{"fraction", "stage"} after extraction and after validation, before
+        #anything is written; it may raise to stop the run there.
         
         print("=" * 60)
         print(" Starting ETL Pipeline")
@@ -168,16 +401,27 @@ class ETLPipeline:
         start_time = datetime.now()
         
         # Extract
-        if source == 'csv':
+        if source == 'csv' and kwargs.get('chunksize'):
+            return self.run_chunked_csv_pipeline(
+                kwargs.get('file_path'),
+                chunksize=kwargs['chunksize'],
+                progress_callback=kwargs.get('progress_callback')
+            )
+        elif source == 'csv':
             df = self.extract_from_csv(kwargs.get('file_path'))
         elif source == 'database':
             df = self.extract_from_database(
                 hotel_id=kwargs.get('hotel_id'),
-                start_date=kwargs.get('start_date')
+                start_date=kwargs.get('start_date'),
+                end_date=kwargs.get('end_date')
             )
         else:
             raise ValueError("Source must be 'csv' or 'database'")
         
+        progress_callback = kwargs.get('progress_callback')
+        if progress_callback:
+            progress_callback({"fraction": 0.3, "stage": f"Extracted {len(df)} rows"})
+        
         # Transform
         df_transformed, validation_report = self.transform(df)
         
@@ -188,8 +432,12 @@ class ETLPipeline:
                 "message": "Pipeline failed at validation stage"
             }
         
+        if progress_callback:
+            progress_callback({"fraction": 0.6, "stage": f"Validated {len(df_transformed)} rows, loading"})
+        
         # Load
         load_result = self.load_to_database(df_transformed)
+        self.sync_feature_store()
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -206,6 +454,91 @@ class ETLPipeline:
             "duration_seconds": duration,
             "validation_report": validation_report.to_dict(),
             "load_result": load_result,
+            "quarantine": self._quarantine_summary(),
             "feature_summary": feature_summary,
             "message": "ETL pipeline completed successfully"
-        }
\ No newline at end of file
+        }
+    
+    def run_chunked_csv_pipeline(
+        self,
+        file_path: str,
+        chunksize: int = 50000,
+        progress_callback: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Run validate -> clean -> feature -> load over fixed-size CSV chunks.
+        
+        Only one chunk is held in memory at a time, so peak memory depends on
+        `chunksize`, not on the file size. Invalid rows are quarantined; a
+        chunk with no usable rows is reported and skipped, the other chunks
+        are still loaded. After each
+        chunk `progress_callback` (if given) receives a progress dict.
+        """
+        print("=" * 60)
+        print(f" Starting chunked ETL Pipeline ({chunksize} rows per chunk)")
+        print("=" * 60)
+        
+        start_time = datetime.now()
+        validation_report = DataQualityReport()
+        load_result = {"loaded": 0, "skipped": 0, "errors": 0, "total": 0}
+        feature_summary = None
+        rows_processed = 0
+        failed_chunks = []
+        chunk_number = 0
+        
+        for chunk_number, (chunk, fraction) in enumerate(self.extract_csv_chunks(file_path, chunksize), start=1):
+            df_transformed, chunk_report = self.transform(chunk)
+            validation_report.merge(chunk_report, prefix=f"Chunk {chunk_number}: ")
+            rows_processed += len(chunk)
+            
+            if chunk_report.is_valid():
+                chunk_load = self.load_to_database(df_transformed)
+                for key in load_result:
+                    load_result[key] += chunk_load[key]
+                if feature_summary is None:
+                    feature_summary = self.feature_engineer.get_feature_summary(df_transformed)
+            else:
+                failed_chunks.append(chunk_number)
+            
+            progress = {
+                "chunk": chunk_number,
+                "rows_processed": rows_processed,
+                "rows_loaded": load_result["loaded"],
+                "failed_chunks": len(failed_chunks),
+                "fraction": round(fraction, 4)
+            }
+            print(f" Chunk {chunk_number}: {rows_processed} rows processed, "
+                  f"{load_result['loaded']} loaded ({fraction:.0%} of file)")
+            if progress_callback:
+                progress_callback(progress)
+        
+        self.sync_feature_store()
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        load_result["duration_seconds"] = round(duration, 3)
+        load_result["rows_per_second"] = round(rows_processed / duration, 1) if duration > 0 else 0.0
+        validation_report.stats = {
+            "total_records": rows_processed,
+            "quarantined_records": self.quarantined,
+            "chunks": chunk_number,
+            "failed_chunks": failed_chunks
+        }
+        
+        print("=" * 60)
+        print(f" Chunked ETL Pipeline Complete! Duration: {duration:.2f}s")
+        print("=" * 60)
+        
+        if failed_chunks:
+            message = f"{len(failed_chunks)} of {chunk_number} chunks failed validation; valid chunks were loaded"
+        else:
+            message = "ETL pipeline completed successfully"
+        
+        return {
+            "success": not failed_chunks,
+            "duration_seconds": duration,
+            "validation_report": validation_report.to_dict(),
+            "load_result": load_result,
+            "quarantine": self._quarantine_summary(),
+            "feature_summary": feature_summary,
+            "message": message
+        }
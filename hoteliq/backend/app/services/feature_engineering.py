@@ -5,11 +5,18 @@ from typing import Dict, List
 from sqlalchemy.orm import Session
 from app.models.hotel import Booking, Hotel, Room
 
+# Calendar-day windows for the rolling aggregated features
+ROLLING_WINDOWS_DAYS = [7, 30]
+
 
 class FeatureEngineer:
     """
     Creates ML features from raw booking data.
     Features are used for demand forecasting and pricing models.
+    
+    The create_* steps add columns to the frame they are given (no defensive
+    copies) and use compact dtypes: small ints, float32, bool flags and
+    categoricals.
     """
     
     @staticmethod
@@ -17,18 +24,18 @@ class FeatureEngineer:
         """
         Create time-based features from check-in dates.
         """
-        df = df.copy()
+        check_in = df['check_in_date'].dt
         
         # Basic time features
-        df['day_of_week'] = df['check_in_date'].dt.dayofweek  # 0=Monday, 6=Sunday
-        df['day_of_month'] = df['check_in_date'].dt.day
-        df['month'] = df['check_in_date'].dt.month
-        df['quarter'] = df['check_in_date'].dt.quarter
-        df['year'] = df['check_in_date'].dt.year
-        df['week_of_year'] = df['check_in_date'].dt.isocalendar().week
+        df['day_of_week'] = _small_int(check_in.dayofweek, 'int8')  # 0=Monday, 6=Sunday
+        df['day_of_month'] = _small_int(check_in.day, 'int8')
+        df['month'] = _small_int(check_in.month, 'int8')
+        df['quarter'] = _small_int(check_in.quarter, 'int8')
+        df['year'] = _small_int(check_in.year, 'int16')
+        df['week_of_year'] = _small_int(check_in.isocalendar().week, 'int8')
         
         # Weekend flag
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+        df['is_weekend'] = df['day_of_week'].isin([5, 6])
         
         # Season (Indian context)
         df['season'] = df['month'].map({
@@ -36,13 +43,13 @@ class FeatureEngineer:
             3: 'spring', 4: 'spring', 5: 'spring',
             6: 'monsoon', 7: 'monsoon', 8: 'monsoon',
             9: 'autumn', 10: 'autumn', 11: 'autumn'
-        })
+        }).astype('category')
         
         # Peak season flag (Oct-Feb)
-        df['is_peak_season'] = df['month'].isin([10, 11, 12, 1, 2]).astype(int)
+        df['is_peak_season'] = df['month'].isin([10, 11, 12, 1, 2])
         
         # Holiday proximity (approximate - can be enhanced)
-        df['is_holiday_season'] = df['month'].isin([12, 1, 4, 10]).astype(int)
+        df['is_holiday_season'] = df['month'].isin([12, 1, 4, 10])
         
         return df
     
@@ -51,10 +58,8 @@ class FeatureEngineer:
         """
         Create features related to length of stay.
         """
-        df = df.copy()
-        
         # Length of stay
-        df['length_of_stay'] = (df['check_out_date'] - df['check_in_date']).dt.days
+        df['length_of_stay'] = _small_int((df['check_out_date'] - df['check_in_date']).dt.days, 'int16')
         
         # Stay category
         df['stay_category'] = pd.cut(
@@ -65,8 +70,9 @@ class FeatureEngineer:
         
         # Lead time (days between booking and check-in)
         if 'booking_date' in df.columns:
-            df['lead_time_days'] = (df['check_in_date'] - df['booking_date']).dt.days
-            df['is_last_minute'] = (df['lead_time_days'] <= 3).astype(int)
+            # booking_date is optional per row; a blank one gives <NA> lead time, not an error
+            df['lead_time_days'] = _small_int((df['check_in_date'] - df['booking_date']).dt.days, 'int32')
+            df['is_last_minute'] = df['lead_time_days'].le(3).fillna(False).astype(bool)
         
         return df
     
@@ -75,13 +81,13 @@ class FeatureEngineer:
         """
         Create pricing-related features.
         """
-        df = df.copy()
-        
         # Price per night
-        df['price_per_night'] = df['booking_price'] / df['length_of_stay']
+        df['price_per_night'] = (df['booking_price'] / df['length_of_stay']).astype('float32')
         
         # Discount percentage
-        df['discount_pct'] = ((df['base_price'] - df['booking_price']) / df['base_price'] * 100).clip(lower=0)
+        df['discount_pct'] = (
+            (df['base_price'] - df['booking_price']) / df['base_price'] * 100
+        ).clip(lower=0).astype('float32')
         
         # Price category
         df['price_category'] = pd.cut(
@@ -96,24 +102,54 @@ class FeatureEngineer:
     def create_aggregated_features(df: pd.DataFrame) -> pd.DataFrame:
         """
         Create rolling window and aggregated features.
+        
+        Windows are calendar days (like rolling('7D')) per hotel, covering the
+        check-in day and the window-1 days before it. All windows for all
+        hotels are computed in one pass with cumulative-sum differencing over
+        a (hotel, day) ordering instead of a Python lambda per hotel group.
+        Rows keep their input order; the orderings are index arrays, so the
+        frame itself is never re-sorted.
         """
-        df = df.copy()
-        df = df.sort_values('check_in_date')
-        
-        # Rolling features (7-day and 30-day windows)
-        for window in [7, 30]:
-            # Average price in window
-            df[f'avg_price_{window}d'] = df.groupby('hotel_id')['booking_price'].transform(
-                lambda x: x.rolling(window=window, min_periods=1).mean()
-            )
+        day = df['check_in_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        hotel_code = pd.factorize(df['hotel_id'])[0].astype(np.int64)
+        prices = df['booking_price'].to_numpy(dtype=np.float64)
+        
+        # (hotel, day) ordering; lexsort is stable, so same-day rows keep input order
+        order = np.lexsort((day, hotel_code))
+        
+        # One sortable key per row: hotels never overlap, days stay contiguous
+        day_sorted = day[order] - (day.min() if len(day) else 0)
+        span = (day_sorted.max() if len(day) else 0) + max(ROLLING_WINDOWS_DAYS) + 1
+        key = hotel_code[order] * span + day_sorted
+        
+        sorted_prices = prices[order]
+        has_price = ~np.isnan(sorted_prices)
+        price_cumsum = np.concatenate([[0.0], np.cumsum(np.where(has_price, sorted_prices, 0.0))])
+        count_cumsum = np.concatenate([[0], np.cumsum(has_price)])
+        position = np.arange(1, len(key) + 1)
+        
+        for window in ROLLING_WINDOWS_DAYS:
+            # First row of the same hotel inside (day - window, day]
+            window_start = np.searchsorted(key, key - window + 1, side='left')
+            count = count_cumsum[position] - count_cumsum[window_start]
+            total = price_cumsum[position] - price_cumsum[window_start]
             
-            # Booking count in window
-            df[f'booking_count_{window}d'] = df.groupby('hotel_id')['booking_price'].transform(
-                lambda x: x.rolling(window=window, min_periods=1).count()
-            )
-        
-        # Lag features (previous booking prices)
-        df['prev_booking_price'] = df.groupby(['hotel_id', 'room_id'])['booking_price'].shift(1)
+            avg_price = np.full(len(key), np.nan)
+            np.divide(total, count, out=avg_price, where=count > 0)
+            
+            # Scatter back from (hotel, day) order to frame order
+            df[f'avg_price_{window}d'] = _unsort(avg_price, order).astype(np.float32)
+            df[f'booking_count_{window}d'] = _unsort(count, order).astype(np.int32)
+        
+        # Lag features (previous booking price of the same room, by check-in day)
+        room_code = pd.factorize(df['room_id'])[0].astype(np.int64)
+        order = np.lexsort((day, room_code, hotel_code))
+        same_room = (hotel_code[order][1:] == hotel_code[order][:-1]) & (room_code[order][1:] == room_code[order][:-1])
+        prev_price = np.full(len(order), np.nan)
+        prev_price[1:][same_room] = prices[order][:-1][same_room]
+        prev_price = _unsort(prev_price, order)
+        prev_price[(hotel_code < 0) | (room_code < 0)] = np.nan
+        df['prev_booking_price'] = prev_price.astype(np.float32)
         
         return df
     
@@ -122,25 +158,16 @@ class FeatureEngineer:
         """
         Create occupancy-related features by calculating hotel utilization.
         """
-        df = df.copy()
-        
         # Get total rooms per hotel
         hotels = db.query(Hotel.id, Hotel.total_rooms).all()
         hotel_rooms = {h.id: h.total_rooms for h in hotels}
         
         df['hotel_total_rooms'] = df['hotel_id'].map(hotel_rooms)
         
-        # Calculate daily occupancy rate
-        daily_bookings = df.groupby(['hotel_id', 'check_in_date']).size().reset_index(name='rooms_booked')
-        daily_bookings['total_rooms'] = daily_bookings['hotel_id'].map(hotel_rooms)
-        daily_bookings['occupancy_rate'] = (daily_bookings['rooms_booked'] / daily_bookings['total_rooms'] * 100).round(2)
-        
-        # Merge back
-        df = df.merge(
-            daily_bookings[['hotel_id', 'check_in_date', 'occupancy_rate']],
-            on=['hotel_id', 'check_in_date'],
-            how='left'
-        )
+        # Calculate daily occupancy rate (rooms booked per hotel and check-in day),
+        # broadcast back with transform instead of merging a second frame
+        rooms_booked = df.groupby(['hotel_id', 'check_in_date'], observed=True)['hotel_id'].transform('size')
+        df['occupancy_rate'] = (rooms_booked / df['hotel_total_rooms'] * 100).round(2).astype('float32')
         
         return df
     
@@ -199,4 +226,18 @@ class FeatureEngineer:
             "total_features": len(df.columns),
             "feature_groups": {k: len(v) for k, v in feature_groups.items()},
             "feature_list": feature_groups
-        }
\ No newline at end of file
+        }
+
+
+def _small_int(values: pd.Series, dtype: str) -> pd.Series:
+    # Compact int dtype; its nullable variant (Int8/Int16/Int32) when NaT dates left gaps
+    if values.isna().any():
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def _unsort(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    # Inverse of values = original[order]
+    out = np.empty_like(values)
+    out[order] = values
+    return out
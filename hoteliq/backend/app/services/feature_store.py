@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.hotel import Booking
+from app.services.data_validator import BookingDataValidator
+from app.services.etl_pipeline import ETLPipeline
+from app.services.feature_engineering import FeatureEngineer, ROLLING_WINDOWS_DAYS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; only the in-process lock applies there
+    fcntl = None
+
+# Bump when the feature columns or their meaning change; each version has its own directory
+FEATURE_SCHEMA_VERSION = 2
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "data/feature_store")
+
+PARTITION_COLUMNS = ["hotel_id", "check_in_month"]
+
+# One lock per store directory for threads of this process; fcntl covers other processes
+_THREAD_LOCKS: Dict[str, threading.Lock] = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+
+class FeatureStore:
+    """
+    Persists engineered booking features as Parquet, partitioned by hotel_id and
+    check-in month (hive layout: v2/hotel_id=1/check_in_month=2025-11/part-*.parquet).
+
+    sync() appends features for bookings added since the last sync only; the
+    watermark is the highest booking id stored, kept in _manifest.json.
+    Features are computed as of the append (rolling windows see the bookings
+    that existed then); rebuild() recomputes everything.
+
+    sync() and rebuild() hold a lock on the store directory, so concurrent
+    callers (jobs, ETL runs, other workers) never append the same bookings
+    twice; read() also drops repeated booking ids.
+
+    Limitation: a booking is stored once, when it first passes the watermark.
+    Later cancellations or status changes, and the rolling features of its
+    neighbours, are not updated until the next rebuild().
+    """
+
+    def __init__(self, db: Session, root: str = FEATURE_STORE_DIR):
+        if pa is None:
+            raise RuntimeError("The feature store requires pyarrow (pip install pyarrow)")
+        self.db = db
+        self.path = os.path.join(root, f"v{FEATURE_SCHEMA_VERSION}")
+        self.manifest_path = os.path.join(self.path, "_manifest.json")
+        self.lock_path = os.path.join(root, f"v{FEATURE_SCHEMA_VERSION}.lock")
+
+    @contextmanager
+    def _locked(self):
+        # Serializes read-manifest / write / save-manifest across threads and processes
+        with _THREAD_LOCKS_GUARD:
+            thread_lock = _THREAD_LOCKS.setdefault(os.path.abspath(self.lock_path), threading.Lock())
+        with thread_lock:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {"schema_version": FEATURE_SCHEMA_VERSION, "last_booking_id": 0, "rows": 0}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def sync(self) -> Dict:
+        """
+        Append features for bookings newer than the watermark.
+        """
+        with self._locked():
+            return self._sync()
+
+    def _sync(self) -> Dict:
+        manifest = self.manifest()
+        last_booking_id = manifest["last_booking_id"]
+
+        latest = self.db.query(func.max(Booking.id)).scalar() or 0
+        if latest <= last_booking_id:
+            return {"appended": 0, **manifest}
+
+        pipeline = ETLPipeline(self.db)
+        new = pipeline.extract_from_database(
+            min_booking_id=last_booking_id + 1,
+            max_booking_id=latest,
+            columns=['booking_id', 'hotel_id', 'check_in_date']
+        )
+
+        # Rolling features need the preceding window of each hotel's bookings as context
+        lookback_start = pd.to_datetime(new['check_in_date']).min() - timedelta(days=max(ROLLING_WINDOWS_DAYS))
+        context = pipeline.extract_from_database(
+            hotel_ids=[int(h) for h in new['hotel_id'].unique()],
+            start_date=lookback_start.date(),
+            max_booking_id=latest
+        )
+
+        featured = self._build_features(context)
+        featured = featured[featured['booking_id'].isin(new['booking_id'])]
+        self._write(featured)
+
+        manifest.update({
+            "schema_version": FEATURE_SCHEMA_VERSION,
+            "last_booking_id": int(latest),
+            "rows": manifest["rows"] + len(featured),
+            "updated_at": datetime.utcnow().isoformat()
+        })
+        self._save_manifest(manifest)
+        print(f" Feature store: appended {len(featured)} rows (watermark booking_id={latest})")
+        return {"appended": len(featured), **manifest}
+
+    def rebuild(self) -> Dict:
+        """
+        Drop the current version's files and recompute features for all bookings.
+        """
+        with self._locked():
+            if os.path.exists(self.path):
+                import shutil
+                shutil.rmtree(self.path)
+            return self._sync()
+
+    def read(
+        self,
+        columns: Optional[List[str]] = None,
+        hotel_id: Optional[int] = None,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Read features, loading only the requested columns and partitions.
+        Months are 'YYYY-MM' strings. Each booking_id is returned once.
+        """
+        dataset = self._dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns or [])
+
+        expression = None
+        for condition in [
+            ds.field("hotel_id") == hotel_id if hotel_id is not None else None,
+            ds.field("check_in_month") >= start_month if start_month else None,
+            ds.field("check_in_month") <= end_month if end_month else None,
+        ]:
+            if condition is not None:
+                expression = condition if expression is None else expression & condition
+
+        # booking_id is needed to drop rows appended twice (stores written before sync was locked)
+        read_columns = columns
+        if columns is not None and 'booking_id' not in columns:
+            read_columns = list(columns) + ['booking_id']
+
+        if limit is not None:
+            table = dataset.head(limit, columns=read_columns, filter=expression)
+        else:
+            table = dataset.to_table(columns=read_columns, filter=expression)
+        df = table.to_pandas().drop_duplicates(subset='booking_id', keep='last', ignore_index=True)
+        return df[columns] if columns is not None else df
+
+    def columns(self) -> List[str]:
+        dataset = self._dataset()
+        return dataset.schema.names if dataset is not None else []
+
+    def _dataset(self):
+        if not os.path.exists(self.path) or not any(
+            name.startswith("hotel_id=") for name in os.listdir(self.path)
+        ):
+            return None
+        return ds.dataset(self.path, format="parquet", partitioning="hive")
+
+    def _build_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        df_clean = BookingDataValidator.clean_dataframe(df)
+        featured = FeatureEngineer.create_all_features(df_clean, self.db)
+        featured['check_in_month'] = featured['check_in_date'].dt.strftime('%Y-%m')
+        return featured
+
+    def _write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # Later appends must match the schema of the files already written
+        existing = self._dataset()
+        if existing is not None:
+            table = table.select(existing.schema.names).cast(existing.schema)
+
+        # pyarrow refuses more than 1024 partitions per write by default (hotels x months exceeds that)
+        partitions = len(df[PARTITION_COLUMNS].drop_duplicates())
+        pq.write_to_dataset(
+            table,
+            root_path=self.path,
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            max_partitions=max(partitions, 1024)
+        )
@@ -0,0 +1,575 @@
+"""
+Demand forecasting: one model per hotel, and optionally per hotel and room
+type, over the daily occupancy rate and revenue series.
+
+Hotel series come from daily_metrics; room-type series are derived from the
+bookings of that room type with MetricsCalculator.build_metrics_frame.
+Models are fitted in a process pool and pickled under FORECAST_MODEL_DIR
+together with the data version they were fitted on (a digest of the series
+aggregates), plus a precomputed forecast for the next
+FORECAST_PRECOMPUTE_DAYS days. A forecast request only computes the data
+version and is served from the precomputed forecast or the stored model;
+when the version changed it submits a train_forecasts job and keeps serving
+the stored model meanwhile. Only a target without any model is fitted inline.
+
+Engines (FORECAST_ENGINE):
+  - prophet: Prophet, if the optional `prophet` package is installed
+  - seasonal: damped linear trend + day-of-week and month-of-year effects (numpy)
+  - auto (default): prophet when available, else seasonal
+"""
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.hotel import Booking, BookingRollup, DailyMetrics, Hotel, Room
+from app.utils.metrics_calculator import OCCUPYING_STATUSES
+
+FORECAST_MODEL_DIR = os.getenv("FORECAST_MODEL_DIR", "data/models/forecasting")
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "auto")
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "730"))
+FORECAST_PRECOMPUTE_DAYS = int(os.getenv("FORECAST_PRECOMPUTE_DAYS", "90"))
+# Seasonal fits take milliseconds, so smaller batches are fitted inline rather
+# than paying for worker start-up; Prophet fits always use the pool
+FORECAST_POOL_MIN_TARGETS = int(os.getenv("FORECAST_POOL_MIN_TARGETS", "32"))
+# A request that finds an outdated model submits at most one refit job per target this often
+FORECAST_REFRESH_INTERVAL_SECONDS = float(os.getenv("FORECAST_REFRESH_INTERVAL_SECONDS", "60"))
+
+# Bump when the bundle layout or the model classes change; older files are refitted
+MODEL_FORMAT_VERSION = 1
+
+# Shortest history a model is fitted on
+MIN_HISTORY_DAYS = 14
+
+# Forecast series and the range their predictions are clipped to
+SERIES_BOUNDS = {"occupancy": (0.0, 100.0), "revenue": (0.0, None)}
+
+# date.toordinal() of 1970-01-01, to turn ordinals into datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _months(ordinals):
+    return (ordinals - EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype("int64") % 12
+
+
+class _BoundedModel:
+
+    #Shared clipping of predictions to a series' valid range
+
+
+    def __init__(self, bounds: Tuple[Optional[float], Optional[float]] = (None, None)):
+        self.bounds = bounds
+
+    def _clip(self, values):
+        import numpy as np
+        low, high = self.bounds
+        return np.clip(values, low, high) if low is not None or high is not None else values
+
+
+class SeasonalTrendModel(_BoundedModel):
+    """
+    Damped linear trend fitted on the last `trend_window` days, plus
+    day-of-week and (with a year of history) month-of-year effects.
+    """
+
+    def __init__(self, bounds=(None, None), trend_window: int = 90, damping: float = 0.98):
+        super().__init__(bounds)
+        self.trend_window = trend_window
+        self.damping = damping
+
+    def fit(self, ordinals, values) -> "SeasonalTrendModel":
+        import numpy as np
+        o = np.asarray(ordinals, dtype=np.int64)
+        y = np.asarray(values, dtype=np.float64)
+        dow = (o - 1) % 7
+        t = (o - o[0]).astype(np.float64)
+
+        # Seasonal effects are measured on the residuals of a whole-history trend
+        slope, intercept = np.polyfit(t, y, 1) if len(y) > 1 else (0.0, float(y.mean()))
+        residual = y - (intercept + slope * t)
+        counts = np.bincount(dow, minlength=7)
+        self.weekly = np.divide(np.bincount(dow, residual, 7), counts,
+                                out=np.zeros(7), where=counts > 0)
+        residual -= self.weekly[dow]
+
+        self.monthly = np.zeros(12)
+        if o[-1] - o[0] >= 365:
+            month = _months(o)
+            counts = np.bincount(month, minlength=12)
+            self.monthly = np.divide(np.bincount(month, residual, 12), counts,
+                                     out=np.zeros(12), where=counts > 0)
+
+        # Level and slope of the recent deseasonalized series
+        adjusted = y - self.weekly[dow] - self.monthly[_months(o)]
+        recent = o > o[-1] - self.trend_window
+        h = (o[recent] - o[-1]).astype(np.float64)
+        if recent.sum() > 1:
+            self.slope, self.level = np.polyfit(h, adjusted[recent], 1)
+        else:
+            self.slope, self.level = 0.0, float(adjusted[recent].mean())
+        self.sigma = float(np.std(adjusted[recent] - (self.level + self.slope * h)))
+        self.origin = int(o[-1])
+        return self
+
+    def predict(self, ordinals):
+        """(yhat, lower, upper) arrays for the given day ordinals."""
+        import numpy as np
+        o = np.asarray(ordinals, dtype=np.int64)
+        h = np.maximum(o - self.origin, 0).astype(np.float64)
+        phi = self.damping
+        trend = self.slope * (phi * (1 - phi ** h) / (1 - phi) if phi < 1 else h)
+        yhat = self.level + trend + self.weekly[(o - 1) % 7] + self.monthly[_months(o)]
+        band = 1.96 * self.sigma
+        return self._clip(yhat), self._clip(yhat - band), self._clip(yhat + band)
+
+
+class ProphetModel(_BoundedModel):
+
+    #Prophet with weekly (and, given a year of data, yearly) seasonality
+
+
+    def fit(self, ordinals, values) -> "ProphetModel":
+        import numpy as np
+        import pandas as pd
+        from prophet import Prophet
+        o = np.asarray(ordinals, dtype=np.int64)
+        self.model = Prophet(
+            interval_width=0.95,
+            weekly_seasonality=True,
+            yearly_seasonality=bool(o[-1] - o[0] >= 365),
+            daily_seasonality=False
+        )
+        self.model.fit(pd.DataFrame({"ds": (o - EPOCH_ORDINAL).astype("datetime64[D]"), "y": values}))
+        return self
+
+    def predict(self, ordinals):
+        import numpy as np
+        import pandas as pd
+        o = np.asarray(ordinals, dtype=np.int64)
+        frame = self.model.predict(pd.DataFrame({"ds": (o - EPOCH_ORDINAL).astype("datetime64[D]")}))
+        return (self._clip(frame["yhat"].to_numpy()),
+                self._clip(frame["yhat_lower"].to_numpy()),
+                self._clip(frame["yhat_upper"].to_numpy()))
+
+
+def resolve_engine(engine: str = FORECAST_ENGINE) -> str:
+    """The engine actually used for a FORECAST_ENGINE setting."""
+    if engine not in ("auto", "prophet", "seasonal"):
+        raise ValueError(f"Unknown forecast engine '{engine}'")
+    if engine == "seasonal":
+        return engine
+    try:
+        import prophet  # noqa: F401
+        return "prophet"
+    except ImportError:
+        if engine == "prophet":
+            raise RuntimeError("FORECAST_ENGINE=prophet requires the 'prophet' package")
+        return "seasonal"
+
+
+def new_model(engine: str, bounds):
+    return ProphetModel(bounds) if engine == "prophet" else SeasonalTrendModel(bounds)
+
+
+def fit_bundle(payload: Dict) -> Dict:
+    """
+    Fit the occupancy and revenue models of one target and precompute its forecast.
+    Top-level so it can run in a worker process.
+    """
+    import numpy as np
+    started = time.perf_counter()
+    ordinals = payload["ordinals"]
+    models = {
+        series: new_model(payload["engine"], bounds).fit(ordinals, payload[series])
+        for series, bounds in SERIES_BOUNDS.items()
+    }
+    days = np.arange(payload["forecast_start"], payload["forecast_start"] + payload["precompute_days"])
+    return {
+        "format": MODEL_FORMAT_VERSION,
+        "hotel_id": payload["hotel_id"],
+        "room_type": payload["room_type"],
+        "version": payload["version"],
+        "engine": payload["engine"],
+        "trained_at": datetime.utcnow().isoformat(),
+        "fit_seconds": round(time.perf_counter() - started, 4),
+        "history_start": date.fromordinal(int(ordinals[0])).isoformat(),
+        "history_end": date.fromordinal(int(ordinals[-1])).isoformat(),
+        "history_days": int(len(ordinals)),
+        "models": models,
+        "forecast_start": int(payload["forecast_start"]),
+        "forecast": {series: model.predict(days) for series, model in models.items()},
+    }
+
+
+class ForecastEngine:
+
+    #Trains, stores and serves the per-hotel (and per room type) forecast models
+
+
+    # path -> (mtime, bundle), shared by all engines of this process
+    _loaded: Dict[str, Tuple[float, Dict]] = {}
+    _loaded_lock = threading.Lock()
+    # one lock per target, so concurrent requests do not fit the same first model twice
+    _fit_locks: Dict[Tuple, threading.Lock] = {}
+    # target -> time.monotonic() of its last background refit request
+    _refresh_requested: Dict[Tuple, float] = {}
+
+    def __init__(self, db: Session, model_dir: Optional[str] = None, engine: str = FORECAST_ENGINE):
+        self.db = db
+        self.model_dir = os.path.join(model_dir or FORECAST_MODEL_DIR, f"v{MODEL_FORMAT_VERSION}")
+        self.engine = resolve_engine(engine)
+
+    # ---- data -----------------------------------------------------------
+
+    def targets(self, hotel_ids: Optional[List[int]] = None, room_types: bool = False) -> List[Tuple]:
+        """(hotel_id, room_type) pairs to model; room_type None is the whole hotel."""
+        query = select(Hotel.id).order_by(Hotel.id)
+        if hotel_ids:
+            query = query.where(Hotel.id.in_(hotel_ids))
+        hotels = list(self.db.execute(query).scalars())
+        targets = [(hotel_id, None) for hotel_id in hotels]
+        if room_types and hotels:
+            targets += [
+                tuple(row) for row in self.db.execute(
+                    select(Room.hotel_id, Room.room_type).where(Room.hotel_id.in_(hotels))
+                    .distinct().order_by(Room.hotel_id, Room.room_type)
+                )
+            ]
+        return targets
+
+    def data_version(self, hotel_id: int, room_type: Optional[str] = None) -> Optional[str]:
+        """
+        Digest of the aggregates of a target's series (None if it has no data).
+        It changes whenever the underlying metrics or bookings change.
+        """
+        if room_type is None:
+            row = self.db.execute(
+                select(
+                    func.count(DailyMetrics.id), func.min(DailyMetrics.date), func.max(DailyMetrics.date),
+                    func.sum(DailyMetrics.rooms_occupied), func.sum(DailyMetrics.rooms_available),
+                    func.sum(DailyMetrics.total_revenue)
+                ).where(DailyMetrics.hotel_id == hotel_id)
+            ).one()
+        else:
+            rooms = self.db.execute(
+                select(func.count(Room.id)).where(Room.hotel_id == hotel_id, Room.room_type == room_type)
+            ).scalar()
+            row = self.db.execute(
+                select(
+                    func.count(BookingRollup.id), func.min(BookingRollup.date), func.max(BookingRollup.date),
+                    func.sum(BookingRollup.booking_count), func.sum(BookingRollup.room_nights),
+                    func.sum(BookingRollup.revenue)
+                ).where(
+                    BookingRollup.hotel_id == hotel_id,
+                    BookingRollup.room_type == room_type,
+                    BookingRollup.status.in_(OCCUPYING_STATUSES)
+                )
+            ).one()
+            row = tuple(row) + (rooms,)
+        if not row[0]:
+            return None
+        parts = [self.engine, MODEL_FORMAT_VERSION, FORECAST_HISTORY_DAYS] + [
+            round(v, 2) if isinstance(v, float) else v for v in row
+        ]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def load_series(
+        self,
+        hotel_id: int,
+        room_type: Optional[str] = None,
+        history_days: Optional[int] = FORECAST_HISTORY_DAYS
+    ):
+        """
+        (ordinals, occupancy, revenue) arrays of the last `history_days` days of data
+        (the whole daily_metrics history of a hotel with history_days=None).
+        """
+        import numpy as np
+
+        if room_type is None:
+            last = self.db.execute(
+                select(func.max(DailyMetrics.date)).where(DailyMetrics.hotel_id == hotel_id)
+            ).scalar()
+            if last is None:
+                raise ValueError(f"No daily metrics for hotel {hotel_id}")
+            query = select(DailyMetrics.date, DailyMetrics.occupancy_rate, DailyMetrics.total_revenue).where(
+                DailyMetrics.hotel_id == hotel_id
+            )
+            if history_days is not None:
+                query = query.where(DailyMetrics.date > last - timedelta(days=history_days))
+            rows = self.db.execute(query.order_by(DailyMetrics.date)).all()
+            ordinals = np.array([r[0].toordinal() for r in rows], dtype=np.int64)
+            occupancy = np.array([r[1] or 0.0 for r in rows], dtype=np.float64)
+            revenue = np.array([r[2] or 0.0 for r in rows], dtype=np.float64)
+            return ordinals, occupancy, revenue
+
+        return self._room_type_series(hotel_id, room_type, history_days or FORECAST_HISTORY_DAYS)
+
+    def _room_type_series(self, hotel_id: int, room_type: str, history_days: int):
+        import numpy as np
+        import pandas as pd
+        from app.utils.metrics_calculator import MetricsCalculator
+
+        rooms = self.db.execute(
+            select(func.count(Room.id)).where(Room.hotel_id == hotel_id, Room.room_type == room_type)
+        ).scalar()
+        last = self.db.execute(
+            select(func.max(BookingRollup.date)).where(
+                BookingRollup.hotel_id == hotel_id, BookingRollup.room_type == room_type
+            )
+        ).scalar()
+        if not rooms or last is None:
+            raise ValueError(f"No bookings for room type '{room_type}' in hotel {hotel_id}")
+        start = last - timedelta(days=history_days - 1)
+
+        bookings = pd.DataFrame(
+            self.db.execute(
+                select(Booking.hotel_id, Booking.check_in_date, Booking.check_out_date,
+                       Booking.booking_price, Booking.status)
+                .join(Room, Room.id == Booking.room_id)
+                .where(
+                    Booking.hotel_id == hotel_id,
+                    Room.room_type == room_type,
+                    Booking.check_in_date <= last,
+                    Booking.check_out_date >= start
+                )
+            ).all(),
+            columns=['hotel_id', 'check_in_date', 'check_out_date', 'booking_price', 'status']
+        )
+        frame = MetricsCalculator.build_metrics_frame(bookings, {hotel_id: rooms}, start, last)
+        ordinals = (frame['date'].to_numpy().astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL)
+        return (ordinals, frame['occupancy_rate'].to_numpy(dtype=np.float64),
+                frame['total_revenue'].to_numpy(dtype=np.float64))
+
+    def _payload(self, hotel_id: int, room_type: Optional[str], version: str) -> Dict:
+        ordinals, occupancy, revenue = self.load_series(hotel_id, room_type)
+        if len(ordinals) < MIN_HISTORY_DAYS:
+            raise ValueError(
+                f"Hotel {hotel_id}{f' {room_type}' if room_type else ''} has {len(ordinals)} days "
+                f"of history, at least {MIN_HISTORY_DAYS} are needed"
+            )
+        return {
+            "hotel_id": hotel_id,
+            "room_type": room_type,
+            "version": version,
+            "engine": self.engine,
+            "ordinals": ordinals,
+            "occupancy": occupancy,
+            "revenue": revenue,
+            "forecast_start": date.today().toordinal(),
+            "precompute_days": FORECAST_PRECOMPUTE_DAYS,
+        }
+
+    # ---- model store ----------------------------------------------------
+
+    def model_path(self, hotel_id: int, room_type: Optional[str] = None) -> str:
+        suffix = re.sub(r"[^A-Za-z0-9]+", "_", room_type).strip("_").lower() if room_type else "all"
+        return os.path.join(self.model_dir, f"hotel_{hotel_id}__{suffix}.pkl")
+
+    def save(self, bundle: Dict) -> str:
+        path = self.model_path(bundle["hotel_id"], bundle["room_type"])
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        with self._loaded_lock:
+            self._loaded[path] = (os.path.getmtime(path), bundle)
+        return path
+
+    def load(self, hotel_id: int, room_type: Optional[str] = None) -> Optional[Dict]:
+        """Stored bundle of a target, unpickled once per file version."""
+        path = self.model_path(hotel_id, room_type)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._loaded_lock:
+            cached = self._loaded.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "rb") as f:
+            bundle = pickle.load(f)
+        with self._loaded_lock:
+            self._loaded[path] = (mtime, bundle)
+        return bundle
+
+    def list_models(self) -> List[Dict]:
+        if not os.path.isdir(self.model_dir):
+            return []
+        models = []
+        for name in sorted(os.listdir(self.model_dir)):
+            match = re.match(r"hotel_(\d+)__", name)
+            if not match or not name.endswith(".pkl"):
+                continue
+            with open(os.path.join(self.model_dir, name), "rb") as f:
+                bundle = pickle.load(f)
+            models.append({k: v for k, v in bundle.items() if k not in ("models", "forecast")})
+        return models
+
+    # ---- training -------------------------------------------------------
+
+    def train(
+        self,
+        hotel_ids: Optional[List[int]] = None,
+        room_types: bool = False,
+        force: bool = False,
+        max_workers: int = FORECAST_WORKERS,
+        progress_callback: Optional[Callable[[float, str], None]] = None
+    ) -> Dict:
+        """
+        Fit every target whose data version changed (all of them with force=True),
+        across a process pool. Returns counts of trained, unchanged and failed targets.
+        """
+        started = time.perf_counter()
+        targets = self.targets(hotel_ids, room_types)
+        payloads, unchanged, failed = [], 0, []
+
+        for hotel_id, room_type in targets:
+            version = self.data_version(hotel_id, room_type)
+            if version is None:
+                failed.append({"hotel_id": hotel_id, "room_type": room_type, "error": "no data"})
+                continue
+            stored = self.load(hotel_id, room_type)
+            if not force and stored is not None and stored["version"] == version:
+                unchanged += 1
+                continue
+            try:
+                payloads.append(self._payload(hotel_id, room_type, version))
+            except ValueError as e:
+                failed.append({"hotel_id": hotel_id, "room_type": room_type, "error": str(e)})
+
+        trained = 0
+
+        def collect(bundle):
+            nonlocal trained
+            self.save(bundle)
+            trained += 1
+            if progress_callback:
+                progress_callback(trained / len(payloads), f"Trained {trained}/{len(payloads)} models")
+
+        use_pool = max_workers > 1 and len(payloads) > 1 and (
+            self.engine == "prophet" or len(payloads) >= FORECAST_POOL_MIN_TARGETS
+        )
+        if use_pool:
+            # spawn: the API process has threads (job runner, server), which fork does not handle
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(payloads)),
+                                     mp_context=get_context("spawn")) as pool:
+                futures = {pool.submit(fit_bundle, p): p for p in payloads}
+                for future in as_completed(futures):
+                    payload = futures[future]
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        failed.append({"hotel_id": payload["hotel_id"], "room_type": payload["room_type"],
+                                       "error": str(e)})
+        else:
+            for payload in payloads:
+                try:
+                    collect(fit_bundle(payload))
+                except Exception as e:
+                    failed.append({"hotel_id": payload["hotel_id"], "room_type": payload["room_type"],
+                                   "error": str(e)})
+
+        return {
+            "engine": self.engine,
+            "targets": len(targets),
+            "trained": trained,
+            "unchanged": unchanged,
+            "failed": failed,
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+
+    # ---- serving --------------------------------------------------------
+
+    def get_model(self, hotel_id: int, room_type: Optional[str] = None) -> Dict:
+        """
+        The target's stored bundle. If its data version changed, the bundle is
+        still served (with the version and history_end it was fitted on) and a
+        train_forecasts job refits it; only a target without a bundle is fitted here.
+        """
+        version = self.data_version(hotel_id, room_type)
+        if version is None:
+            raise ValueError(
+                f"No data to forecast hotel {hotel_id}{f' room type {room_type}' if room_type else ''}"
+            )
+        bundle = self.load(hotel_id, room_type)
+        if bundle is not None:
+            if bundle["version"] != version:
+                self._request_refresh(hotel_id, room_type)
+            return bundle
+
+        key = (self.model_dir, hotel_id, room_type)
+        with self._loaded_lock:
+            lock = self._fit_locks.setdefault(key, threading.Lock())
+        with lock:
+            bundle = self.load(hotel_id, room_type)
+            if bundle is None:
+                bundle = fit_bundle(self._payload(hotel_id, room_type, version))
+                self.save(bundle)
+        return bundle
+
+    def _request_refresh(self, hotel_id: int, room_type: Optional[str]):
+        # Refit an outdated model in the background, at most once per interval per target
+        key = (self.model_dir, hotel_id, room_type)
+        now = time.monotonic()
+        with self._loaded_lock:
+            last = self._refresh_requested.get(key)
+            if last is not None and now - last < FORECAST_REFRESH_INTERVAL_SECONDS:
+                return
+            self._refresh_requested[key] = now
+        try:
+            self._submit_refresh(hotel_id, room_type)
+        except Exception as e:
+            # The stored model is still served; the next request after the interval retries
+            print(f"  Could not queue forecast refit for hotel {hotel_id}: {str(e)}")
+
+    def _submit_refresh(self, hotel_id: int, room_type: Optional[str]):
+        from app.services.job_runner import job_runner
+        job_runner.submit("train_forecasts", hotel_ids=[hotel_id], room_types=room_type is not None)
+
+    def forecast(
+        self,
+        hotel_id: int,
+        days: int = 30,
+        room_type: Optional[str] = None,
+        start_date: Optional[date] = None,
+        bundle: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Daily occupancy and revenue forecast for `days` days from start_date (default today),
+        sliced from the precomputed forecast when it covers the range. `bundle`
+        defaults to get_model(hotel_id, room_type).
+        """
+        import numpy as np
+        bundle = bundle or self.get_model(hotel_id, room_type)
+        start = (start_date or date.today()).toordinal()
+        offset = start - bundle["forecast_start"]
+
+        if offset >= 0 and offset + days <= len(bundle["forecast"]["occupancy"][0]):
+            occupancy = [a[offset:offset + days] for a in bundle["forecast"]["occupancy"]]
+            revenue = bundle["forecast"]["revenue"][0][offset:offset + days]
+        else:
+            ordinals = np.arange(start, start + days)
+            occupancy = bundle["models"]["occupancy"].predict(ordinals)
+            revenue = bundle["models"]["revenue"].predict(ordinals)[0]
+
+        return [
+            {
+                "date": date.fromordinal(start + i),
+                "predicted_occupancy": round(float(occupancy[0][i]), 2),
+                "predicted_revenue": round(float(revenue[i]), 2),
+                "confidence_interval_lower": round(float(occupancy[1][i]), 2),
+                "confidence_interval_upper": round(float(occupancy[2][i]), 2),
+            }
+            for i in range(days)
+        ]
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.database.connection import ReadSessionLocal, SessionLocal
+from app.models.job import Job
+
+# Size of the worker pool shared by all job types
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+FINISHED_STATUSES = ["succeeded", "failed", "cancelled"]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class JobContext:
+    """
+    Handed to a running job so it can report progress.
+    Every progress report also checks whether the job was cancelled.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def report_progress(self, fraction: float, message: Optional[str] = None):
+        with SessionLocal() as db:
+            job = db.get(Job, self.job_id)
+            job.progress = round(min(max(fraction, 0.0), 1.0), 4)
+            if message:
+                job.message = message[:500]
+            db.commit()
+            if job.cancel_requested:
+                raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def check_cancelled(self):
+        with SessionLocal() as db:
+            if db.get(Job, self.job_id).cancel_requested:
+                raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+# Job handlers: (db, ctx, **params) -> JSON-serialisable result.
+# Heavy modules are imported inside the handlers.
+
+def _run_csv_ingest(db: Session, ctx: JobContext, file_path: str, chunksize: int) -> Dict:
+    from app.services.etl_pipeline import ETLPipeline
+
+    def on_chunk(progress: Dict):
+        ctx.report_progress(
+            progress["fraction"],
+            f"Chunk {progress['chunk']}: {progress['rows_processed']} rows processed, "
+            f"{progress['rows_loaded']} loaded"
+        )
+
+    pipeline = ETLPipeline(db)
+    return pipeline.run_full_pipeline(
+        source='csv', file_path=file_path, chunksize=chunksize, progress_callback=on_chunk
+    )
+
+
+def _run_process_existing(db: Session, ctx: JobContext, hotel_id: int = None, start_date: str = None) -> Dict:
+    from app.services.etl_pipeline import ETLPipeline
+
+    # Cancellable after extraction and after validation; once loading starts the run completes
+    def on_stage(progress: Dict):
+        ctx.report_progress(progress["fraction"], progress["stage"])
+
+    # Extraction reads from the replica (if any); results are written through db
+    with ReadSessionLocal() as read_db:
+        pipeline = ETLPipeline(db, read_db=read_db)
+        return pipeline.run_full_pipeline(
+            source='database', hotel_id=hotel_id, start_date=start_date, progress_callback=on_stage
+        )
+
+
+def _run_recalculate_metrics(db: Session, ctx: JobContext) -> Dict:
+    from app.utils.metrics_calculator import MetricsCalculator
+
+    # Not cancellable once running: the recompute is one read and one replacing
+    # transaction, so a cancel request only takes effect while the job is queued
+    return MetricsCalculator.recalculate_all_metrics(db)
+
+
+def _run_sync_feature_store(db: Session, ctx: JobContext, rebuild: bool = False) -> Dict:
+    from app.services.feature_store import FeatureStore
+
+    store = FeatureStore(db)
+    return store.rebuild() if rebuild else store.sync()
+
+
+def _run_train_forecasts(
+    db: Session,
+    ctx: JobContext,
+    hotel_ids: List[int] = None,
+    room_types: bool = False,
+    force: bool = False
+) -> Dict:
+    from app.services.forecasting import ForecastEngine
+
+    with ReadSessionLocal() as read_db:
+        engine = ForecastEngine(read_db)
+        return engine.train(
+            hotel_ids=hotel_ids, room_types=room_types, force=force, progress_callback=ctx.report_progress
+        )
+
+
+def _run_backtest_forecasts(
+    db: Session,
+    ctx: JobContext,
+    hotel_ids: List[int] = None,
+    horizons: List[int] = None,
+    folds: int = None,
+    step: int = None
+) -> Dict:
+    from app.services import backtesting
+
+    with ReadSessionLocal() as read_db:
+        report = backtesting.Backtester(read_db).run(
+            hotel_ids=hotel_ids,
+            horizons=horizons or backtesting.DEFAULT_HORIZONS,
+            folds=folds or backtesting.DEFAULT_FOLDS,
+            step=step or backtesting.DEFAULT_STEP_DAYS,
+            progress_callback=ctx.report_progress
+        )
+    # The full per-hotel report stays on disk; the job keeps the summary
+    return {k: report[k] for k in ("report_id", "engine", "params", "summary", "fits", "skipped",
+                                   "duration_seconds")}
+
+
+JOB_HANDLERS: Dict[str, Callable] = {
+    "csv_ingest": _run_csv_ingest,
+    "process_existing": _run_process_existing,
+    "recalculate_metrics": _run_recalculate_metrics,
+    "sync_feature_store": _run_sync_feature_store,
+    "train_forecasts": _run_train_forecasts,
+    "backtest_forecasts": _run_backtest_forecasts,
+}
+
+
+class JobRunner:
+    """
+    Runs jobs on a bounded thread pool and tracks them in the jobs table.
+
+    Each job gets its own Session, so jobs never share the request-scoped
+    session of the endpoint that submitted them. Jobs live in the process
+    that submitted them: a restart loses them, and fail_interrupted() (run
+    by the bootstrap stage) marks the ones left queued or running as failed.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hoteliq-job"
+                )
+            return self._executor
+
+    def submit(self, job_type: str, **params) -> Job:
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type '{job_type}'")
+
+        with SessionLocal() as db:
+            job = Job(id=str(uuid.uuid4()), job_type=job_type, status="queued", params=params)
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            db.expunge(job)
+
+        future = self.executor.submit(self._run, job.id)
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._forget(job.id))
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job. Queued jobs are cancelled at once; running jobs stop
+        at their next progress report. Jobs without one after they start
+        (recalculate_metrics) run to completion.
+        """
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            if job is None:
+                return None
+            if job.status not in FINISHED_STATUSES:
+                job.cancel_requested = True
+                with self._lock:
+                    future = self._futures.get(job_id)
+                if job.status == "queued" and future is not None and future.cancel():
+                    job.status = "cancelled"
+                    job.finished_at = datetime.utcnow()
+                db.commit()
+            db.refresh(job)
+            db.expunge(job)
+            return job
+
+    @staticmethod
+    def fail_interrupted() -> int:
+        """
+        Mark jobs still queued or running as failed. Call it before any worker
+        process starts, when no job can actually be running. Returns the count.
+        """
+        with SessionLocal() as db:
+            interrupted = db.query(Job).filter(Job.status.notin_(FINISHED_STATUSES)).update(
+                {Job.status: "failed", Job.error: "interrupted", Job.finished_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+        return interrupted
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _set_status(self, job_id: str, **fields):
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            for key, value in fields.items():
+                setattr(job, key, value)
+            db.commit()
+
+    def _run(self, job_id: str):
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+                return
+            job_type, params = job.job_type, dict(job.params or {})
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            db.commit()
+
+        ctx = JobContext(job_id)
+        db = SessionLocal()
+        try:
+            result = JOB_HANDLERS[job_type](db, ctx, **params)
+            self._set_status(
+                job_id,
+                status="succeeded",
+                progress=1.0,
+                result=json.loads(json.dumps(result, default=str)),
+                finished_at=datetime.utcnow()
+            )
+        except JobCancelled as e:
+            db.rollback()
+            self._set_status(job_id, status="cancelled", message=str(e), finished_at=datetime.utcnow())
+        except Exception as e:
+            db.rollback()
+            traceback.print_exc()
+            self._set_status(job_id, status="failed", error=str(e)[:2000], finished_at=datetime.utcnow())
+        finally:
+            db.close()
+
+
+job_runner = JobRunner()
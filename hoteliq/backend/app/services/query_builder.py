@@ -1,12 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import case, func, and_, or_, literal_column
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional
-from app.models.hotel import Booking, Hotel, Room, DailyMetrics
+import os
+from app.models.hotel import Booking, BookingRollup, Hotel, Room, DailyMetrics
+from app.utils.sql_expressions import day_of_week
+
+# Answer breakdown queries from the booking_rollups table instead of raw bookings
+USE_ROLLUPS = os.getenv("SMART_QUERIES_USE_ROLLUPS", "true").lower() == "true"
 
 class QueryBuilder:
-    def __init__(self, db:Session):
+    def __init__(self, db:Session, use_rollups: bool = USE_ROLLUPS):
         self.db = db
+        self.use_rollups = use_rollups
 
     def get_total_revenue(
             self, 
@@ -103,14 +109,24 @@ class QueryBuilder:
     
     def get_booking_source_distribution(self, hotel_id: Optional[int] = None) -> Dict:
         """Where do bookings come from?"""
-        query = self.db.query(
-            Booking.booking_source,
-            func.count(Booking.id).label('count'),
-            func.sum(Booking.booking_price).label('revenue')
-        ).group_by(Booking.booking_source)
-        
-        if hotel_id:
-            query = query.filter(Booking.hotel_id == hotel_id)
+        if self.use_rollups:
+            query = self.db.query(
+                BookingRollup.booking_source,
+                func.sum(BookingRollup.booking_count).label('count'),
+                func.sum(BookingRollup.revenue).label('revenue')
+            ).group_by(BookingRollup.booking_source)
+            
+            if hotel_id:
+                query = query.filter(BookingRollup.hotel_id == hotel_id)
+        else:
+            query = self.db.query(
+                Booking.booking_source,
+                func.count(Booking.id).label('count'),
+                func.sum(Booking.booking_price).label('revenue')
+            ).group_by(Booking.booking_source)
+            
+            if hotel_id:
+                query = query.filter(Booking.hotel_id == hotel_id)
         
         results = query.all()
         
@@ -119,7 +135,7 @@ class QueryBuilder:
         
         for r in results:
             distribution.append({
-                "source": r.booking_source,
+                "source": r.booking_source or None,
                 "booking_count": r.count,
                 "percentage": round((r.count / total_bookings * 100), 2) if total_bookings > 0 else 0,
                 "total_revenue": float(r.revenue or 0)
@@ -130,68 +146,129 @@ class QueryBuilder:
             "total_bookings": total_bookings
         }
     
-    def get_weekend_vs_weekday_comparison(self, hotel_id: int) -> Dict:
-        """Compare weekend vs weekday performance"""
-        bookings = self.db.query(Booking).filter(Booking.hotel_id == hotel_id).all()
+    def _booking_measures(self):
+        # Columns the breakdown queries aggregate, from the rollup or the raw table.
+        # `weight` is how many bookings a row stands for.
+        if self.use_rollups:
+            return (BookingRollup, BookingRollup.hotel_id, BookingRollup.date, BookingRollup.status,
+                    BookingRollup.booking_count, BookingRollup.revenue)
+        return (Booking, Booking.hotel_id, Booking.check_in_date, Booking.status,
+                literal_column("1"), Booking.booking_price)
+    
+    def get_weekend_vs_weekday_comparison(
+        self,
+        hotel_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict:
+        """Compare weekend vs weekday performance (optionally for check-ins between start_date and end_date)"""
+        table, hotel_col, day_col, _, weight, revenue = self._booking_measures()
+        weekday = day_of_week(self.db, day_col)
+        if weekday is None:
+            # No day-of-week function for this dialect: group by day and split in Python
+            day = day_col.label('day')
+        else:
+            day = case((weekday.in_([0, 6]), 1), else_=0).label('is_weekend')  # Sunday, Saturday
         
-        weekend_bookings = []
-        weekday_bookings = []
+        query = self.db.query(
+            day,
+            func.sum(weight).label('count'),
+            func.sum(revenue).label('revenue')
+        ).select_from(table).filter(hotel_col == hotel_id)
         
-        for b in bookings:
-            if b.check_in_date.weekday() in [5, 6]:  # Saturday, Sunday
-                weekend_bookings.append(b)
-            else:
-                weekday_bookings.append(b)
+        if start_date:
+            query = query.filter(day_col >= start_date)
+        if end_date:
+            query = query.filter(day_col <= end_date)
         
-        weekend_revenue = sum(b.booking_price for b in weekend_bookings)
-        weekday_revenue = sum(b.booking_price for b in weekday_bookings)
+        totals = {0: [0, 0.0], 1: [0, 0.0]}
+        for r in query.group_by(day).all():
+            is_weekend = r.is_weekend if weekday is not None else int(r.day.weekday() in (5, 6))
+            totals[is_weekend][0] += int(r.count or 0)
+            totals[is_weekend][1] += float(r.revenue or 0.0)
         
+        return self._weekend_vs_weekday_result(*totals[1], *totals[0])
+    
+    @staticmethod
+    def _weekend_vs_weekday_result(weekend_count, weekend_revenue, weekday_count, weekday_revenue) -> Dict:
         return {
             "weekend": {
-                "booking_count": len(weekend_bookings),
+                "booking_count": weekend_count,
                 "total_revenue": weekend_revenue,
-                "average_price": weekend_revenue / len(weekend_bookings) if weekend_bookings else 0
+                "average_price": weekend_revenue / weekend_count if weekend_count else 0
             },
             "weekday": {
-                "booking_count": len(weekday_bookings),
+                "booking_count": weekday_count,
                 "total_revenue": weekday_revenue,
-                "average_price": weekday_revenue / len(weekday_bookings) if weekday_bookings else 0
+                "average_price": weekday_revenue / weekday_count if weekday_count else 0
             },
             "weekend_premium_percent": round(
-                ((weekend_revenue / len(weekend_bookings)) / (weekday_revenue / len(weekday_bookings)) - 1) * 100, 2
-            ) if weekend_bookings and weekday_bookings else 0
+                ((weekend_revenue / weekend_count) / (weekday_revenue / weekday_count) - 1) * 100, 2
+            ) if weekend_count and weekday_count else 0
         }
     
-    def get_cancellation_analysis(self, hotel_id: Optional[int] = None) -> Dict:
-        """Analyze cancellation patterns"""
-        query = self.db.query(Booking)
+    def get_cancellation_analysis(
+        self,
+        hotel_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict:
+        """Analyze cancellation patterns (optionally for check-ins between start_date and end_date)"""
+        table, hotel_col, day_col, status_col, weight, revenue = self._booking_measures()
+        is_cancelled = status_col == 'cancelled'
         
-        if hotel_id:
-            query = query.filter(Booking.hotel_id == hotel_id)
+        query = self.db.query(
+            func.coalesce(func.sum(weight), 0),
+            func.coalesce(func.sum(case((is_cancelled, weight), else_=0)), 0),
+            func.coalesce(func.sum(case((is_cancelled, revenue), else_=0.0)), 0.0)
+        ).select_from(table)
         
-        all_bookings = query.all()
-        cancelled = [b for b in all_bookings if b.status == 'cancelled']
+        if hotel_id:
+            query = query.filter(hotel_col == hotel_id)
+        if start_date:
+            query = query.filter(day_col >= start_date)
+        if end_date:
+            query = query.filter(day_col <= end_date)
         
-        total_bookings = len(all_bookings)
-        cancelled_count = len(cancelled)
+        total_bookings, cancelled_count, lost_revenue = query.one()
+        total_bookings, cancelled_count = int(total_bookings), int(cancelled_count)
         cancellation_rate = (cancelled_count / total_bookings * 100) if total_bookings > 0 else 0
         
-        lost_revenue = sum(b.booking_price for b in cancelled)
-        
         return {
             "total_bookings": total_bookings,
             "cancelled_bookings": cancelled_count,
             "cancellation_rate": round(cancellation_rate, 2),
-            "lost_revenue": lost_revenue
+            "lost_revenue": float(lost_revenue)
         }
     
     def get_popular_room_types(self, hotel_id: int, limit: int = 5) -> List[Dict]:
         """Most popular room types"""
+        if self.use_rollups:
+            query = self.db.query(
+                BookingRollup.room_type,
+                func.sum(BookingRollup.booking_count).label('booking_count'),
+                (func.sum(BookingRollup.revenue) / func.sum(BookingRollup.booking_count)).label('avg_price')
+            ).filter(
+                BookingRollup.hotel_id == hotel_id,
+                BookingRollup.room_type != ''
+            ).group_by(BookingRollup.room_type).order_by(func.sum(BookingRollup.booking_count).desc()).limit(limit)
+            
+            return [
+                {
+                    "room_type": r.room_type,
+                    "booking_count": r.booking_count,
+                    "average_price": round(float(r.avg_price), 2)
+                }
+                for r in query.all()
+            ]
+        
         query = self.db.query(
             Room.room_type,
             func.count(Booking.id).label('booking_count'),
             func.avg(Booking.booking_price).label('avg_price')
-        ).join(Booking, Room.id == Booking.room_id).filter(
+        ).join(
+            Booking, and_(Booking.hotel_id == Room.hotel_id, Booking.room_id == Room.id)
+        ).filter(
             Room.hotel_id == hotel_id
         ).group_by(Room.room_type).order_by(func.count(Booking.id).desc()).limit(limit)
         
@@ -237,13 +314,13 @@ class QueryBuilder:
                 "id": "weekend_vs_weekday",
                 "name": "Weekend vs Weekday Comparison",
                 "description": "Compare performance between weekends and weekdays",
-                "parameters": ["hotel_id (required)"]
+                "parameters": ["hotel_id (required)", "start_date (optional)", "end_date (optional)"]
             },
             {
                 "id": "cancellation_analysis",
                 "name": "Cancellation Analysis",
                 "description": "Analyze cancellation rate and lost revenue",
-                "parameters": ["hotel_id (optional)"]
+                "parameters": ["hotel_id (optional)", "start_date (optional)", "end_date (optional)"]
             },
             {
                 "id": "popular_room_types",
@@ -0,0 +1,302 @@
+"""
+Read-through cache for analytics and smart-query responses.
+
+Entries are keyed by endpoint name, hotel scope and normalized parameters.
+Invalidation never scans keys: every key embeds generation counters (a global
+epoch plus one per hotel, or one for portfolio-wide results), and
+invalidating a hotel just bumps its counter and the portfolio one, so stale
+entries stop being addressed and age out through TTL/LRU.
+
+Backends:
+  - memory (default): per-process LRU with TTL
+  - redis: shared between workers (CACHE_BACKEND=redis, CACHE_URL=redis://...),
+    requires the optional `redis` package
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.database.connection import PRIMARY_ROUTE, REPLICA_ROUTE, session_route
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+
+# Results read from a lagging replica are kept at most this long
+CACHE_REPLICA_TTL_SECONDS = int(os.getenv("CACHE_REPLICA_TTL_SECONDS", "30"))
+
+# Arguments that are plumbing, not part of the cached result's identity
+IGNORED_PARAMS = {"db"}
+
+_MISSING = object()
+
+
+class MemoryCache:
+
+    #In-process LRU cache with per-entry TTL
+
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+
+    #Shared cache; Redis handles TTL and (with maxmemory-policy allkeys-lru) eviction
+
+
+    def __init__(self, url: str = CACHE_URL, prefix: str = "hoteliq:cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str, default=None):
+        raw = self.client.get(self.prefix + key)
+        return default if raw is None else pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def counter(self, name: str) -> int:
+        return int(self.client.get(self.prefix + "gen:" + name) or 0)
+
+    def incr(self, name: str) -> int:
+        return int(self.client.incr(self.prefix + "gen:" + name))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+def _normalize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class QueryCache:
+
+    #Generation-keyed read-through cache with hit/miss statistics
+
+
+    PORTFOLIO = "all"
+    EPOCH = "epoch"
+
+    def __init__(self, backend=None, default_ttl: int = CACHE_TTL_SECONDS):
+        self.backend = backend or MemoryCache()
+        self.default_ttl = default_ttl
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def make_key(
+        self,
+        endpoint: str,
+        params: Dict,
+        hotel_id: Optional[int] = None,
+        route: str = PRIMARY_ROUTE
+    ) -> str:
+        # Hotel-scoped results depend on that hotel only; the rest on the whole portfolio.
+        # Primary and replica results never share an entry: a replica read made after a
+        # write may predate it, and must not be served to the client that wrote.
+        scope = f"hotel:{hotel_id}" if hotel_id else self.PORTFOLIO
+        generation = f"{self.backend.counter(self.EPOCH)}.{self.backend.counter(scope)}"
+        normalized = json.dumps(
+            {k: _normalize(v) for k, v in sorted(params.items()) if k not in IGNORED_PARAMS},
+            sort_keys=True, default=str
+        )
+        digest = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+        return f"{endpoint}:{scope}:{route}:g{generation}:{digest}"
+
+    def _ttl(self, ttl: Optional[int], route: str) -> int:
+        ttl = ttl or self.default_ttl
+        return min(ttl, CACHE_REPLICA_TTL_SECONDS) if route == REPLICA_ROUTE else ttl
+
+    def get_or_compute(
+        self,
+        endpoint: str,
+        params: Dict,
+        compute: Callable[[], Any],
+        hotel_id: Optional[int] = None,
+        ttl: Optional[int] = None,
+        route: str = PRIMARY_ROUTE
+    ):
+        """Return the cached value for (endpoint, params), computing and storing it on a miss."""
+        key = self.make_key(endpoint, params, hotel_id, route)
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count(endpoint, "hits")
+            return value
+
+        self._count(endpoint, "misses")
+        value = compute()
+        self.backend.set(key, value, self._ttl(ttl, route))
+        return value
+
+    async def get_or_compute_async(
+        self,
+        endpoint: str,
+        params: Dict,
+        compute: Callable[[], Any],
+        hotel_id: Optional[int] = None,
+        ttl: Optional[int] = None,
+        route: str = PRIMARY_ROUTE
+    ):
+        """get_or_compute for a coroutine function `compute`."""
+        key = self.make_key(endpoint, params, hotel_id, route)
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count(endpoint, "hits")
+            return value
+
+        self._count(endpoint, "misses")
+        value = await compute()
+        self.backend.set(key, value, self._ttl(ttl, route))
+        return value
+
+    def invalidate_hotels(self, hotel_ids: Iterable[int]):
+        """Drop cached results for these hotels and every portfolio-wide result."""
+        hotel_ids = {int(h) for h in hotel_ids if h is not None}
+        for hotel_id in hotel_ids:
+            self.backend.incr(f"hotel:{hotel_id}")
+        self.backend.incr(self.PORTFOLIO)
+        with self._lock:
+            self._invalidations += 1
+
+    def invalidate_all(self):
+        """Drop every cached result (bulk recalculations, schema changes)."""
+        self.backend.incr(self.EPOCH)
+        with self._lock:
+            self._invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def _count(self, endpoint: str, field: str):
+        with self._lock:
+            self._stats[endpoint][field] += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters of this process, overall and per endpoint."""
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self._stats.items()}
+            invalidations = self._invalidations
+        hits = sum(c["hits"] for c in endpoints.values())
+        misses = sum(c["misses"] for c in endpoints.values())
+        for counts in endpoints.values():
+            total = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / total, 4) if total else 0.0
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "invalidations": invalidations,
+            "endpoints": endpoints
+        }
+
+
+def cached(endpoint: str, ttl: Optional[int] = None):
+    """
+    Cache an endpoint or service function (sync or async) through query_cache.
+
+    All keyword arguments except `db` form the key; a `hotel_id` argument
+    scopes the entry to that hotel for invalidation, and `db` decides whether
+    the entry is a primary or a (shorter-lived) replica result. Call with keyword
+    arguments (FastAPI always does).
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await query_cache.get_or_compute_async(
+                    endpoint,
+                    kwargs,
+                    lambda: func(*args, **kwargs),
+                    hotel_id=kwargs.get("hotel_id"),
+                    ttl=ttl,
+                    route=session_route(kwargs.get("db"))
+                )
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return query_cache.get_or_compute(
+                endpoint,
+                kwargs,
+                lambda: func(*args, **kwargs),
+                hotel_id=kwargs.get("hotel_id"),
+                ttl=ttl,
+                route=session_route(kwargs.get("db"))
+            )
+        return wrapper
+    return decorator
+
+
+def _create_backend():
+    if CACHE_BACKEND == "redis":
+        return RedisCache()
+    return MemoryCache()
+
+
+query_cache = QueryCache(_create_backend())
@@ -1,8 +1,16 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from datetime import date, timedelta
-from typing import List
+from sqlalchemy import Float, Integer, Numeric, and_, bindparam, case, cast, func, select, insert, delete, update
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
 from app.models.hotel import Booking, Hotel, DailyMetrics
+from app.utils.cache import query_cache
+from app.utils.sql_expressions import insert_if_absent
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Statuses that occupy a room on each night of the stay
+OCCUPYING_STATUSES = ["confirmed", "completed"]
 
 
 class MetricsCalculator:
@@ -99,10 +107,264 @@ class MetricsCalculator:
             db.add(metric)
         
         db.commit()
+        query_cache.invalidate_hotels([hotel_id])
         db.refresh(metric)
         
         return metric
     
+    @staticmethod
+    def build_metrics_frame(
+        bookings: "pd.DataFrame",
+        hotel_rooms: Dict[int, int],
+        start_date: date,
+        end_date: date
+    ) -> "pd.DataFrame":
+        """
+        Compute daily metrics for every (hotel, date) pair in one vectorized pass.
+
+        Each booking is expanded into its stay-nights once; occupancy and
+        prorated revenue are then summed per (hotel, night) with np.bincount.
+        Produces the same numbers as calculate_daily_metrics, one row per hotel
+        in hotel_rooms and per day in [start_date, end_date].
+        """
+        # numpy/pandas load on first bulk calculation, not at API startup
+        import numpy as np
+        import pandas as pd
+
+        hotel_ids = np.array(list(hotel_rooms.keys()), dtype=np.int64)
+        total_rooms = np.array(list(hotel_rooms.values()), dtype=np.float64)
+        start = np.datetime64(start_date, 'D')
+        num_days = (np.datetime64(end_date, 'D') - start).astype(np.int64) + 1
+        grid_size = len(hotel_ids) * num_days
+
+        # Position of each booking's hotel in the grid (-1 = unknown hotel)
+        hotel_pos = pd.Index(hotel_ids).get_indexer(bookings['hotel_id'].to_numpy())
+        known = hotel_pos >= 0
+        hotel_pos = hotel_pos[known]
+        check_in = pd.to_datetime(bookings['check_in_date'][known]).to_numpy().astype('datetime64[D]')
+        check_out = pd.to_datetime(bookings['check_out_date'][known]).to_numpy().astype('datetime64[D]')
+        prices = bookings['booking_price'][known].to_numpy(dtype=np.float64)
+        statuses = bookings['status'][known].to_numpy()
+
+        # Booking and cancellation counts are keyed on the check-in day
+        check_in_offset = (check_in - start).astype(np.int64)
+        in_range = (check_in_offset >= 0) & (check_in_offset < num_days)
+        cell = hotel_pos[in_range] * num_days + check_in_offset[in_range]
+        booking_count = np.bincount(cell, minlength=grid_size)
+        cancelled = statuses[in_range] == "cancelled"
+        cancellation_count = np.bincount(cell[cancelled], minlength=grid_size)
+
+        # Expand occupying bookings into one row per stay-night
+        nights = (check_out - check_in).astype(np.int64)
+        occupying = np.isin(statuses, OCCUPYING_STATUSES) & (nights > 0)
+        nights = nights[occupying]
+        first_night = check_in_offset[occupying]
+        nightly_rate = prices[occupying] / nights
+        stay_pos = hotel_pos[occupying]
+
+        booking_idx = np.repeat(np.arange(len(nights)), nights)
+        stay_starts = np.cumsum(nights) - nights
+        night_offset = first_night[booking_idx] + (np.arange(len(booking_idx)) - stay_starts[booking_idx])
+        in_range = (night_offset >= 0) & (night_offset < num_days)
+        cell = stay_pos[booking_idx[in_range]] * num_days + night_offset[in_range]
+        rooms_occupied = np.bincount(cell, minlength=grid_size)
+        total_revenue = np.bincount(cell, weights=nightly_rate[booking_idx[in_range]], minlength=grid_size)
+
+        rooms_available = np.repeat(total_rooms, num_days)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            occupancy_rate = np.where(rooms_available > 0, rooms_occupied / rooms_available * 100, 0.0)
+            adr = np.where(rooms_occupied > 0, total_revenue / rooms_occupied, 0.0)
+            revpar = np.where(rooms_available > 0, total_revenue / rooms_available, 0.0)
+
+        return pd.DataFrame({
+            'hotel_id': np.repeat(hotel_ids, num_days),
+            'date': np.tile(start + np.arange(num_days), len(hotel_ids)),
+            'occupancy_rate': np.round(occupancy_rate, 2),
+            'rooms_occupied': rooms_occupied,
+            'rooms_available': rooms_available.astype(np.int64),
+            'total_revenue': np.round(total_revenue, 2),
+            'average_daily_rate': np.round(adr, 2),
+            'revenue_per_available_room': np.round(revpar, 2),
+            'booking_count': booking_count,
+            'cancellation_count': cancellation_count
+        })
+
+    @staticmethod
+    def _query_metrics_frame(
+        db: Session,
+        hotel_rooms: Dict[int, int],
+        start_date: date,
+        end_date: date
+    ) -> "pd.DataFrame":
+        
+        #Load the bookings touching [start_date, end_date] and build their metrics frame.
+        import pandas as pd
+        
+        # Bookings that check in or stay over any night of the range
+        stmt = select(
+            Booking.hotel_id,
+            Booking.check_in_date,
+            Booking.check_out_date,
+            Booking.booking_price,
+            Booking.status
+        ).where(
+            Booking.hotel_id.in_(list(hotel_rooms)),
+            Booking.check_in_date <= end_date,
+            Booking.check_out_date >= start_date
+        )
+        bookings = pd.DataFrame(
+            db.execute(stmt).all(),
+            columns=['hotel_id', 'check_in_date', 'check_out_date', 'booking_price', 'status']
+        )
+        return MetricsCalculator.build_metrics_frame(bookings, hotel_rooms, start_date, end_date)
+
+    @staticmethod
+    def bulk_calculate_metrics(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        hotel_ids: Optional[List[int]] = None,
+        batch_size: int = 10000
+    ) -> int:
+        """
+        Recompute DailyMetrics for a date range with one read and one bulk write.
+
+        Existing rows in the range are replaced in a single transaction.
+        Returns the number of metric rows written.
+        """
+        hotel_query = db.query(Hotel.id, Hotel.total_rooms)
+        if hotel_ids:
+            hotel_query = hotel_query.filter(Hotel.id.in_(hotel_ids))
+        hotel_rooms = {h.id: h.total_rooms for h in hotel_query.all()}
+        if not hotel_rooms:
+            return 0
+
+        frame = MetricsCalculator._query_metrics_frame(db, hotel_rooms, start_date, end_date)
+        frame['date'] = frame['date'].to_numpy().astype('datetime64[D]').tolist()
+        frame['calculated_at'] = datetime.utcnow()
+        records = frame.to_dict(orient='records')
+
+        try:
+            db.execute(
+                delete(DailyMetrics).where(
+                    DailyMetrics.hotel_id.in_(list(hotel_rooms)),
+                    DailyMetrics.date >= start_date,
+                    DailyMetrics.date <= end_date
+                )
+            )
+            for i in range(0, len(records), batch_size):
+                db.execute(insert(DailyMetrics), records[i:i+batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        query_cache.invalidate_hotels(hotel_rooms)
+
+        return len(records)
+
+    @staticmethod
+    def apply_booking_changes(db: Session, removed: List = (), added: List = ()) -> int:
+        """
+        Apply the DailyMetrics delta of a booking write without a recompute.
+
+        `removed` and `added` are booking snapshots (see app.services.booking_events)
+        describing the state before and after the write. Each one contributes its
+        stay-nights to occupancy/revenue and its check-in day to the booking and
+        cancellation counts. Existing rows are adjusted in SQL (col = col + delta);
+        (hotel, date) rows that were never calculated are computed from the
+        bookings table, so the session must already be flushed. The caller commits.
+        Returns the number of rows touched.
+        """
+        # (hotel_id, date) -> [rooms_occupied, total_revenue, booking_count, cancellation_count]
+        deltas: Dict = {}
+        for sign, snapshots in ((-1, removed), (1, added)):
+            for b in snapshots:
+                check_in = _as_date(b.check_in_date)
+                check_out = _as_date(b.check_out_date)
+
+                delta = deltas.setdefault((b.hotel_id, check_in), [0, 0.0, 0, 0])
+                delta[2] += sign
+                if b.status == "cancelled":
+                    delta[3] += sign
+
+                nights = (check_out - check_in).days
+                if b.status not in OCCUPYING_STATUSES or nights <= 0:
+                    continue
+                nightly_rate = b.booking_price / nights
+                for night in range(nights):
+                    delta = deltas.setdefault((b.hotel_id, check_in + timedelta(days=night)), [0, 0.0, 0, 0])
+                    delta[0] += sign
+                    delta[1] += sign * nightly_rate
+
+        deltas = {key: d for key, d in deltas.items() if d[0] or d[2] or d[3] or abs(d[1]) > 0.005}
+        if not deltas:
+            return 0
+
+        hotel_ids = {hotel_id for hotel_id, _ in deltas}
+        days = [day for _, day in deltas]
+        hotel_rooms = {
+            h.id: h.total_rooms
+            for h in db.query(Hotel.id, Hotel.total_rooms).filter(Hotel.id.in_(hotel_ids)).all()
+        }
+        existing = set(db.execute(
+            select(DailyMetrics.hotel_id, DailyMetrics.date).where(
+                DailyMetrics.hotel_id.in_(hotel_ids),
+                DailyMetrics.date >= min(days),
+                DailyMetrics.date <= max(days)
+            )
+        ).all())
+        # Whole seconds, so the insert_if_absent marker round-trips through MySQL DATETIME
+        now = datetime.utcnow().replace(microsecond=0)
+
+        def increment(hotel_id, day):
+            delta = deltas[(hotel_id, day)]
+            return {
+                "b_hotel_id": hotel_id,
+                "b_date": day,
+                "d_rooms_occupied": delta[0],
+                "d_total_revenue": delta[1],
+                "d_booking_count": delta[2],
+                "d_cancellation_count": delta[3],
+                "b_rooms_available": hotel_rooms[hotel_id],
+                "b_calculated_at": now
+            }
+
+        increments, missing = [], {}
+        for hotel_id, day in deltas:
+            if hotel_id not in hotel_rooms:
+                continue
+            if (hotel_id, day) in existing:
+                increments.append(increment(hotel_id, day))
+            else:
+                missing.setdefault(hotel_id, []).append(day)
+
+        # Days with no metric row yet have no baseline to apply a delta to: they are computed
+        # from the bookings table and inserted in one statement. Rows a concurrent write
+        # inserted first get the delta applied instead.
+        if missing:
+            wanted = {(hotel_id, day) for hotel_id, missing_days in missing.items() for day in missing_days}
+            frame = MetricsCalculator._query_metrics_frame(
+                db, {hotel_id: hotel_rooms[hotel_id] for hotel_id in missing},
+                min(day for _, day in wanted), max(day for _, day in wanted)
+            )
+            frame['date'] = frame['date'].to_numpy().astype('datetime64[D]').tolist()
+            frame['calculated_at'] = now
+            records = [r for r in frame.to_dict(orient='records') if (r['hotel_id'], r['date']) in wanted]
+            for record in insert_if_absent(db, DailyMetrics, ["hotel_id", "date"], records, marker="calculated_at"):
+                increments.append(increment(record['hotel_id'], record['date']))
+
+        # Deltas are added in SQL (col = col + delta) so concurrent writers never lose
+        # updates; the rates are then derived from the stored sums
+        if increments:
+            connection = db.connection()
+            connection.execute(_increment_metrics_statement(), increments)
+            connection.execute(_derive_rates_statement(), [
+                {"b_hotel_id": p["b_hotel_id"], "b_date": p["b_date"]} for p in increments
+            ])
+
+        return len(deltas)
+
     @staticmethod
     def calculate_date_range_metrics(
         db: Session,
@@ -113,15 +375,18 @@ class MetricsCalculator:
         
         #Calculate metrics for a date range.
         
-        metrics = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            metric = MetricsCalculator.calculate_daily_metrics(db, hotel_id, current_date)
-            metrics.append(metric)
-            current_date += timedelta(days=1)
-        
-        return metrics
+        if not db.query(Hotel.id).filter(Hotel.id == hotel_id).first():
+            raise ValueError(f"Hotel {hotel_id} not found")
+
+        MetricsCalculator.bulk_calculate_metrics(db, start_date, end_date, hotel_ids=[hotel_id])
+
+        return db.query(DailyMetrics).filter(
+            and_(
+                DailyMetrics.hotel_id == hotel_id,
+                DailyMetrics.date >= start_date,
+                DailyMetrics.date <= end_date
+            )
+        ).order_by(DailyMetrics.date).all()
     
     @staticmethod
     def recalculate_all_metrics(db: Session) -> dict:
@@ -130,8 +395,8 @@ class MetricsCalculator:
         """
         print("Recalculating all daily metrics...")
         
-        # Get all hotels
-        hotels = db.query(Hotel).all()
+        start_time = datetime.now()
+        hotels_processed = db.query(Hotel).count()
         
         # Get date range from bookings
         earliest = db.query(func.min(Booking.check_in_date)).scalar()
@@ -140,22 +405,61 @@ class MetricsCalculator:
         if not earliest or not latest:
             return {"message": "No bookings found"}
         
-        total_calculated = 0
-        
-        for hotel in hotels:
-            metrics = MetricsCalculator.calculate_date_range_metrics(
-                db, hotel.id, earliest, latest
-            )
-            total_calculated += len(metrics)
-            print(f" Calculated {len(metrics)} days for {hotel.name}")
+        total_calculated = MetricsCalculator.bulk_calculate_metrics(db, earliest, latest)
+        duration = (datetime.now() - start_time).total_seconds()
         
-        print(f" Total metrics calculated: {total_calculated}")
+        print(f" Total metrics calculated: {total_calculated} in {duration:.2f}s")
         
         return {
-            "hotels_processed": len(hotels),
+            "hotels_processed": hotels_processed,
             "metrics_calculated": total_calculated,
+            "duration_seconds": duration,
             "date_range": {
                 "start": earliest.isoformat(),
                 "end": latest.isoformat()
             }
-        }
\ No newline at end of file
+        }
+
+
+def _rate(numerator, denominator):
+    # numerator / denominator rounded to 2 places, 0 when the denominator is not positive
+    return case(
+        (denominator > 0, func.round(cast(numerator / denominator, Numeric(18, 6)), 2)),
+        else_=0.0
+    )
+
+
+def _increment_metrics_statement():
+    table = DailyMetrics.__table__
+    return update(table).where(
+        table.c.hotel_id == bindparam("b_hotel_id"),
+        table.c.date == bindparam("b_date")
+    ).values(
+        rooms_occupied=func.coalesce(table.c.rooms_occupied, 0) + bindparam("d_rooms_occupied", type_=Integer),
+        # Unrounded, so repeated deltas do not accumulate rounding error
+        total_revenue=func.coalesce(table.c.total_revenue, 0.0) + bindparam("d_total_revenue", type_=Float),
+        booking_count=func.coalesce(table.c.booking_count, 0) + bindparam("d_booking_count", type_=Integer),
+        cancellation_count=(
+            func.coalesce(table.c.cancellation_count, 0) + bindparam("d_cancellation_count", type_=Integer)
+        ),
+        rooms_available=bindparam("b_rooms_available", type_=Integer),
+        calculated_at=bindparam("b_calculated_at")
+    )
+
+
+def _derive_rates_statement():
+    # A separate statement: MySQL evaluates SET left to right with the updated values
+    table = DailyMetrics.__table__
+    return update(table).where(
+        table.c.hotel_id == bindparam("b_hotel_id"),
+        table.c.date == bindparam("b_date")
+    ).values(
+        occupancy_rate=_rate(table.c.rooms_occupied * 100.0, table.c.rooms_available),
+        average_daily_rate=_rate(table.c.total_revenue, table.c.rooms_occupied),
+        revenue_per_available_room=_rate(table.c.total_revenue, table.c.rooms_available)
+    )
+
+
+def _as_date(value) -> date:
+    # ETL frames carry pandas Timestamps, ORM rows carry dates
+    return value.date() if isinstance(value, datetime) else value
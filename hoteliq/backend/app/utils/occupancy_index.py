@@ -0,0 +1,380 @@
+"""
+In-memory occupancy index: "which rooms are in-house on day D" in O(log n).
+
+Each hotel keeps two range-update / range-query Fenwick trees over its day
+span, one counting occupied rooms and one holding prorated nightly revenue.
+A stay adds +1 room and price/nights revenue to every night in
+[check_in, check_out). Point lookups and date-range totals are then
+logarithmic instead of a scan over the hotel's booking history.
+
+The index is built lazily per hotel from the bookings table, kept current
+by committed booking writes in this process (see booking_events), and
+rebuilt after OCCUPANCY_INDEX_TTL_SECONDS so writes made by other worker
+processes become visible. It is always built from the primary: commit hooks
+patch it with every write, which a lagging replica snapshot may not include.
+At most OCCUPANCY_INDEX_MAX_HOTELS hotels are kept, least recently used first out.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.connection import REPLICA_ROUTE, SessionLocal, session_route
+from app.models.hotel import Booking, Hotel
+from app.utils.metrics_calculator import OCCUPYING_STATUSES, _as_date
+
+if TYPE_CHECKING:
+    import numpy as np
+
+OCCUPANCY_INDEX_TTL_SECONDS = float(os.getenv("OCCUPANCY_INDEX_TTL_SECONDS", "300"))
+
+# Hotels kept in memory; the least recently used one is dropped beyond this
+OCCUPANCY_INDEX_MAX_HOTELS = int(os.getenv("OCCUPANCY_INDEX_MAX_HOTELS", "1024"))
+
+# Above this many changed stays in one commit, rebuilding is cheaper than patching
+MAX_INCREMENTAL_CHANGES = 10000
+
+# Days indexed past the latest check-out (or today), so new future bookings
+# can be patched in without a rebuild
+SPAN_HEADROOM_DAYS = 400
+
+
+class RangeFenwick:
+
+    #Fenwick tree pair supporting range add and range sum over positions 0..size-1
+
+
+    def __init__(self, size: int, values: Optional["np.ndarray"] = None):
+        self.size = size
+        if values is None:
+            self._b1 = [0.0] * (size + 1)
+            self._b2 = [0.0] * (size + 1)
+            return
+        # Build from initial values in O(size) via their difference array
+        import numpy as np
+        diff = np.diff(np.asarray(values, dtype=np.float64), prepend=0.0)
+        self._b1 = self._build(diff)
+        self._b2 = self._build(diff * np.arange(size))
+
+    @staticmethod
+    def _build(values: "np.ndarray") -> List[float]:
+        tree = [0.0] + values.tolist()
+        n = len(values)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        return tree
+
+    @staticmethod
+    def _add(tree: List[float], pos: int, delta: float):
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    @staticmethod
+    def _sum(tree: List[float], pos: int) -> float:
+        total = 0.0
+        i = pos + 1
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def range_add(self, start: int, end: int, delta: float):
+        """Add delta to every position in [start, end]."""
+        self._add(self._b1, start, delta)
+        self._add(self._b2, start, delta * start)
+        if end + 1 < self.size:
+            self._add(self._b1, end + 1, -delta)
+            self._add(self._b2, end + 1, -delta * (end + 1))
+
+    def point(self, pos: int) -> float:
+        """Value at one position."""
+        return self._sum(self._b1, pos)
+
+    def prefix_sum(self, pos: int) -> float:
+        """Sum of positions 0..pos."""
+        if pos < 0:
+            return 0.0
+        return (pos + 1) * self._sum(self._b1, pos) - self._sum(self._b2, pos)
+
+    def range_sum(self, start: int, end: int) -> float:
+        """Sum of positions start..end."""
+        return self.prefix_sum(end) - self.prefix_sum(start - 1)
+
+
+class HotelOccupancy:
+
+    #Occupancy and nightly revenue of one hotel, indexed by day
+
+
+    def __init__(self, hotel_id: int, total_rooms: int, first_day: date, last_day: date,
+                 rooms: "np.ndarray", revenue: "np.ndarray"):
+        self.hotel_id = hotel_id
+        self.total_rooms = total_rooms
+        self.base = first_day.toordinal()
+        self.size = last_day.toordinal() - self.base + 1
+        self.rooms = RangeFenwick(self.size, rooms)
+        self.revenue = RangeFenwick(self.size, revenue)
+        self.built_at = time.monotonic()
+        self.stale = False
+        # True if the hotel does not exist; such entries are served but not kept
+        self.missing = False
+
+    @classmethod
+    def build(cls, db: Session, hotel_id: int) -> "HotelOccupancy":
+        """Load one hotel's occupying stays and build its trees."""
+        import numpy as np
+
+        total_rooms = db.execute(select(Hotel.total_rooms).where(Hotel.id == hotel_id)).scalar()
+        missing = total_rooms is None
+        total_rooms = total_rooms or 0
+        rows = db.execute(
+            select(Booking.check_in_date, Booking.check_out_date, Booking.booking_price).where(
+                Booking.hotel_id == hotel_id,
+                Booking.status.in_(OCCUPYING_STATUSES),
+                Booking.check_out_date > Booking.check_in_date
+            )
+        ).all()
+
+        horizon = date.today().toordinal() + SPAN_HEADROOM_DAYS
+        if not rows:
+            base = date.today().toordinal()
+            size = horizon - base + 1
+            entry = cls(hotel_id, total_rooms, date.fromordinal(base), date.fromordinal(horizon),
+                        np.zeros(size), np.zeros(size))
+            entry.missing = missing
+            return entry
+
+        check_in = np.fromiter((r[0].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+        check_out = np.fromiter((r[1].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+        price = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+
+        base = int(check_in.min())
+        size = max(int(check_out.max()) + SPAN_HEADROOM_DAYS, horizon) - base + 1
+        nightly = price / (check_out - check_in)
+
+        # Stay-night counts per day from +1/-1 markers at check-in/check-out
+        rooms = np.cumsum(
+            np.bincount(check_in - base, minlength=size) - np.bincount(check_out - base, minlength=size)
+        )
+        revenue = np.cumsum(
+            np.bincount(check_in - base, weights=nightly, minlength=size)
+            - np.bincount(check_out - base, weights=nightly, minlength=size)
+        )
+        entry = cls(hotel_id, total_rooms, date.fromordinal(base),
+                    date.fromordinal(base + size - 1), rooms, revenue)
+        entry.missing = missing
+        return entry
+
+    def apply_stay(self, check_in: date, check_out: date, price: float, sign: int) -> bool:
+        """
+        Add (sign=1) or remove (sign=-1) a stay. Returns False if the stay falls
+        outside the indexed span and the hotel needs a rebuild instead.
+        """
+        nights = (check_out - check_in).days
+        if nights <= 0:
+            return True
+        start = check_in.toordinal() - self.base
+        end = check_out.toordinal() - self.base - 1
+        if start < 0 or end >= self.size:
+            return False
+        self.rooms.range_add(start, end, sign)
+        self.revenue.range_add(start, end, sign * price / nights)
+        return True
+
+    def _clip(self, start_date: date, end_date: date):
+        start = max(start_date.toordinal() - self.base, 0)
+        end = min(end_date.toordinal() - self.base, self.size - 1)
+        return start, end
+
+    def on_day(self, day: date) -> Dict:
+        pos = day.toordinal() - self.base
+        if pos < 0 or pos >= self.size:
+            return {"rooms_occupied": 0, "revenue": 0.0}
+        return {
+            "rooms_occupied": int(round(self.rooms.point(pos))),
+            "revenue": self.revenue.point(pos)
+        }
+
+    def over_range(self, start_date: date, end_date: date) -> Dict:
+        start, end = self._clip(start_date, end_date)
+        if start > end:
+            return {"room_nights": 0, "revenue": 0.0}
+        return {
+            "room_nights": int(round(self.rooms.range_sum(start, end))),
+            "revenue": self.revenue.range_sum(start, end)
+        }
+
+
+class _Build:
+
+    #One hotel's build in progress; requests from other threads wait for it instead of repeating it
+
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.done = threading.Event()
+        self.changes = 0  # booking changes for the hotel seen while it was building
+        self.entry: Optional[HotelOccupancy] = None
+
+
+class OccupancyIndex:
+
+    #Per-hotel HotelOccupancy registry shared by the request threads of one process
+
+
+    def __init__(self, ttl_seconds: float = OCCUPANCY_INDEX_TTL_SECONDS,
+                 max_hotels: int = OCCUPANCY_INDEX_MAX_HOTELS):
+        self.ttl_seconds = ttl_seconds
+        self.max_hotels = max_hotels
+        self._hotels: "OrderedDict[int, HotelOccupancy]" = OrderedDict()
+        # Guards _hotels and _builds only and is never held during database I/O
+        self._lock = threading.RLock()
+        self._builds: Dict[int, _Build] = {}
+
+    def _current(self, hotel_id: int) -> Optional[HotelOccupancy]:
+        # Usable entry for a hotel, or None; call with self._lock held
+        entry = self._hotels.get(hotel_id)
+        if entry is None or entry.stale or time.monotonic() - entry.built_at > self.ttl_seconds:
+            return None
+        self._hotels.move_to_end(hotel_id)
+        return entry
+
+    @staticmethod
+    def _build(db: Session, hotel_id: int) -> HotelOccupancy:
+        if session_route(db) == REPLICA_ROUTE:
+            with SessionLocal() as primary:
+                return HotelOccupancy.build(primary, hotel_id)
+        return HotelOccupancy.build(db, hotel_id)
+
+    def hotel(self, db: Session, hotel_id: int) -> HotelOccupancy:
+        """
+        Index for one hotel, (re)built if missing, invalidated or past its TTL.
+
+        No lock is held while building. One request builds a hotel and requests
+        from other threads wait for its result; a request on the builder's own
+        thread (another coroutine of the same event loop, when the build runs
+        through AsyncSession.run_sync) cannot wait for it and builds a private
+        copy instead. Requests for indexed hotels never wait. A build that
+        overlapped a booking commit for the same hotel may or may not include
+        it, so it is served once and rebuilt on next use.
+        """
+        with self._lock:
+            entry = self._current(hotel_id)
+            if entry is not None:
+                return entry
+            build = self._builds.get(hotel_id)
+            if build is None:
+                build = self._builds[hotel_id] = _Build()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            if build.thread != threading.get_ident():
+                build.done.wait()
+                if build.entry is not None:
+                    return build.entry
+            return self._build(db, hotel_id)
+
+        try:
+            entry = self._build(db, hotel_id)
+            with self._lock:
+                if build.changes:
+                    entry.stale = True
+                if entry.missing:
+                    # Unknown hotel ids are not cached, so they cannot fill the index
+                    self._hotels.pop(hotel_id, None)
+                else:
+                    self._hotels[hotel_id] = entry
+                    self._hotels.move_to_end(hotel_id)
+                    while len(self._hotels) > self.max_hotels:
+                        self._hotels.popitem(last=False)
+            build.entry = entry
+            return entry
+        finally:
+            with self._lock:
+                del self._builds[hotel_id]
+            build.done.set()
+
+    def _mark_changed(self, hotel_ids: Iterable[int]):
+        # Call with self._lock held
+        for hotel_id in hotel_ids:
+            build = self._builds.get(hotel_id)
+            if build is not None:
+                build.changes += 1
+
+    def invalidate(self, hotel_ids: Optional[Iterable[int]] = None):
+        """Force a rebuild on next use, for some hotels or all of them."""
+        with self._lock:
+            if hotel_ids is None:
+                self._hotels.clear()
+                self._mark_changed(list(self._builds))
+            else:
+                hotel_ids = list(hotel_ids)
+                for hotel_id in hotel_ids:
+                    self._hotels.pop(hotel_id, None)
+                self._mark_changed(hotel_ids)
+
+    def apply_booking_changes(self, removed: Iterable = (), added: Iterable = ()):
+        """
+        Patch the indexed hotels with committed booking changes
+        (BookingSnapshot-like objects). Hotels not indexed yet are skipped.
+        """
+        removed, added = list(removed), list(added)
+        if len(removed) + len(added) > MAX_INCREMENTAL_CHANGES:
+            self.invalidate({b.hotel_id for b in removed} | {b.hotel_id for b in added})
+            return
+
+        with self._lock:
+            self._mark_changed({b.hotel_id for b in removed} | {b.hotel_id for b in added})
+            for bookings, sign in ((removed, -1), (added, 1)):
+                for b in bookings:
+                    entry = self._hotels.get(b.hotel_id)
+                    if entry is None or b.status not in OCCUPYING_STATUSES:
+                        continue
+                    if not entry.apply_stay(_as_date(b.check_in_date), _as_date(b.check_out_date),
+                                            float(b.booking_price or 0.0), sign):
+                        entry.stale = True
+
+    def daily_statistics(self, db: Session, hotel_id: int, target_date: date) -> Dict:
+        """Same payload as analytics_service.get_daily_statistics, from the index."""
+        entry = self.hotel(db, hotel_id)
+        day = entry.on_day(target_date)
+        occupancy_rate = (day["rooms_occupied"] / entry.total_rooms * 100) if entry.total_rooms > 0 else 0.0
+        return {
+            "date": target_date,
+            "hotel_id": hotel_id,
+            "rooms_occupied": day["rooms_occupied"],
+            "total_rooms": entry.total_rooms,
+            "occupancy_rate": round(occupancy_rate, 2),
+            "daily_revenue": round(day["revenue"], 2)
+        }
+
+    def range_statistics(self, db: Session, hotel_id: int, start_date: date, end_date: date) -> Dict:
+        """Room nights, revenue and average occupancy over [start_date, end_date]."""
+        entry = self.hotel(db, hotel_id)
+        totals = entry.over_range(start_date, end_date)
+        days = (end_date - start_date).days + 1
+        available = entry.total_rooms * days
+        return {
+            "hotel_id": hotel_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": days,
+            "room_nights": totals["room_nights"],
+            "total_rooms": entry.total_rooms,
+            "average_occupancy_rate": round(totals["room_nights"] / available * 100, 2) if available > 0 else 0.0,
+            "total_revenue": round(totals["revenue"], 2)
+        }
+
+
+occupancy_index = OccupancyIndex()
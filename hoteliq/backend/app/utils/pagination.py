@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row of a page, JSON-encoded and
+base64url-wrapped so clients treat it as opaque. The next page is fetched
+with a WHERE on the sort key instead of OFFSET, so every page costs the
+same and concurrent inserts cannot make pages skip or repeat rows.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor for the given sort columns.
+    Raises ValueError if it is malformed or does not match the columns.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        decoded.append(value)
+    return decoded
+
+
+def after_key(columns: Sequence, values: Sequence, descending: bool = False):
+    """
+    WHERE clause for rows strictly after `values` in (columns) order, written
+    as an OR chain so every backend can use an index on the same columns.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_page(
+    query,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    offset: int = 0
+) -> Tuple[list, Optional[str]]:
+    """
+    Run `query` for one page ordered by `columns` (unique as a whole).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    `offset` only exists for clients still paging with skip.
+    """
+    if cursor:
+        query = query.filter(after_key(columns, decode_cursor(cursor, columns), descending))
+
+    order = [c.desc() for c in columns] if descending else list(columns)
+    query = query.order_by(*order).limit(limit + 1)
+    if offset:
+        query = query.offset(offset)
+    rows = query.all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def iter_keyset(db, stmt, columns: Sequence, batch_size: int = 5000, descending: bool = False):
+    """
+    Yield lists of Core rows for `stmt`, one keyset batch at a time, so an
+    unbounded result set is read with constant memory. `columns` must be
+    selected by `stmt` (under their own names) and unique as a whole.
+    """
+    order = [c.desc() for c in columns] if descending else list(columns)
+    last = None
+    while True:
+        batch_stmt = stmt
+        if last is not None:
+            batch_stmt = batch_stmt.where(after_key(columns, last, descending))
+        rows = db.execute(batch_stmt.order_by(*order).limit(batch_size)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = [getattr(rows[-1], c.key) for c in columns]
@@ -0,0 +1,148 @@
+"""
+Fast JSON responses for large list and analytics payloads.
+
+The default FastAPI path validates every returned row against the
+response_model and then walks the result again with jsonable_encoder before
+json.dumps. For rows read straight from our own tables that work is
+redundant, so endpoints can opt into:
+
+  - FastJSONResponse: encodes with orjson (optional dependency, falls back to
+    the standard library) and understands dates, numpy scalars and NaN
+  - trusted_rows(): plain dicts with a response schema's fields, read from
+    ORM rows without re-validation
+  - columnar(): a compact {"count", "columns": {name: [values]}} layout that
+    drops the repeated keys of row-oriented JSON (?format=compact)
+
+FAST_JSON_RESPONSES=1 makes the list endpoints use trusted_rows for their
+default row format as well.
+"""
+import json
+import math
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "0") == "1"
+
+# ?format= values accepted by endpoints that support the compact layout
+RESPONSE_FORMAT_PATTERN = "^(json|compact)$"
+
+_field_cache: Dict[type, tuple] = {}
+
+
+def _default(value):
+    #Types neither encoder handles natively
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if type(value).__module__ == "numpy":  # scalars and arrays, without importing numpy
+        return value.tolist()
+    if hasattr(value, "isoformat"):  # pandas Timestamp
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _replace_nan(value):
+    # The stdlib encoder would write NaN, which is not valid JSON
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _replace_nan(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_nan(v) for v in value]
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact JSON bytes (NaN becomes null)."""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        _replace_nan(content), default=_default, separators=(",", ":"), allow_nan=False
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+
+    #JSONResponse that encodes with orjson when it is installed
+
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def schema_fields(schema) -> tuple:
+    """Field names of a Pydantic response model, in declaration order."""
+    fields = _field_cache.get(schema)
+    if fields is None:
+        fields = _field_cache[schema] = tuple(schema.model_fields)
+    return fields
+
+
+def trusted_rows(schema, rows: Iterable) -> List[Dict]:
+    """
+    Dicts with `schema`'s fields read from ORM objects or Core rows, skipping
+    validation. Only for rows loaded from our own tables.
+    """
+    fields = schema_fields(schema)
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        return [{fields[0]: getter(row)} for row in rows]
+    return [dict(zip(fields, getter(row))) for row in rows]
+
+
+def columnar(rows: Sequence, columns: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Column-oriented payload: {"count": n, "columns": {name: [values...]}}.
+
+    `rows` may be dicts (columns default to the first row's keys), objects
+    with the named attributes, or a pandas DataFrame.
+    """
+    if hasattr(rows, "to_dict") and hasattr(rows, "columns"):
+        frame = rows if columns is None else rows[list(columns)]
+        frame = frame.astype(object).where(frame.notna(), None)
+        return {
+            "count": len(frame),
+            "columns": {str(name): frame[name].tolist() for name in frame.columns}
+        }
+
+    rows = list(rows)
+    if columns is None:
+        columns = list(rows[0].keys()) if rows and isinstance(rows[0], dict) else []
+    if rows and isinstance(rows[0], dict):
+        values = {name: [row.get(name) for row in rows] for name in columns}
+    else:
+        values = {name: [getattr(row, name) for row in rows] for name in columns}
+    return {"count": len(rows), "columns": values}
+
+
+def rows_response(
+    schema,
+    rows: Sequence,
+    response_format: str = "json",
+    headers: Optional[Dict[str, str]] = None
+):
+    """
+    Response for a list endpoint: columnar for ?format=compact, trusted rows
+    when FAST_JSON_RESPONSES is set. Returns None when the endpoint should
+    fall back to the validated response_model path.
+    """
+    if response_format == "compact":
+        return FastJSONResponse(columnar(rows, schema_fields(schema)), headers=headers)
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(trusted_rows(schema, rows), headers=headers)
+    return None
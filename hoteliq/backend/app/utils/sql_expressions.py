@@ -0,0 +1,151 @@
+from typing import Dict, List
+from sqlalchemy import Integer, and_, cast, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+# Dialect-specific SQL snippets, so aggregates and upserts can run inside the
+# database on SQLite (development) as well as PostgreSQL/MySQL (production).
+
+# Keys per tuple IN (...) lookup
+KEY_BATCH = 500
+
+
+def dialect_name(db: Session) -> str:
+    """Name of the dialect behind a session or connection ('sqlite', 'postgresql', 'mysql', ...)."""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name
+
+
+def days_between(db: Session, start, end):
+    """
+    Whole days from `start` to `end` (both DATE columns) as an integer SQL expression,
+    or None for dialects without a known form (callers then compute it in Python).
+    """
+    name = dialect_name(db)
+    if name == "postgresql":
+        # date - date is an integer number of days
+        return end - start
+    if name in ("mysql", "mariadb"):
+        return func.datediff(end, start)
+    if name == "sqlite":
+        return cast(func.julianday(end) - func.julianday(start), Integer)
+    return None
+
+
+def day_of_week(db: Session, column):
+    """
+    Day of week of a DATE column as an integer SQL expression, 0 = Sunday ... 6 = Saturday,
+    or None for dialects without a known form (callers then compute it in Python).
+    """
+    name = dialect_name(db)
+    if name == "postgresql":
+        return cast(func.extract("dow", column), Integer)
+    if name in ("mysql", "mariadb"):
+        # DAYOFWEEK is 1 = Sunday ... 7 = Saturday
+        return func.dayofweek(column) - 1
+    if name == "sqlite":
+        return cast(func.strftime("%w", column), Integer)
+    return None
+
+
+def _connection(db):
+    # Core executemany: an ORM Session would turn a list of parameter sets into an ORM bulk operation
+    return db.connection() if isinstance(db, Session) else db
+
+
+def insert_or_increment(db: Session, model, key: List[str], rows: List[Dict], increments: List[str]):
+    """
+    Insert each row, or add its `increments` columns to the row already stored
+    under the same `key` (a unique index). On sqlite, postgresql and mysql this
+    is one atomic upsert, so concurrent writers neither lose updates nor
+    collide on the unique index; other dialects update, then insert.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    conn = _connection(db)
+    name = dialect_name(db)
+    if name in ("sqlite", "postgresql"):
+        if name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=key,
+            set_={c: table.c[c] + statement.excluded[c] for c in increments}
+        )
+        conn.execute(statement, rows)
+    elif name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_duplicate_key_update(
+            {c: table.c[c] + statement.inserted[c] for c in increments}
+        )
+        conn.execute(statement, rows)
+    else:
+        for row in rows:
+            matches = and_(*[table.c[c] == row[c] for c in key])
+            updated = conn.execute(
+                update(table).where(matches).values({c: table.c[c] + row[c] for c in increments})
+            )
+            if updated.rowcount == 0:
+                conn.execute(insert(table), [row])
+
+
+def insert_if_absent(db: Session, model, key: List[str], rows: List[Dict], marker: str) -> List[Dict]:
+    """
+    Insert `rows` with one executemany, skipping those whose `key` (a unique
+    index) already exists, without failing when a concurrent transaction
+    inserts one first. Returns the rows that were not inserted.
+
+    SQLite and PostgreSQL report the inserted keys through RETURNING. MySQL
+    re-selects the keys together with `marker`, a column whose value in `rows`
+    is specific to this call (e.g. a timestamp), to tell this call's rows from
+    those a concurrent writer inserted.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    key_columns = [table.c[c] for c in key]
+    conn = _connection(db)
+    name = dialect_name(db)
+    if name in ("sqlite", "postgresql"):
+        if name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table).on_conflict_do_nothing(index_elements=key).returning(*key_columns)
+        inserted = {tuple(r) for r in conn.execute(statement, rows)}
+        return [row for row in rows if tuple(row[c] for c in key) not in inserted]
+
+    if name in ("mysql", "mariadb"):
+        conn.execute(insert(table).prefix_with("IGNORE"), rows)
+        ours = set()
+        columns = key_columns + [table.c[marker]]
+        for i in range(0, len(rows), KEY_BATCH):
+            batch = [tuple(row[c] for c in key + [marker]) for row in rows[i:i + KEY_BATCH]]
+            ours.update(tuple(r) for r in conn.execute(select(*columns).where(tuple_(*columns).in_(batch))))
+        return [row for row in rows if tuple(row[c] for c in key + [marker]) not in ours]
+
+    # No conflict clause: skip keys that exist, then insert the rest in one go
+    present = set()
+    for i in range(0, len(rows), KEY_BATCH):
+        batch = [tuple(row[c] for c in key) for row in rows[i:i + KEY_BATCH]]
+        present.update(tuple(r) for r in conn.execute(select(*key_columns).where(tuple_(*key_columns).in_(batch))))
+    new_rows = [row for row in rows if tuple(row[c] for c in key) not in present]
+    if new_rows:
+        conn.execute(insert(table), new_rows)
+    return [row for row in rows if tuple(row[c] for c in key) in present]
+
+
+def sync_id_sequence(db: Session, model):
+    """
+    Move the id sequence of `model` past its largest id after rows were
+    inserted with explicit ids. Only PostgreSQL needs this: SQLite and MySQL
+    derive the next id from the table itself.
+    """
+    if dialect_name(db) != "postgresql":
+        return
+    table = model.__table__
+    sequence = func.pg_get_serial_sequence(table.name, table.c.id.name)
+    _connection(db).execute(select(func.setval(sequence, select(func.max(table.c.id)).scalar_subquery())))
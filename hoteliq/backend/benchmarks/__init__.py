@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the HotelIQ backend.
+
+Run from the backend directory, e.g. `python -m benchmarks.bench_daily_metrics`.
+"""
@@ -0,0 +1,54 @@
+"""
+Benchmark: bulk DailyMetrics engine vs the per-(hotel, day) loop.
+
+The per-day loop is far too slow to run to completion at 1M bookings, so it
+is timed over --loop-days days of one hotel and extrapolated to the full grid.
+
+    python -m benchmarks.bench_daily_metrics --bookings 1000000
+"""
+import argparse
+import os
+from datetime import timedelta
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings, timed
+from app.utils.metrics_calculator import MetricsCalculator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--loop-days", type=int, default=5)
+    parser.add_argument("--keep-db", action="store_true")
+    args = parser.parse_args()
+
+    db, path = create_benchmark_session()
+    results = {}
+    try:
+        with timed(results, "populate"):
+            info = populate_bookings(db, args.bookings, num_hotels=args.hotels)
+        print(f"Dataset: {info['bookings']} bookings, {info['hotels']} hotels ({results['populate']:.1f}s)")
+
+        start, end = info["start_date"], info["end_date"]
+        grid = info["hotels"] * ((end - start).days + 1)
+
+        with timed(results, "bulk"):
+            written = MetricsCalculator.bulk_calculate_metrics(db, start, end)
+        print(f"Bulk engine: {written} rows in {results['bulk']:.2f}s")
+
+        with timed(results, "loop_sample"):
+            for day in range(args.loop_days):
+                MetricsCalculator.calculate_daily_metrics(db, 1, start + timedelta(days=day))
+        per_cell = results["loop_sample"] / args.loop_days
+        loop_estimate = per_cell * grid
+        print(f"Per-day loop: {per_cell * 1000:.1f} ms per (hotel, day), "
+              f"~{loop_estimate:.0f}s estimated for {grid} cells")
+        print(f"Speedup: ~{loop_estimate / results['bulk']:.0f}x")
+    finally:
+        db.close()
+        if not args.keep_db:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: peak RSS of the ETL transform with object/int64 frames and
+copy-per-step features (the previous behaviour) vs the compact schema.
+
+Each mode runs in its own process so the peak RSS figures are independent.
+
+    python -m benchmarks.bench_etl_memory --rows 1000000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.services.booking_schema import compact_booking_frame
+from app.services.data_validator import BookingDataValidator
+from app.services.feature_engineering import FeatureEngineer
+
+SOURCES = ["website", "booking.com", "direct", "expedia", "makemytrip"]
+NAMES = ["Rahul Sharma", "Priya Patel", "Amit Kumar", "Sneha Reddy", "Vikram Singh"]
+
+
+def raw_frame(rows: int, hotels: int, seed: int = 42) -> pd.DataFrame:
+    """A frame shaped like the old extract_from_database output: Python objects and int64."""
+    rng = np.random.default_rng(seed)
+    check_in = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D")
+    nights = pd.to_timedelta(rng.integers(1, 8, rows), unit="D")
+    price = np.round(rng.uniform(2000, 20000, rows), 2)
+    return pd.DataFrame({
+        "booking_id": np.arange(1, rows + 1),
+        "hotel_id": rng.integers(1, hotels + 1, rows),
+        "room_id": rng.integers(1, 200 * hotels, rows),
+        "check_in_date": pd.Series(check_in.date, dtype=object),
+        "check_out_date": pd.Series((check_in + nights).date, dtype=object),
+        "guest_name": pd.Series(rng.choice(NAMES, rows), dtype=object),
+        "guest_email": pd.Series([f"guest{i % 5000}@example.com" for i in range(rows)], dtype=object),
+        "num_guests": rng.integers(1, 5, rows),
+        "booking_price": price,
+        "base_price": price * 1.1,
+        "booking_date": check_in - pd.Timedelta(days=10),
+        "booking_source": pd.Series(rng.choice(SOURCES, rows), dtype=object),
+        "status": pd.Series(rng.choice(["confirmed", "completed", "cancelled"], rows), dtype=object),
+    })
+
+
+def legacy_features(df: pd.DataFrame, hotel_rooms: dict) -> pd.DataFrame:
+    # Previous FeatureEngineer behaviour: df.copy() per step, int64 flags, object strings, merge
+    df = df.copy()
+    df["day_of_week"] = df["check_in_date"].dt.dayofweek
+    df["day_of_month"] = df["check_in_date"].dt.day
+    df["month"] = df["check_in_date"].dt.month
+    df["quarter"] = df["check_in_date"].dt.quarter
+    df["year"] = df["check_in_date"].dt.year
+    df["week_of_year"] = df["check_in_date"].dt.isocalendar().week
+    df["is_weekend"] = df["day_of_week"].isin([5, 6]).astype(int)
+    df["season"] = df["month"].map({m: ["winter", "spring", "monsoon", "autumn"][(m % 12) // 3] for m in range(1, 13)}).astype(object)
+    df["is_peak_season"] = df["month"].isin([10, 11, 12, 1, 2]).astype(int)
+    df["is_holiday_season"] = df["month"].isin([12, 1, 4, 10]).astype(int)
+    df = df.copy()
+    df["length_of_stay"] = (df["check_out_date"] - df["check_in_date"]).dt.days
+    df["stay_category"] = pd.cut(df["length_of_stay"], bins=[0, 1, 3, 7, 30], labels=["short", "medium", "long", "extended"])
+    df["lead_time_days"] = (df["check_in_date"] - df["booking_date"]).dt.days
+    df["is_last_minute"] = (df["lead_time_days"] <= 3).astype(int)
+    df = df.copy()
+    df["price_per_night"] = df["booking_price"] / df["length_of_stay"]
+    df["discount_pct"] = ((df["base_price"] - df["booking_price"]) / df["base_price"] * 100).clip(lower=0)
+    df["price_category"] = pd.cut(df["price_per_night"], bins=[0, 3000, 6000, 10000, np.inf], labels=["budget", "mid_range", "premium", "luxury"])
+    df = df.copy()
+    df = df.sort_values("check_in_date")
+    for window in [7, 30]:
+        df[f"avg_price_{window}d"] = df.groupby("hotel_id")["booking_price"].transform(lambda x: x.rolling(window=window, min_periods=1).mean())
+        df[f"booking_count_{window}d"] = df.groupby("hotel_id")["booking_price"].transform(lambda x: x.rolling(window=window, min_periods=1).count())
+    df["prev_booking_price"] = df.groupby(["hotel_id", "room_id"])["booking_price"].shift(1)
+    df = df.copy()
+    df["hotel_total_rooms"] = df["hotel_id"].map(hotel_rooms)
+    daily = df.groupby(["hotel_id", "check_in_date"]).size().reset_index(name="rooms_booked")
+    daily["occupancy_rate"] = (daily["rooms_booked"] / daily["hotel_id"].map(hotel_rooms) * 100).round(2)
+    return df.merge(daily[["hotel_id", "check_in_date", "occupancy_rate"]], on=["hotel_id", "check_in_date"], how="left")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str, rows: int, hotels: int) -> dict:
+    db, _ = create_benchmark_session(":memory:")
+    populate_bookings(db, 0, num_hotels=hotels)
+    hotel_rooms = {h: 200 for h in range(1, hotels + 1)}
+
+    if mode == "compact":
+        # Typed chunks, as a compact extract would produce, never the full object frame
+        chunk = 100_000
+        df = pd.concat(
+            [compact_booking_frame(raw_frame(min(chunk, rows - i), hotels, seed=i)) for i in range(0, rows, chunk)],
+            ignore_index=True
+        )
+    else:
+        df = raw_frame(rows, hotels)
+    input_mb = df.memory_usage(deep=True).sum() / 2**20
+    baseline_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    BookingDataValidator.validate_dataframe(df)
+    df_clean = BookingDataValidator.clean_dataframe(df)
+    del df
+    if mode == "compact":
+        out = FeatureEngineer.create_all_features(df_clean, db)
+    else:
+        out = legacy_features(df_clean, hotel_rooms)
+    duration = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "input_frame_mb": round(input_mb, 1),
+        "output_frame_mb": round(out.memory_usage(deep=True).sum() / 2**20, 1),
+        "rss_before_transform_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "transform_rss_growth_mb": round(peak_rss_mb() - baseline_rss, 1),
+        "seconds": round(duration, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--child", choices=["legacy", "compact"])
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.rows, args.hotels)))
+        return
+
+    results = {}
+    for mode in ["legacy", "compact"]:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_etl_memory", "--child", mode,
+             "--rows", str(args.rows), "--hotels", str(args.hotels)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+        print(results[mode])
+
+    ratio = results["legacy"]["peak_rss_mb"] / results["compact"]["peak_rss_mb"]
+    growth_ratio = results["legacy"]["transform_rss_growth_mb"] / max(results["compact"]["transform_rss_growth_mb"], 1)
+    print(f"Peak RSS reduction: {ratio:.1f}x (transform growth: {growth_ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
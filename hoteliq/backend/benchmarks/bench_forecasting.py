@@ -0,0 +1,90 @@
+"""
+Benchmark: forecast training and serving.
+
+Trains one model per hotel serially and across the process pool, then
+compares the latency of a forecast request served from the stored model
+with refitting on every request (the per-call cost the model store avoids),
+and checks that changed data queues one background refit while requests
+keep being served from the stored model.
+
+    python -m benchmarks.bench_forecasting --hotels 40 --bookings 200000
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings, timed
+from app.models.hotel import DailyMetrics
+from app.services.forecasting import FORECAST_WORKERS, ForecastEngine, fit_bundle
+from app.utils.metrics_calculator import MetricsCalculator
+
+
+def median_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hotels", type=int, default=40)
+    parser.add_argument("--bookings", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--workers", type=int, default=FORECAST_WORKERS)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    db, path = create_benchmark_session()
+    model_dir = tempfile.mkdtemp(prefix="hoteliq-models-")
+    try:
+        info = populate_bookings(db, args.bookings, num_hotels=args.hotels, rooms_per_hotel=50, days=args.days)
+        MetricsCalculator.bulk_calculate_metrics(db, info["start_date"], info["end_date"])
+        db.commit()
+
+        engine = ForecastEngine(db, model_dir=model_dir)
+        print(f"{args.hotels} hotels, {args.days} days of history, engine: {engine.engine}")
+
+        results = {}
+        with timed(results, "serial"):
+            engine.train(force=True, max_workers=1)
+        with timed(results, "pool"):
+            summary = engine.train(force=True, max_workers=args.workers)
+        with timed(results, "unchanged"):
+            engine.train()
+        print(f"  train serial          : {results['serial']:.2f}s")
+        print(f"  train pool ({args.workers} workers): {results['pool']:.2f}s "
+              f"({results['serial'] / results['pool']:.1f}x), {summary['trained']} models")
+        print(f"  train, data unchanged : {results['unchanged']:.3f}s (version check only)")
+
+        cached = median_ms(lambda: engine.forecast(1, days=30), args.repeats)
+        version = engine.data_version(1)
+        refit = median_ms(lambda: fit_bundle(engine._payload(1, None, version)), args.repeats)
+        print(f"  forecast, stored model: {cached:.2f} ms")
+        print(f"  forecast, refit       : {refit:.2f} ms ({refit / cached:.0f}x)")
+
+        # Requests would submit a train_forecasts job on the app database; count them instead
+        refreshes = []
+        engine._submit_refresh = lambda hotel_id, room_type: refreshes.append(hotel_id)
+        metric = db.query(DailyMetrics).filter(DailyMetrics.hotel_id == 1).order_by(DailyMetrics.date.desc()).first()
+        metric.total_revenue += 1000
+        db.commit()
+        stale = median_ms(lambda: engine.forecast(1, days=30), args.repeats)
+        with timed(results, "refresh"):
+            engine.train(hotel_ids=[1])
+        fresh = engine.load(1)["version"] == engine.data_version(1)
+        print(f"  after new data        : {stale:.2f} ms from the stored model, {len(refreshes)} refit job(s) queued; "
+              f"background refit {results['refresh'] * 1000:.0f} ms (model current: {fresh})")
+    finally:
+        db.close()
+        shutil.rmtree(model_dir, ignore_errors=True)
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
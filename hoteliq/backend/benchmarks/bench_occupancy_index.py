@@ -0,0 +1,74 @@
+"""
+Benchmark: occupancy index lookups vs the check_in <= D < check_out range scan.
+
+For each dataset size, times /analytics/daily's statistics for one hotel
+over many dates: the old query (load in-house bookings, sum in Python)
+against OccupancyIndex point lookups, plus the one-off index build.
+
+    python -m benchmarks.bench_occupancy_index --sizes 50000 200000 800000
+"""
+import argparse
+import os
+import time
+from datetime import timedelta
+
+from sqlalchemy import and_
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.models.hotel import Booking, Hotel
+from app.utils.occupancy_index import OccupancyIndex
+
+
+def legacy_daily_statistics(db, hotel_id, target_date):
+    bookings = db.query(Booking).filter(
+        and_(
+            Booking.hotel_id == hotel_id,
+            Booking.check_in_date <= target_date,
+            Booking.check_out_date > target_date,
+            Booking.status.in_(["confirmed", "completed"])
+        )
+    ).all()
+    hotel = db.query(Hotel).filter(Hotel.id == hotel_id).first()
+    revenue = sum(b.booking_price / (b.check_out_date - b.check_in_date).days for b in bookings)
+    return len(bookings), hotel.total_rooms, round(revenue, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000])
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'bookings':>10} {'scan ms/lookup':>15} {'index build ms':>15} {'index us/lookup':>16}")
+    for size in args.sizes:
+        db, path = create_benchmark_session()
+        try:
+            info = populate_bookings(db, size, num_hotels=args.hotels)
+            step = max((info["end_date"] - info["start_date"]).days // args.lookups, 1)
+            days = [info["start_date"] + timedelta(days=i * step) for i in range(args.lookups)]
+
+            t0 = time.perf_counter()
+            expected = [legacy_daily_statistics(db, 1, d) for d in days]
+            scan_ms = (time.perf_counter() - t0) * 1000 / len(days)
+            db.expunge_all()
+
+            index = OccupancyIndex()
+            t0 = time.perf_counter()
+            index.hotel(db, 1)
+            build_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            stats = [index.daily_statistics(db, 1, d) for d in days]
+            lookup_us = (time.perf_counter() - t0) * 1e6 / len(days)
+
+            for got, (rooms, _, revenue) in zip(stats, expected):
+                assert got["rooms_occupied"] == rooms and abs(got["daily_revenue"] - revenue) < 0.02
+            print(f"{size:>10} {scan_ms:>15.2f} {build_ms:>15.1f} {lookup_us:>16.1f}")
+        finally:
+            db.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: SQL-aggregate calculate_revenue_metrics vs loading Booking rows.
+
+Times /analytics/summary's query for one hotel over a 30-day window at
+growing booking counts. The legacy column is a replica of the old
+implementation (ORM load + Python sums).
+
+    python -m benchmarks.bench_revenue_summary --sizes 50000 200000 800000
+"""
+import argparse
+import os
+import time
+from datetime import timedelta
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.models.hotel import Booking
+from app.services.analytics_service import calculate_revenue_metrics
+
+
+def legacy_revenue(db, hotel_id, start_date, end_date):
+    bookings = db.query(Booking).filter(
+        Booking.status.in_(["confirmed", "completed"]),
+        Booking.hotel_id == hotel_id,
+        Booking.check_in_date >= start_date,
+        Booking.check_out_date <= end_date
+    ).all()
+    revenue = sum(b.booking_price for b in bookings)
+    nights = sum((b.check_out_date - b.check_in_date).days for b in bookings)
+    return revenue, len(bookings), nights
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000])
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'bookings':>10} {'legacy ms':>10} {'aggregate ms':>13} {'speedup':>8}")
+    for size in args.sizes:
+        db, path = create_benchmark_session()
+        try:
+            info = populate_bookings(db, size, num_hotels=args.hotels)
+            end = info["end_date"]
+            start = end - timedelta(days=30)
+
+            metrics = calculate_revenue_metrics(db, hotel_id=1, start_date=start, end_date=end)
+            revenue, count, _ = legacy_revenue(db, 1, start, end)
+            assert metrics["total_bookings"] == count
+            assert abs(metrics["total_revenue"] - round(revenue, 2)) < 0.01
+
+            legacy_ms = best_of(lambda: (legacy_revenue(db, 1, start, end), db.expunge_all()), args.repeats)
+            sql_ms = best_of(lambda: calculate_revenue_metrics(db, hotel_id=1, start_date=start, end_date=end),
+                             args.repeats)
+            print(f"{size:>10} {legacy_ms:>10.1f} {sql_ms:>13.2f} {legacy_ms / sql_ms:>7.0f}x")
+        finally:
+            db.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: smart queries from booking_rollups vs raw bookings.
+
+    python -m benchmarks.bench_rollup_queries --bookings 500000
+"""
+import argparse
+import os
+import time
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings, timed
+from app.services.booking_rollup import BookingRollups
+from app.services.query_builder import QueryBuilder
+
+QUERIES = [
+    ("booking_source_distribution", lambda qb: qb.get_booking_source_distribution()),
+    ("booking_source_distribution(hotel)", lambda qb: qb.get_booking_source_distribution(1)),
+    ("weekend_vs_weekday(hotel)", lambda qb: qb.get_weekend_vs_weekday_comparison(1)),
+    ("cancellation_analysis", lambda qb: qb.get_cancellation_analysis()),
+    ("popular_room_types(hotel)", lambda qb: qb.get_popular_room_types(1)),
+]
+
+
+def best_ms(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=500_000)
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    db, path = create_benchmark_session()
+    results = {}
+    try:
+        populate_bookings(db, args.bookings, num_hotels=args.hotels)
+        with timed(results, "rebuild"):
+            rows = BookingRollups.rebuild(db)
+            db.commit()
+        print(f"Rollup: {rows} rows for {args.bookings} bookings (rebuild {results['rebuild']:.2f}s)")
+
+        raw, rolled = QueryBuilder(db, use_rollups=False), QueryBuilder(db, use_rollups=True)
+        print(f"{'query':<38} {'raw ms':>10} {'rollup ms':>10} {'speedup':>8}")
+        for name, query in QUERIES:
+            raw_ms = best_ms(lambda: (query(raw), db.expunge_all()), args.repeats)
+            rollup_ms = best_ms(lambda: query(rolled), args.repeats)
+            print(f"{name:<38} {raw_ms:>10.1f} {rollup_ms:>10.2f} {raw_ms / rollup_ms:>7.0f}x")
+    finally:
+        db.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: per-row cost of serializing booking pages.
+
+Compares, for the same ORM rows:
+  - validated: what FastAPI does with response_model=List[BookingResponse]
+    (validate from attributes, dump to JSON-compatible data, json.dumps)
+  - trusted:   trusted_rows() + FastJSONResponse encoding
+  - compact:   columnar() + FastJSONResponse encoding
+and then the same three through the /bookings/ endpoint end to end.
+
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import json
+import os
+import time
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.api import bookings
+from app.database.connection import get_db
+from app.models.hotel import Booking
+from app.models.schemas import BookingResponse
+from app.utils import serialization
+from app.utils.serialization import columnar, dumps, schema_fields, trusted_rows
+
+
+def best_seconds(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    db, path = create_benchmark_session()
+    try:
+        populate_bookings(db, args.rows, num_hotels=5)
+        db.commit()
+        rows = db.query(Booking).order_by(Booking.id).limit(args.rows).all()
+        adapter = TypeAdapter(List[BookingResponse])
+        fields = schema_fields(BookingResponse)
+
+        def validated():
+            models = adapter.validate_python(rows, from_attributes=True)
+            return json.dumps(jsonable_encoder(models)).encode()
+
+        paths = {
+            "validated": validated,
+            "trusted": lambda: dumps(trusted_rows(BookingResponse, rows)),
+            "compact": lambda: dumps(columnar(rows, fields)),
+        }
+        backend = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+        print(f"Serializing {len(rows)} booking rows, encoder: {backend}")
+        print(f"{'path':<12} {'total ms':>10} {'us/row':>8} {'bytes':>10} {'speedup':>8}")
+        baseline = None
+        for name, fn in paths.items():
+            seconds = best_seconds(fn, args.repeats)
+            baseline = baseline or seconds
+            print(f"{name:<12} {seconds * 1000:>10.1f} {seconds / len(rows) * 1e6:>8.2f} "
+                  f"{len(fn()):>10} {baseline / seconds:>7.1f}x")
+
+        # End to end through the router (query + serialization + HTTP)
+        app = FastAPI()
+        app.include_router(bookings.router)
+        app.dependency_overrides[get_db] = lambda: db
+        client = TestClient(app)
+        limit = min(1000, len(rows))
+        url = f"/bookings/?limit={limit}"
+
+        def request(query=""):
+            response = client.get(url + query)
+            response.raise_for_status()
+            db.expunge_all()
+
+        print(f"\nGET /bookings/ with limit={limit}")
+        print(f"{'mode':<12} {'ms/request':>10} {'us/row':>8}")
+        modes = [("validated", "", False), ("trusted", "", True), ("compact", "&format=compact", False)]
+        for name, query, fast in modes:
+            serialization.FAST_JSON_RESPONSES = fast
+            seconds = best_seconds(lambda: request(query), args.repeats)
+            print(f"{name:<12} {seconds * 1000:>10.1f} {seconds / limit * 1e6:>8.2f}")
+        serialization.FAST_JSON_RESPONSES = False
+    finally:
+        db.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
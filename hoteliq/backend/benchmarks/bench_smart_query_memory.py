@@ -0,0 +1,75 @@
+"""
+Benchmark: Python memory of the weekend/weekday and cancellation queries.
+
+Compares the old implementation (ORM rows bucketed in Python, replicated
+below) with the SQL aggregates on the raw bookings table, as the number of
+bookings per hotel grows. Peak allocations are measured with tracemalloc;
+the SQL versions should stay flat.
+
+    python -m benchmarks.bench_smart_query_memory --sizes 20000 100000 400000
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.models.hotel import Booking
+from app.services.query_builder import QueryBuilder
+
+
+def legacy_weekend_vs_weekday(db, hotel_id):
+    bookings = db.query(Booking).filter(Booking.hotel_id == hotel_id).all()
+    weekend = [b for b in bookings if b.check_in_date.weekday() in [5, 6]]
+    weekday = [b for b in bookings if b.check_in_date.weekday() not in [5, 6]]
+    return len(weekend), sum(b.booking_price for b in weekend), len(weekday), sum(b.booking_price for b in weekday)
+
+
+def legacy_cancellation_analysis(db, hotel_id):
+    bookings = db.query(Booking).filter(Booking.hotel_id == hotel_id).all()
+    cancelled = [b for b in bookings if b.status == 'cancelled']
+    return len(bookings), len(cancelled), sum(b.booking_price for b in cancelled)
+
+
+def measure(db, fn):
+    """(peak traced MB, seconds) of one call, with a clean identity map."""
+    db.expunge_all()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.expunge_all()
+    return peak / 1024 / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000, 400_000])
+    parser.add_argument("--hotels", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'bookings':>10} {'query':<22} {'legacy MB':>10} {'sql MB':>8} {'legacy s':>9} {'sql s':>7}")
+    for size in args.sizes:
+        db, path = create_benchmark_session()
+        try:
+            populate_bookings(db, size, num_hotels=args.hotels)
+            sql = QueryBuilder(db, use_rollups=False)
+            cases = [
+                ("weekend_vs_weekday", lambda: legacy_weekend_vs_weekday(db, 1),
+                 lambda: sql.get_weekend_vs_weekday_comparison(1)),
+                ("cancellation_analysis", lambda: legacy_cancellation_analysis(db, 1),
+                 lambda: sql.get_cancellation_analysis(1)),
+            ]
+            for name, legacy, aggregate in cases:
+                legacy_mb, legacy_s = measure(db, legacy)
+                sql_mb, sql_s = measure(db, aggregate)
+                print(f"{size:>10} {name:<22} {legacy_mb:>10.1f} {sql_mb:>8.3f} {legacy_s:>9.2f} {sql_s:>7.3f}")
+        finally:
+            db.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
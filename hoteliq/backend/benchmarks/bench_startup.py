@@ -0,0 +1,87 @@
+"""
+Benchmark: worker cold start.
+
+Starts fresh interpreters that import app.main (which builds the app via
+create_app) and reports how long it takes until the app is ready to
+serve, whether pandas/numpy were loaded on the way, and what the first
+ingestion request pays for loading them later. Exits with code 1 if the
+median time to ready exceeds --budget seconds.
+
+    python -m benchmarks.bench_startup --runs 10 --budget 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+ready = time.perf_counter() - started
+heavy = [m for m in ("pandas", "numpy", "sklearn", "prophet") if m in sys.modules]
+t0 = time.perf_counter()
+import app.services.etl_pipeline
+first_ingestion = time.perf_counter() - t0
+print(json.dumps({"ready": ready, "heavy": heavy, "first_ingestion": first_ingestion,
+                  "routers": len(app.main.ROUTERS)}))
+"""
+
+# Import cost of the frameworks alone: the floor for any worker
+FLOOR_PROBE = r"""
+import json, time
+started = time.perf_counter()
+import fastapi, pydantic, sqlalchemy.orm
+print(json.dumps({"ready": time.perf_counter() - started}))
+"""
+
+
+def run_probe(env, probe: str = PROBE) -> dict:
+    t0 = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, env=env, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median seconds to ready")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0", PYTHONWARNINGS="ignore")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    run_probe(env)  # warm the bytecode cache and the OS file cache
+    runs = [run_probe(env) for _ in range(args.runs)]
+    floor = statistics.median(run_probe(env, FLOOR_PROBE)["ready"] for _ in range(args.runs))
+
+    def summary(key):
+        values = sorted(r[key] for r in runs)
+        return statistics.median(values), values[-1]
+
+    ready_median, ready_max = summary("ready")
+    process_median, _ = summary("process")
+    ingestion_median, _ = summary("first_ingestion")
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+
+    print(f"Cold start over {args.runs} runs ({runs[0]['routers']} routers)")
+    print(f"  import + create_app : median {ready_median * 1000:.0f} ms, max {ready_max * 1000:.0f} ms")
+    print(f"  of which frameworks : median {floor * 1000:.0f} ms (fastapi, pydantic, sqlalchemy)")
+    print(f"  whole process       : median {process_median * 1000:.0f} ms")
+    print(f"  heavy modules at start: {', '.join(heavy) if heavy else 'none'}")
+    print(f"  first ingestion import (pandas etc.): median {ingestion_median * 1000:.0f} ms")
+
+    if ready_median > args.budget:
+        print(f"\nStartup budget exceeded: {ready_median:.2f}s > {args.budget:.2f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
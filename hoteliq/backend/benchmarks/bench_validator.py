@@ -0,0 +1,115 @@
+"""
+Benchmark: BookingDataValidator on a large frame.
+
+Compares the previous multi-pass validate_dataframe (null counts, three
+boolean-filtered copies, duplicated, mean/std, separate min/max/median,
+in-place date conversion) with the single-pass bitmask validator, and the
+cost of splitting the frame into valid and quarantined rows. About 1% of
+rows are made invalid. Also checks that the new validator leaves the input
+frame untouched.
+
+    python -m benchmarks.bench_validator --rows 5000000
+"""
+import argparse
+import resource
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.services.booking_schema import compact_booking_frame
+from app.services.data_generator import booking_chunks, hotel_frame, room_frame
+from app.services.data_validator import BookingDataValidator, DataQualityReport
+
+
+def legacy_validate(df: pd.DataFrame) -> DataQualityReport:
+    # Previous validate_dataframe: one full pass (or filtered copy) per check, mutates df
+    report = DataQualityReport()
+    null_counts = df[BookingDataValidator.REQUIRED_COLUMNS].isnull().sum()
+    for col, count in null_counts.items():
+        if count > 0:
+            report.add_error(f"Column '{col}' has {count} null values")
+    df['check_in_date'] = pd.to_datetime(df['check_in_date'])
+    df['check_out_date'] = pd.to_datetime(df['check_out_date'])
+    if len(df[df['check_out_date'] <= df['check_in_date']]) > 0:
+        report.add_error("check-out before/same as check-in")
+    if len(df[(df['booking_price'] <= 0) | (df['base_price'] <= 0)]) > 0:
+        report.add_error("invalid prices")
+    if len(df[df['num_guests'] <= 0]) > 0:
+        report.add_error("invalid guest count")
+    duplicates = df.duplicated(subset=['hotel_id', 'room_id', 'check_in_date'], keep=False)
+    if duplicates.any():
+        report.add_warning(f"{duplicates.sum()} potential duplicate bookings detected")
+    price_mean = df['booking_price'].mean()
+    price_std = df['booking_price'].std()
+    if len(df[df['booking_price'] > price_mean + (3 * price_std)]) > 0:
+        report.add_warning("unusually high prices")
+    report.stats = {
+        "earliest": df['check_in_date'].min(), "latest": df['check_out_date'].max(),
+        "min": df['booking_price'].min(), "max": df['booking_price'].max(),
+        "mean": df['booking_price'].mean(), "median": df['booking_price'].median(),
+        "unique_hotels": df['hotel_id'].nunique(), "unique_rooms": df['room_id'].nunique()
+    }
+    return report
+
+
+def corrupt(df: pd.DataFrame, fraction: float, seed: int = 7) -> int:
+    """Make about `fraction` of the rows invalid, spread over the row checks."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(df), int(len(df) * fraction), replace=False)
+    price, guests, check_out = rows[0::3], rows[1::3], rows[2::3]
+    df.loc[df.index[price], 'booking_price'] = -1.0
+    df.loc[df.index[guests], 'num_guests'] = 0
+    df.loc[df.index[check_out], 'check_out_date'] = df['check_in_date'].iloc[check_out].to_numpy()
+    return len(rows)
+
+
+def best_seconds(fn, make_input, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        data = make_input()
+        t0 = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--invalid", type=float, default=0.01, help="Fraction of invalid rows")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} bookings...")
+    rooms = room_frame(hotel_frame(args.hotels, seed=42), seed=42)
+    end = date.today()
+    df = compact_booking_frame(pd.concat(
+        booking_chunks(rooms, args.rows, end - timedelta(days=730), end, seed=42), ignore_index=True
+    ))
+    corrupted = corrupt(df, args.invalid)
+
+    before = df.copy()
+    result = BookingDataValidator.validate(df)
+    assert df.equals(before), "validate() modified its input"
+    assert result.invalid_count == corrupted, (result.invalid_count, corrupted)
+    del before
+
+    legacy = best_seconds(legacy_validate, df.copy, args.repeats)
+    single = best_seconds(BookingDataValidator.validate, lambda: df, args.repeats)
+    split = best_seconds(
+        lambda d: (result.valid_rows(d), result.quarantined_rows(d)), lambda: df, args.repeats
+    )
+
+    print(f"{args.rows:,} rows, {corrupted:,} invalid ({result.report.stats['quarantine_reasons']})")
+    print(f"  legacy multi-pass validate : {legacy:.2f}s  ({args.rows / legacy / 1e6:.1f}M rows/s)")
+    print(f"  single-pass bitmask        : {single:.2f}s  ({args.rows / single / 1e6:.1f}M rows/s, "
+          f"{legacy / single:.1f}x)")
+    print(f"  split valid / quarantined  : {split:.2f}s")
+    print(f"  peak RSS                   : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
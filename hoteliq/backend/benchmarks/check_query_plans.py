@@ -0,0 +1,140 @@
+"""
+Query-plan regression check for the read endpoints in app/api.
+
+Builds a SQLite database with the migrated schema, calls each endpoint
+through a TestClient, captures every SQL statement it runs and feeds it to
+EXPLAIN QUERY PLAN. The check fails (exit code 1) if a statement scans a
+large table without an index ("SCAN bookings" rather than
+"SCAN bookings USING [COVERING] INDEX ...").
+
+    python -m benchmarks.check_query_plans --bookings 20000
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from benchmarks.datasets import create_benchmark_session, populate_bookings
+from app.api import analytics, bookings, forecasting, hotels, rooms, smart_queries
+from app.database.connection import get_db, get_read_db, get_read_session
+from app.database.migrations import run_migrations
+from app.services import forecasting as forecasting_service
+from app.services.booking_rollup import BookingRollups
+from app.utils.metrics_calculator import MetricsCalculator
+
+# Tables big enough that a full scan is a regression
+CHECKED_TABLES = ("bookings", "daily_metrics")
+
+ENDPOINTS = [
+    "/analytics/revenue?hotel_id=1",
+    "/analytics/daily/1",
+    "/analytics/metrics/1",
+    "/analytics/summary",
+    "/bookings/",
+    "/bookings/?hotel_id=1&status=confirmed",
+    "/bookings/1",
+    "/forecasting/1",
+    "/hotels/",
+    "/rooms/?hotel_id=1",
+    "/smart-queries/total_revenue",
+    "/smart-queries/total_revenue?hotel_id=1",
+    "/smart-queries/occupancy-stats/1",
+    "/smart-queries/top_bookings",
+    "/smart-queries/top_bookings?order_by=date",
+    "/smart-queries/booking-sources",
+    "/smart-queries/booking-sources?hotel_id=1",
+    "/smart-queries/weekend-vs-weekday/1",
+    "/smart-queries/cancellations",
+    "/smart-queries/cancellations?hotel_id=1",
+    "/smart-queries/popular-rooms/1",
+]
+
+# Endpoints that still read raw rows by design, with the reason.
+KNOWN_SCANS = {}
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def build_client(db) -> TestClient:
+    app = FastAPI()
+    for module in (analytics, bookings, forecasting, hotels, rooms, smart_queries):
+        app.include_router(module.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_read_session] = lambda: db
+    return TestClient(app)
+
+
+def explain(db, statement, parameters):
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=20_000)
+    args = parser.parse_args()
+
+    db, path = create_benchmark_session()
+    # Forecast models fitted during the check go to a throwaway directory
+    forecasting_service.FORECAST_MODEL_DIR = tempfile.mkdtemp(prefix="hoteliq-models-")
+    try:
+        run_migrations(db.get_bind())
+        info = populate_bookings(db, args.bookings, num_hotels=5)
+        MetricsCalculator.bulk_calculate_metrics(db, info["start_date"], info["end_date"])
+        BookingRollups.rebuild(db)
+        db.commit()
+        db.connection().exec_driver_sql("ANALYZE")
+        client = build_client(db)
+
+        captured = []
+        event.listen(
+            db.get_bind(), "before_cursor_execute",
+            lambda conn, cursor, statement, parameters, context, executemany:
+                captured.append((statement, parameters))
+        )
+
+        failures = []
+        for url in ENDPOINTS:
+            captured.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                failures.append(f"{url}: HTTP {response.status_code}")
+                continue
+
+            statements = list(captured)
+            scans = set()
+            for statement, parameters in statements:
+                for step in explain(db, statement, parameters):
+                    match = FULL_SCAN.match(step)
+                    if match and match.group(1) in CHECKED_TABLES:
+                        scans.add(match.group(1))
+
+            if scans and url in KNOWN_SCANS:
+                print(f"  known  {url}: full scan of {', '.join(sorted(scans))} ({KNOWN_SCANS[url]})")
+            elif scans:
+                failures.append(f"{url}: full scan of {', '.join(sorted(scans))}")
+                print(f"  FAIL   {url}")
+            else:
+                print(f"  ok     {url} ({len(statements)} statements)")
+
+        if failures:
+            print("\nQuery plan regressions:")
+            for failure in failures:
+                print(f"  - {failure}")
+            sys.exit(1)
+        print("\nNo full table scans on checked tables")
+    finally:
+        db.close()
+        os.remove(path)
+        shutil.rmtree(forecasting_service.FORECAST_MODEL_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
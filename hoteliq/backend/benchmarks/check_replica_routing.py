@@ -0,0 +1,162 @@
+"""
+Read-replica routing check, using two local SQLite files as primary and replica.
+
+The replica is a snapshot of the primary taken before further writes, so it
+lags the way a real replica can. The check verifies that:
+  - analytics and smart-query reads run on the replica only
+  - booking writes run on the primary only and set the stickiness cookie
+  - a client that just wrote reads its own write from the primary
+  - other clients, and the same client after the sticky window, read the replica
+  - with the response cache on, a replica result cached after the write is
+    not served to the client that wrote
+  - the occupancy index is built from the primary even for replica requests
+  - ETL extraction with a read session reads the replica
+
+    python -m benchmarks.check_replica_routing
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+
+def make_databases():
+    paths = []
+    for role in ("primary", "replica"):
+        fd, path = tempfile.mkstemp(prefix=f"hoteliq_{role}_", suffix=".db")
+        os.close(fd)
+        paths.append(path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{paths[0]}"
+    os.environ["REPLICA_DATABASE_URL"] = f"sqlite:///{paths[1]}"
+    os.environ["ASYNC_DB_ENABLED"] = "0"
+    os.environ["SMART_QUERIES_USE_ROLLUPS"] = "0"  # populate_bookings does not fill booking_rollups
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=2000)
+    args = parser.parse_args()
+
+    paths = make_databases()
+
+    # Settings are read at import time, so the app is imported after make_databases()
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, func, insert, select
+    from benchmarks.datasets import populate_bookings
+    from app.api import analytics, bookings, smart_queries
+    from app.database import connection
+    from app.database.connection import Base, ReadSessionLocal, SessionLocal, engine, replica_engine
+    from app.models.hotel import Booking
+    from app.services.etl_pipeline import ETLPipeline
+    from app.utils.occupancy_index import HotelOccupancy
+
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"  {'ok  ' if ok else 'FAIL'}   {name}{f' ({detail})' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    def booking_count(bind):
+        with bind.connect() as conn:
+            return conn.execute(select(func.count()).select_from(Booking)).scalar()
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            populate_bookings(db, args.bookings, num_hotels=3, rooms_per_hotel=20)
+            db.commit()
+
+        # Replica = snapshot of the primary, then the primary moves ahead
+        with engine.connect() as source, replica_engine.connect() as target:
+            source.connection.driver_connection.backup(target.connection.driver_connection)
+        with engine.begin() as conn:
+            conn.execute(insert(Booking), [{
+                "hotel_id": 1, "room_id": 1, "check_in_date": date.today(),
+                "check_out_date": date.today() + timedelta(days=2), "guest_name": "Primary Only",
+                "num_guests": 1, "booking_price": 5000.0, "base_price": 5000.0, "status": "confirmed"
+            }])
+        primary_count, replica_count = booking_count(engine), booking_count(replica_engine)
+        print(f"Primary {primary_count} bookings, replica {replica_count} bookings")
+
+        statements = {"primary": 0, "replica": 0}
+        for role, bind in (("primary", engine), ("replica", replica_engine)):
+            event.listen(bind, "before_cursor_execute",
+                         lambda *a, role=role: statements.__setitem__(role, statements[role] + 1))
+
+        def routed(client, url, method="get", **kwargs):
+            statements.update(primary=0, replica=0)
+            response = getattr(client, method)(url, **kwargs)
+            return response, dict(statements)
+
+        app = FastAPI()
+        for module in (analytics, bookings, smart_queries):
+            app.include_router(module.router)
+        writer, other = TestClient(app), TestClient(app)
+
+        response, used = routed(other, "/analytics/summary")
+        check("analytics reads the replica", response.json()["total_bookings"] == replica_count
+              and used["primary"] == 0 and used["replica"] > 0, str(used))
+
+        response, used = routed(other, "/smart-queries/booking-sources")
+        total = sum(row["booking_count"] for row in response.json()["distribution"])
+        check("smart queries read the replica", total == replica_count and used["primary"] == 0, str(used))
+
+        response, used = routed(writer, "/bookings/", method="post", json={
+            "hotel_id": 2, "room_id": 21, "check_in_date": str(date.today()),
+            "check_out_date": str(date.today() + timedelta(days=1)), "guest_name": "Sticky Guest",
+            "num_guests": 2, "booking_price": 4200.0, "base_price": 4000.0
+        })
+        check("booking write goes to the primary", response.status_code == 201
+              and used["replica"] == 0 and booking_count(engine) == primary_count + 1, str(used))
+        check("write sets the stickiness cookie", connection.PRIMARY_READ_COOKIE in response.cookies)
+
+        # Another client fills the cache from the lagging replica after the write
+        response, used = routed(other, "/analytics/summary")
+        check("replica read after the write is cached", response.json()["total_bookings"] == replica_count
+              and used["primary"] == 0, str(used))
+
+        response, used = routed(writer, "/analytics/summary")
+        check("writer reads its own write", response.json()["total_bookings"] == primary_count + 1
+              and used["replica"] == 0, str(used))
+
+        response, used = routed(other, "/analytics/summary")
+        check("other clients stay on the replica", response.json()["total_bookings"] == replica_count
+              and used["primary"] == 0, str(used))
+
+        writer.cookies.set(connection.PRIMARY_READ_COOKIE, "1.0")
+        response, used = routed(writer, "/analytics/summary")
+        check("expired stickiness returns to the replica", used["primary"] == 0, str(used))
+
+        today = str(date.today())
+        with SessionLocal() as db, ReadSessionLocal() as read_db:
+            on_primary = HotelOccupancy.build(db, 1).on_day(date.today())["rooms_occupied"]
+            on_replica = HotelOccupancy.build(read_db, 1).on_day(date.today())["rooms_occupied"]
+        response, used = routed(other, f"/analytics/occupancy/1?start_date={today}&end_date={today}")
+        check("occupancy index is built from the primary", response.json()["room_nights"] == on_primary
+              and on_primary != on_replica, f"{response.json()['room_nights']} room nights")
+
+        with SessionLocal() as db, ReadSessionLocal() as read_db:
+            statements.update(primary=0, replica=0)
+            extracted = ETLPipeline(db, read_db=read_db).extract_from_database()
+            check("ETL extraction reads the replica", len(extracted) == replica_count
+                  and statements["primary"] == 0, f"{len(extracted)} rows")
+    finally:
+        engine.dispose()
+        replica_engine.dispose()
+        for path in paths:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    if failures:
+        print(f"\n{len(failures)} routing check(s) failed")
+        sys.exit(1)
+    print("\nReplica routing OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Load test: throughput and latency of the analytics endpoints under concurrent clients.
+
+By default the analytics router runs in-process (httpx ASGITransport) on a
+synthetic SQLite database, with the response cache disabled so every request
+reaches the database, and with the occupancy index invalidated every
+--invalidate-every seconds so clients also race on cold index builds.
+Compare the threadpool and AsyncSession paths with (--async-db needs greenlet
+and aiosqlite, and first checks that both paths return the same payloads):
+
+    python -m benchmarks.load_test --clients 200 --duration 15
+    python -m benchmarks.load_test --clients 200 --duration 15 --async-db
+
+or point it at a running server (its own database and settings apply):
+
+    python -m benchmarks.load_test --url http://localhost:8000 --clients 200
+"""
+import argparse
+import asyncio
+import faulthandler
+import os
+import random
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+ENDPOINTS = [
+    "/analytics/revenue?hotel_id={hotel}",
+    "/analytics/daily/{hotel}",
+    "/analytics/occupancy/{hotel}",
+    "/analytics/metrics/{hotel}?format=compact",
+    "/analytics/summary",
+]
+
+
+def build_local_app(args):
+    """Populate a throwaway database and return (app, path); settings must be set before app imports."""
+    fd, path = tempfile.mkstemp(prefix="hoteliq_load_", suffix=".db")
+    os.close(fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["ASYNC_DB_ENABLED"] = "1" if args.async_db else "0"
+    if not args.cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+    from fastapi import FastAPI
+    from benchmarks.datasets import populate_bookings
+    from app.api import analytics
+    from app.database.connection import Base, SessionLocal, engine
+    from app.utils.metrics_calculator import MetricsCalculator
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        info = populate_bookings(db, args.bookings, num_hotels=args.hotels)
+        MetricsCalculator.bulk_calculate_metrics(db, info["start_date"], info["end_date"])
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(analytics.router)
+    return app, path
+
+
+async def check_async_parity(app, hotels) -> list:
+    """
+    Request every endpoint through the AsyncSession path and again through the
+    threadpool path; returns the URLs whose payloads differ (the cache must be off).
+    """
+    from app.database import connection
+
+    transport = httpx.ASGITransport(app=app)
+    mismatches = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        for hotel in range(1, hotels + 1):
+            for endpoint in ENDPOINTS:
+                url = endpoint.format(hotel=hotel)
+                payloads = []
+                for enabled in (True, False):
+                    connection.ASYNC_DB_ENABLED = enabled
+                    response = await client.get(url)
+                    payloads.append((response.status_code, response.json()))
+                if payloads[0] != payloads[1] or payloads[0][0] != 200:
+                    mismatches.append(url)
+    connection.ASYNC_DB_ENABLED = True
+    return mismatches
+
+
+async def client_loop(client, deadline, hotels, latencies, errors):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        url = rng.choice(ENDPOINTS).format(hotel=rng.randint(1, hotels))
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code != 200:
+                errors.append(f"{url}: HTTP {response.status_code}")
+                continue
+        except httpx.HTTPError as e:
+            errors.append(f"{url}: {type(e).__name__}")
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+
+async def invalidate_loop(deadline, interval):
+    # Drop every occupancy index now and then, so concurrent clients race on cold builds
+    from app.utils.occupancy_index import occupancy_index
+
+    while time.perf_counter() < deadline:
+        occupancy_index.invalidate()
+        await asyncio.sleep(interval)
+
+
+async def run_load(args, app=None):
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+    else:
+        transport = None
+        base_url = args.url
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits,
+                                 timeout=args.timeout) as client:
+        # Warm up (first-touch index builds, connection pool)
+        for hotel in range(1, args.hotels + 1):
+            for endpoint in ENDPOINTS:
+                await client.get(endpoint.format(hotel=hotel))
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        cold = [invalidate_loop(deadline, args.invalidate_every)] if app is not None and args.invalidate_every else []
+        await asyncio.gather(*cold, *[
+            client_loop(client, deadline, args.hotels, latencies, errors)
+            for _ in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Load an already running server instead of an in-process app")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of measured load")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--hotels", type=int, default=10)
+    parser.add_argument("--async-db", action="store_true", help="In-process: serve reads from an AsyncSession")
+    parser.add_argument("--cache", action="store_true", help="In-process: keep the response cache enabled")
+    parser.add_argument("--invalidate-every", type=float, default=1.0,
+                        help="In-process: seconds between occupancy index invalidations during the load (0: never)")
+    args = parser.parse_args()
+
+    app, path = (None, None) if args.url else build_local_app(args)
+    # A deadlocked event loop never reaches the client timeouts: dump the stacks and exit instead
+    faulthandler.dump_traceback_later(args.duration + args.timeout + 120, exit=True)
+    try:
+        if app is not None and args.async_db and not args.cache:
+            mismatches = asyncio.run(check_async_parity(app, args.hotels))
+            if mismatches:
+                raise SystemExit(f"AsyncSession and threadpool payloads differ: {', '.join(mismatches)}")
+            print("AsyncSession and threadpool paths return the same payloads")
+        latencies, errors, elapsed = asyncio.run(run_load(args, app))
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+        if path:
+            os.remove(path)
+
+    mode = args.url or ("in-process, " + ("AsyncSession" if args.async_db else "threadpool"))
+    print(f"Target: {mode}; {args.clients} concurrent clients for {elapsed:.1f}s")
+    print(f"Requests: {len(latencies)} ok, {len(errors)} failed")
+    if latencies:
+        ms = np.array(latencies) * 1000
+        print(f"Throughput: {len(latencies) / elapsed:.0f} req/s")
+        print("Latency ms: p50 {:.1f}  p95 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+            *np.percentile(ms, [50, 95, 99]), ms.max()
+        ))
+    for error in sorted(set(errors))[:10]:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
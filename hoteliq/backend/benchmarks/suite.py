@@ -0,0 +1,440 @@
+"""
+End-to-end benchmark suite: service layer and HTTP endpoints at fixed dataset scales.
+
+Builds a seeded dataset (app.services.data_generator) in a throwaway SQLite
+database, then times every case: QueryBuilder methods, FeatureEngineer
+steps, the validator, the loader, ETLPipeline.run_full_pipeline,
+MetricsCalculator.recalculate_all_metrics and the analytics / smart-query
+endpoints through an in-process TestClient (response cache cleared before
+every request). Each case records latency percentiles, throughput and the
+peak Python allocation of one extra traced run; results are written to JSON
+and compared against a stored baseline.
+
+    python -m benchmarks.suite run --scale 10k
+    python -m benchmarks.suite run --scale 1m --only 'endpoint.*' --save-baseline
+    python -m benchmarks.suite compare results.json benchmarks/baselines/1m.json --threshold 0.2
+
+`run` compares against benchmarks/baselines/<scale>.json when it exists and
+exits with code 1 on a regression. Baselines are machine specific: record
+them on the machine that runs the comparison. Building the 10m scale is
+bound by SQLite inserts (about 10 minutes); pass --db to keep the database
+and reuse it on the next run.
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Dataset shape and repeats per scale; every scale covers two years of check-ins
+SCALES = {
+    "10k": {"bookings": 10_000, "hotels": 10, "rooms_per_hotel": 100, "repeats": 20},
+    "1m": {"bookings": 1_000_000, "hotels": 50, "rooms_per_hotel": 200, "repeats": 5},
+    "10m": {"bookings": 10_000_000, "hotels": 200, "rooms_per_hotel": 250, "repeats": 3},
+}
+DATASET_DAYS = 730
+
+# Rows loaded per loader iteration (into an empty database)
+LOADER_ROWS = 20_000
+
+# Slow cases (extract, loader, full pipeline, metrics rebuild) skip the warm-up
+# and run at most this many times
+HEAVY_REPEATS = 3
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Latency changes smaller than this are noise, whatever the ratio
+MIN_DELTA_MS = 0.5
+
+ENDPOINTS = [
+    "/analytics/summary",
+    "/analytics/revenue?hotel_id=1",
+    "/analytics/daily/1",
+    "/analytics/occupancy/1",
+    "/analytics/metrics/1",
+    "/bookings/?hotel_id=1",
+    "/smart-queries/total_revenue",
+    "/smart-queries/occupancy-stats/1",
+    "/smart-queries/top_bookings",
+    "/smart-queries/booking-sources",
+    "/smart-queries/weekend-vs-weekday/1",
+    "/smart-queries/cancellations",
+    "/smart-queries/popular-rooms/1",
+]
+
+
+class Case:
+
+    #One benchmarked operation: setup() runs untimed before each call and its result is passed to run()
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable,
+        setup: Optional[Callable] = None,
+        rows: int = 0,
+        heavy: bool = False
+    ):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.rows = rows
+        self.heavy = heavy
+
+    def call(self) -> float:
+        with contextlib.redirect_stdout(io.StringIO()):
+            arg = self.setup() if self.setup else None
+            start = time.perf_counter()
+            self.run(arg) if self.setup else self.run()
+            return time.perf_counter() - start
+
+
+def measure(case: Case, repeats: int) -> Dict:
+    """Warm up once, time `repeats` calls, then trace one more call for its peak allocation."""
+    if case.heavy:
+        repeats = min(repeats, HEAVY_REPEATS)
+    else:
+        case.call()
+    samples = np.array([case.call() for _ in range(repeats)]) * 1000
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        arg = case.setup() if case.setup else None
+        tracemalloc.start()
+        case.run(arg) if case.setup else case.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del arg
+
+    result = {
+        "iterations": repeats,
+        "mean_ms": round(float(samples.mean()), 3),
+        "min_ms": round(float(samples.min()), 3),
+        "max_ms": round(float(samples.max()), 3),
+        "ops_per_sec": round(1000 / float(samples.mean()), 2),
+        "peak_alloc_mb": round(peak / 2**20, 2),
+    }
+    for pct, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+        result[f"p{pct}_ms"] = round(float(value), 3)
+    if case.rows:
+        result["rows"] = case.rows
+        result["rows_per_sec"] = round(case.rows * 1000 / result["p50_ms"], 1)
+    return result
+
+
+def prepare_dataset(db_path: Optional[str], scale: Dict, seed: int) -> Dict:
+    """Create (or reuse) the benchmark database; returns the dataset facts for the report."""
+    from benchmarks.datasets import create_benchmark_session, populate_bookings
+    from app.database.migrations import run_migrations
+    from app.models.hotel import Booking
+    from app.services.booking_rollup import BookingRollups
+    from app.utils.metrics_calculator import MetricsCalculator
+
+    db, path = create_benchmark_session(db_path)
+    try:
+        run_migrations(db.get_bind())
+        existing = db.query(Booking).count()
+        if existing == scale["bookings"]:
+            print(f"Reusing {existing:,} bookings in {path}")
+            return {"path": path, "reused": True, "build_seconds": 0.0}
+        if existing:
+            raise SystemExit(f"{path} holds {existing:,} bookings, expected {scale['bookings']:,}")
+
+        print(f"Generating {scale['bookings']:,} bookings in {path}...")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            info = populate_bookings(
+                db, scale["bookings"], num_hotels=scale["hotels"],
+                rooms_per_hotel=scale["rooms_per_hotel"], days=DATASET_DAYS, seed=seed
+            )
+            MetricsCalculator.bulk_calculate_metrics(db, info["start_date"], info["end_date"])
+            BookingRollups.rebuild(db)
+            db.commit()
+            db.connection().exec_driver_sql("ANALYZE")
+        return {"path": path, "reused": False, "build_seconds": round(time.perf_counter() - start, 2)}
+    finally:
+        db.close()
+
+
+def service_cases(db, load_db) -> List[Case]:
+    from sqlalchemy import insert, select
+    from app.database.migrations import run_migrations
+    from app.models.hotel import Booking, BookingRollup, DailyMetrics, Hotel, Room
+    from app.services.data_validator import BookingDataValidator
+    from app.services.etl_pipeline import ETLPipeline
+    from app.services.feature_engineering import FeatureEngineer
+    from app.services.query_builder import QueryBuilder
+    from app.utils.metrics_calculator import MetricsCalculator
+
+    pipeline = ETLPipeline(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        frame = pipeline.extract_from_database()
+    rows = len(frame)
+    clean = BookingDataValidator.clean_dataframe(frame.copy())
+    builder = QueryBuilder(db)
+
+    # Each feature step gets a fresh copy of the frame the previous step produces
+    inputs = {"time": clean}
+    inputs["stay"] = FeatureEngineer.create_time_features(clean.copy())
+    inputs["pricing"] = FeatureEngineer.create_stay_features(inputs["stay"].copy())
+    inputs["aggregated"] = FeatureEngineer.create_pricing_features(inputs["pricing"].copy())
+    inputs["occupancy"] = FeatureEngineer.create_aggregated_features(inputs["aggregated"].copy())
+
+    # The loader writes into a second database with the same hotels and rooms, emptied before each call
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations(load_db.get_bind())
+    for model in (Hotel, Room):
+        rows_to_copy = [dict(row._mapping) for row in db.execute(select(model.__table__))]
+        load_db.execute(insert(model.__table__), rows_to_copy)
+    load_db.commit()
+    loader_frame = frame.head(LOADER_ROWS)
+    loader = ETLPipeline(load_db)
+
+    def empty_loader_db():
+        for model in (Booking, DailyMetrics, BookingRollup):
+            load_db.query(model).delete()
+        load_db.commit()
+
+    return [
+        Case("query_builder.total_revenue", lambda: builder.get_total_revenue()),
+        Case("query_builder.total_revenue_hotel", lambda: builder.get_total_revenue(hotel_id=1)),
+        Case("query_builder.occupancy_stats", lambda: builder.get_occupancy_stats(1)),
+        Case("query_builder.top_bookings", lambda: builder.get_top_bookings()),
+        Case("query_builder.booking_sources", lambda: builder.get_booking_source_distribution()),
+        Case("query_builder.weekend_vs_weekday", lambda: builder.get_weekend_vs_weekday_comparison(1)),
+        Case("query_builder.cancellations", lambda: builder.get_cancellation_analysis()),
+        Case("query_builder.popular_rooms", lambda: builder.get_popular_room_types(1)),
+        Case("features.time", FeatureEngineer.create_time_features, inputs["time"].copy, rows),
+        Case("features.stay", FeatureEngineer.create_stay_features, inputs["stay"].copy, rows),
+        Case("features.pricing", FeatureEngineer.create_pricing_features, inputs["pricing"].copy, rows),
+        Case("features.aggregated", FeatureEngineer.create_aggregated_features, inputs["aggregated"].copy, rows),
+        Case(
+            "features.occupancy", lambda df: FeatureEngineer.create_occupancy_features(df, db),
+            inputs["occupancy"].copy, rows
+        ),
+        Case("validator.validate", lambda: BookingDataValidator.validate(frame), rows=rows),
+        Case("etl.extract_database", pipeline.extract_from_database, rows=rows, heavy=True),
+        Case(
+            "etl.load_bulk", lambda _: loader.load_to_database(loader_frame),
+            empty_loader_db, len(loader_frame), heavy=True
+        ),
+        # The setup syncs the feature store (a no-op after the first call) so every timed run re-processes
+        # data that is already loaded, like a scheduled re-run
+        Case(
+            "etl.run_full_pipeline", lambda _: ETLPipeline(db).run_full_pipeline("database"),
+            lambda: ETLPipeline(db).sync_feature_store(), rows, heavy=True
+        ),
+        Case(
+            "metrics.recalculate_all", lambda: MetricsCalculator.recalculate_all_metrics(db),
+            rows=rows, heavy=True
+        ),
+    ]
+
+
+def endpoint_cases(db) -> List[Case]:
+    from benchmarks.check_query_plans import build_client
+    from app.utils.cache import query_cache
+    from app.utils.occupancy_index import occupancy_index
+
+    client = build_client(db)
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+    def cold():
+        # Every timed request recomputes: no cached response, no prebuilt occupancy index
+        query_cache.clear()
+        occupancy_index.invalidate()
+
+    return [
+        Case(f"endpoint.GET {url}", lambda _, url=url: get(url), cold)
+        for url in ENDPOINTS
+    ]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, metric: str = "p50_ms") -> List[Dict]:
+    """
+    Compare two suite reports case by case.
+
+    A case regresses when its `metric` latency or its peak allocation grew by
+    more than `threshold` (0.1 = 10%) over the baseline.
+    """
+    if current["meta"]["scale"] != baseline["meta"]["scale"]:
+        raise ValueError(
+            f"Scale mismatch: {current['meta']['scale']} vs baseline {baseline['meta']['scale']}"
+        )
+    rows = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append({"case": name, "status": "new"})
+            continue
+        latency = result[metric] / base[metric] - 1 if base[metric] else 0.0
+        memory = result["peak_alloc_mb"] / base["peak_alloc_mb"] - 1 if base["peak_alloc_mb"] else 0.0
+        slower = latency > threshold and result[metric] - base[metric] > MIN_DELTA_MS
+        bigger = memory > threshold and result["peak_alloc_mb"] - base["peak_alloc_mb"] > 1
+        rows.append({
+            "case": name,
+            "status": "regression" if slower or bigger else "ok",
+            "baseline": base[metric],
+            "current": result[metric],
+            "latency_change": round(latency, 4),
+            "memory_change": round(memory, 4),
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict], metric: str) -> bool:
+    """Print the comparison table; returns True if any case regressed."""
+    print(f"\n{'case':<48} {'baseline':>10} {'current':>10} {'change':>8} {'memory':>8}")
+    for row in rows:
+        if row["status"] == "new":
+            print(f"{row['case']:<48} {'(new case)':>10}")
+            continue
+        flag = "  REGRESSION" if row["status"] == "regression" else ""
+        print(f"{row['case']:<48} {row['baseline']:>10.2f} {row['current']:>10.2f} "
+              f"{row['latency_change']:>+8.1%} {row['memory_change']:>+8.1%}{flag}")
+    regressions = [row["case"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) in {metric} or peak allocation")
+    return bool(regressions)
+
+
+def load_report(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {path}")
+
+
+def run_suite(args) -> Dict:
+    scale = SCALES[args.scale]
+    repeats = args.repeats or scale["repeats"]
+
+    # Service side effects go to a scratch directory; settings must be set before app imports
+    scratch = tempfile.mkdtemp(prefix="hoteliq-suite-")
+    os.environ["FEATURE_STORE_DIR"] = os.path.join(scratch, "feature_store")
+    os.environ["QUARANTINE_DIR"] = os.path.join(scratch, "quarantine")
+    os.environ["FORECAST_MODEL_DIR"] = os.path.join(scratch, "models")
+
+    from benchmarks.datasets import create_benchmark_session
+
+    dataset = prepare_dataset(args.db, scale, args.seed)
+    db, _ = create_benchmark_session(dataset["path"])
+    load_db, load_path = create_benchmark_session()
+    results = {}
+    try:
+        cases = service_cases(db, load_db) + endpoint_cases(db)
+        if args.only:
+            cases = [case for case in cases if any(fnmatch.fnmatch(case.name, p) for p in args.only)]
+        for case in cases:
+            results[case.name] = measure(case, repeats)
+            print(f"  {case.name:<48} p50 {results[case.name]['p50_ms']:>10.2f} ms  "
+                  f"p99 {results[case.name]['p99_ms']:>10.2f} ms  "
+                  f"peak {results[case.name]['peak_alloc_mb']:>8.1f} MB")
+    finally:
+        db.close()
+        load_db.close()
+        os.remove(load_path)
+        shutil.rmtree(scratch, ignore_errors=True)
+        if args.db is None:
+            os.remove(dataset["path"])
+
+    return {
+        "meta": {
+            "scale": args.scale,
+            "bookings": scale["bookings"],
+            "hotels": scale["hotels"],
+            "seed": args.seed,
+            "repeats": repeats,
+            "dataset_build_seconds": dataset["build_seconds"],
+            "dataset_reused": dataset["reused"],
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HotelIQ benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the suite at one dataset scale")
+    run.add_argument("--scale", choices=list(SCALES), default="10k")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--repeats", type=int, help="Timed calls per case (default depends on the scale)")
+    run.add_argument("--only", action="append", help="Case name glob (repeatable), e.g. 'endpoint.*'")
+    run.add_argument("--db", help="Keep the dataset in this SQLite file and reuse it on later runs")
+    run.add_argument("--output", help="Results JSON (default benchmarks/results/<scale>-<time>.json)")
+    run.add_argument("--baseline", help="Baseline JSON (default benchmarks/baselines/<scale>.json)")
+    run.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    run.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown (0.1 = 10%%)")
+    run.add_argument("--metric", default="p50_ms", help="Latency field compared with the baseline")
+
+    cmp = commands.add_parser("compare", help="Compare a results file with a baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.1)
+    cmp.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        rows = compare(load_report(args.current), load_report(args.baseline), args.threshold, args.metric)
+        sys.exit(1 if print_comparison(rows, args.metric) else 0)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    baseline = load_report(baseline_path) if os.path.exists(baseline_path) else None
+
+    report = run_suite(args)
+    save_report(report, args.output or os.path.join(
+        RESULTS_DIR, f"{args.scale}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    ))
+    if args.save_baseline:
+        save_report(report, baseline_path)
+    elif baseline is not None:
+        print(f"\nComparing with {baseline_path}")
+        rows = compare(report, baseline, args.threshold, args.metric)
+        if print_comparison(rows, args.metric):
+            sys.exit(1)
+    else:
+        print(f"No baseline at {baseline_path}; store one with --save-baseline")
+
+
+if __name__ == "__main__":
+    main()